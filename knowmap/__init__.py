@@ -0,0 +1 @@
+"""Engine modules backing the Cross-Domain Knowledge Mapping dashboard (main.py)."""
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# ----------------------------------------
+# 🗃 CONTENT-ADDRESSED ARTIFACT CACHE
+# ----------------------------------------
+# Every derived artifact (overview stats, NER columns, graph HTML, link and
+# near-duplicate tables, ...) is keyed by a hash of (dataset fingerprint,
+# stage, parameters, model/code version), so a change to any input is a new
+# key and stale results are never served. Two tiers:
+#   memory -> process-wide LRU bounded by serialized size (shared by all
+#             workspaces: keys are content addresses, so sharing is safe)
+#   disk   -> one pickle per artifact under <dir>/<stage>/, written to a temp
+#             file and renamed into place; LRU by file mtime (bumped on hit).
+#             A running byte total decides when to trim, so the directory is
+#             only listed when the tier is over its limit.
+# Hit / miss / write / eviction counters are kept per stage.
+DEFAULT_MEMORY_BYTES = 256 << 20
+DEFAULT_DISK_BYTES = 1 << 30
+METRICS = ["memory_hits", "disk_hits", "misses", "writes", "evictions"]
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def artifact_key(fingerprint: str, stage: str, params: dict = None, version: str = "") -> str:
+    """Content address of a derived artifact"""
+    payload = json.dumps([fingerprint, stage, params or {}, version], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """LRU of artifacts bounded by their serialized size"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()         # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: str, value, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+_shared_memory = MemoryTier()
+
+
+class ArtifactCache:
+    """Two-tier (memory / disk) size-bounded LRU cache of derived artifacts"""
+
+    def __init__(self, directory: str, max_disk_bytes: int = DEFAULT_DISK_BYTES, memory: MemoryTier = None):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = memory if memory is not None else MemoryTier()
+        self._metrics = {}
+        self._disk_bytes = None         # running size of the disk tier (None until first scanned)
+        self._lock = threading.Lock()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage, f"{key}.pkl")
+
+    def _count(self, stage: str, metric: str, n: int = 1):
+        with self._lock:
+            counters = self._metrics.setdefault(stage, dict.fromkeys(METRICS, 0))
+            counters[metric] += n
+
+    # -- lookups ------------------------------------------------------------
+    def get(self, stage: str, key: str, default=None):
+        missing = object()
+        value = self.memory.get(key, missing)
+        if value is not missing:
+            self._count(stage, "memory_hits")
+            return value
+
+        path = self._path(stage, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            value = pickle.loads(data)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self._count(stage, "misses")
+            return default
+
+        os.utime(path)                  # LRU: a hit makes the file recent
+        self._count(stage, "disk_hits")
+        self.memory.put(key, value, len(data))
+        return value
+
+    def put(self, stage: str, key: str, value):
+        """Store an artifact in both tiers (atomic rename on disk); trims the disk tier when over its limit"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        self._count(stage, "writes")
+        self.memory.put(key, value, len(data))
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data) - replaced
+            over = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+        if over:
+            self.evict(self.max_disk_bytes)
+        return value
+
+    def get_or_compute(self, stage: str, key: str, compute):
+        """Cached artifact, or compute() stored under the key"""
+        missing = object()
+        value = self.get(stage, key, missing)
+        if value is missing:
+            value = self.put(stage, key, compute())
+        return value
+
+    def contains(self, stage: str, key: str) -> bool:
+        return key in self.memory or os.path.exists(self._path(stage, key))
+
+    # -- maintenance --------------------------------------------------------
+    def _entries(self) -> list:
+        """[(mtime, size, stage, path)] of every artifact on disk, oldest first"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for stage in os.listdir(self.directory):
+            stage_dir = os.path.join(self.directory, stage)
+            if not os.path.isdir(stage_dir):
+                continue
+            for name in os.listdir(stage_dir):
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(stage_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, stage, path))
+        return sorted(entries)
+
+    def evict(self, max_bytes: int) -> int:
+        """Delete least recently used artifacts on disk until the tier fits; returns the count"""
+        entries = self._entries()
+        used = sum(e[1] for e in entries)
+        evicted = 0
+        for _, size, stage, path in entries:
+            if used <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            used -= size
+            evicted += 1
+            self._count(stage, "evictions")
+        with self._lock:
+            self._disk_bytes = used
+        return evicted
+
+    def clear(self):
+        """Drop every artifact on disk (and the shared memory tier)"""
+        self.evict(0)
+        self.memory.clear()
+
+    def metrics(self) -> list:
+        """Per-stage counters plus disk usage, as records"""
+        disk = {}
+        for _, size, stage, _ in self._entries():
+            files, total = disk.get(stage, (0, 0))
+            disk[stage] = (files + 1, total + size)
+        with self._lock:
+            stages = sorted(set(self._metrics) | set(disk))
+            rows = []
+            for stage in stages:
+                counters = self._metrics.get(stage, dict.fromkeys(METRICS, 0))
+                lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                rows.append({
+                    "stage": stage, **counters,
+                    "hit_rate": hits / lookups if lookups else 0.0,
+                    "disk_files": disk.get(stage, (0, 0))[0],
+                    "disk_bytes": disk.get(stage, (0, 0))[1],
+                })
+        return rows
+
+    def memory_usage(self) -> dict:
+        return {"entries": len(self.memory), "bytes": self.memory.bytes, "max_bytes": self.memory.max_bytes}
+
+
+def shared_artifact_cache(directory: str, max_disk_bytes: int = DEFAULT_DISK_BYTES,
+                          max_memory_bytes: int = DEFAULT_MEMORY_BYTES) -> ArtifactCache:
+    """Process-wide cache for a directory; all of them share one memory tier that survives reruns"""
+    with _shared_lock:
+        _shared_memory.max_bytes = max_memory_bytes
+        cache = _shared_caches.get(directory)
+        if cache is None:
+            cache = _shared_caches[directory] = ArtifactCache(directory, max_disk_bytes, _shared_memory)
+        cache.max_disk_bytes = max_disk_bytes
+        return cache
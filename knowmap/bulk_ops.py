@@ -0,0 +1,166 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# 🧹 BULK ADMIN OPERATIONS & UNDO LOG
+# ----------------------------------------
+# Merges and deletions are applied to the whole dataset in one vectorized
+# pass. Every operation returns a diff summary and an undo entry holding
+# only the rows it touched, so the last changes can be rolled back without
+# keeping full copies of the dataset.
+MAX_UNDO_ENTRIES = 10
+MERGE_COLUMNS = ["old", "new"]
+
+
+def _read_table(uploaded_file, header_names) -> pd.DataFrame:
+    """Read an uploaded CSV, or a TXT file with one value per line, as strings"""
+    name = getattr(uploaded_file, "name", "")
+    if name.lower().endswith(".csv"):
+        return pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+    raw = uploaded_file.read()
+    text = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+    return pd.DataFrame({header_names[0]: text.splitlines()})
+
+
+def read_merge_mapping(uploaded_file) -> pd.DataFrame:
+    """Read an old -> new sentence mapping ('old'/'new' columns or the first two columns)
+
+    Chains (a -> b, b -> c) are resolved to their final target, so the result
+    does not depend on row order. Cycles raise ValueError.
+    """
+    table = _read_table(uploaded_file, MERGE_COLUMNS)
+    if not set(MERGE_COLUMNS) <= set(table.columns):
+        if table.shape[1] < 2:
+            raise ValueError("Mapping file needs 'old' and 'new' columns (or two columns).")
+        table = table.iloc[:, :2].set_axis(MERGE_COLUMNS, axis=1)
+
+    table = table[MERGE_COLUMNS].astype(str)
+    table = table[(table["old"].str.strip() != "") & (table["new"].str.strip() != "")]
+    table = table[table["old"] != table["new"]].drop_duplicates("old", keep="last")
+
+    mapping = dict(zip(table["old"], table["new"]))
+    resolved = {}
+    for old in mapping:
+        target, seen = mapping[old], {old}
+        while target in mapping:
+            if target in seen:
+                raise ValueError(f"Mapping contains a cycle through: {target!r}")
+            seen.add(target)
+            target = mapping[target]
+        resolved[old] = target
+    return pd.DataFrame({"old": list(resolved), "new": list(resolved.values())})
+
+
+def read_id_list(uploaded_file) -> list:
+    """Read record IDs from a CSV ('id' or first column) or TXT (one per line)"""
+    table = _read_table(uploaded_file, ["id"])
+    column = "id" if "id" in table.columns else table.columns[0]
+    ids = table[column].astype(str).str.strip()
+    return ids[ids != ""].drop_duplicates().tolist()
+
+
+def apply_merges(sentences: pd.Series, mapping: dict) -> pd.Series:
+    """Replace every mapped sentence with its canonical form in one vectorized pass"""
+    mapped = sentences.astype(str).map(mapping)
+    return mapped.where(mapped.notna(), sentences)
+
+
+def merge_sentences(df: pd.DataFrame, mapping: dict, column: str = "sentence"):
+    """Apply an old -> new mapping to a column
+
+    Returns (new df, diff, undo entry). The diff has one row per mapping
+    entry with the number of rows it rewrote.
+    """
+    before = df[column]
+    after = apply_merges(before, mapping)
+    changed = np.flatnonzero((before.astype(str) != after.astype(str)).values)
+
+    touched = before.iloc[changed].astype(str)
+    counts = touched.value_counts()
+    diff = pd.DataFrame({"old": list(mapping), "new": list(mapping.values())})
+    diff["rows_changed"] = diff["old"].map(counts).fillna(0).astype(int)
+
+    out = df.copy()
+    out[column] = after
+    undo = {
+        "action": "merge",
+        "column": column,
+        "positions": changed,
+        "values": before.iloc[changed].values,
+        "summary": f"Merged {int((diff['rows_changed'] > 0).sum())} sentence(s) across {len(changed)} row(s)",
+        "rows_after": len(out),
+    }
+    return out, diff.sort_values("rows_changed", ascending=False, kind="stable").reset_index(drop=True), undo
+
+
+def delete_records(df: pd.DataFrame, ids, column: str = "id"):
+    """Drop every row whose ID is in `ids` (compared as strings)
+
+    Returns (new df, diff, undo entry). The diff lists each requested ID with
+    the number of rows removed (0 = not found).
+    """
+    ids = [str(i) for i in ids]
+    keys = df[column].astype(str)
+    remove = keys.isin(set(ids)).values
+    positions = np.flatnonzero(remove)
+
+    counts = keys[remove].value_counts()
+    diff = pd.DataFrame({"id": ids})
+    diff["rows_removed"] = diff["id"].map(counts).fillna(0).astype(int)
+
+    out = df[~remove].reset_index(drop=True)
+    undo = {
+        "action": "delete",
+        "positions": positions,
+        "rows": df.iloc[positions].reset_index(drop=True),
+        "summary": f"Deleted {len(positions)} row(s) for {int((diff['rows_removed'] > 0).sum())} ID(s)",
+        "rows_after": len(out),
+    }
+    return out, diff, undo
+
+
+def undo_operation(df: pd.DataFrame, entry: dict) -> pd.DataFrame:
+    """Reverse one merge or delete; `df` must be the state right after that operation"""
+    if len(df) != entry["rows_after"]:
+        raise ValueError("The dataset changed since this operation; it can no longer be undone.")
+    if entry["action"] == "merge":
+        out = df.copy()
+        column = out.columns.get_loc(entry["column"])
+        out.iloc[entry["positions"], column] = entry["values"]
+        return out
+
+    # Re-insert deleted rows at their original positions
+    n_rows = len(df) + len(entry["rows"])
+    kept = np.ones(n_rows, dtype=bool)
+    kept[entry["positions"]] = False
+    order = np.concatenate([np.flatnonzero(kept), entry["positions"]])
+    combined = pd.concat([df, entry["rows"]], ignore_index=True)
+    return combined.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+
+
+class UndoLog:
+    """Bounded stack of reversible admin operations (newest last)"""
+
+    def __init__(self, max_entries: int = MAX_UNDO_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = []
+
+    def push(self, entry: dict, user: str = ""):
+        entry = dict(entry, user=user, timestamp=datetime.datetime.now().isoformat(timespec="seconds"))
+        self.entries.append(entry)
+        del self.entries[:-self.max_entries]
+
+    def pop(self) -> dict:
+        return self.entries.pop()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def history(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [{"timestamp": e["timestamp"], "user": e["user"], "action": e["action"], "summary": e["summary"]}
+             for e in reversed(self.entries)],
+            columns=["timestamp", "user", "action", "summary"]
+        )
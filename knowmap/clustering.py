@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from knowmap.partitions import PartitionIndex
+from knowmap.vector_ops import SCORE_BLOCK, normalize_rows
+
+# ----------------------------------------
+# 🧭 EMBEDDING CLUSTERS & COARSE-TO-FINE ROUTING
+# ----------------------------------------
+# Queries first rank the cluster centroids and then score only the rows of
+# the best `nprobe` clusters. Per-domain centroids give a cheap
+# domain x domain similarity summary for the Overview page.
+MINIBATCH_SIZE = 1024
+MINIBATCH_ITERS = 100
+DEFAULT_NPROBE = 4
+
+
+def default_n_clusters(n_rows: int) -> int:
+    """Roughly sqrt(N) clusters, at least 1"""
+    return max(1, int(np.sqrt(n_rows)))
+
+
+def minibatch_kmeans(matrix, k: int, batch_size: int = MINIBATCH_SIZE,
+                     n_iter: int = MINIBATCH_ITERS, seed: int = 0) -> np.ndarray:
+    """Spherical mini-batch k-means (Sculley 2010) on normalised vectors"""
+    rng = np.random.default_rng(seed)
+    n_rows = len(matrix)
+    k = min(k, n_rows)
+    centroids = normalize_rows(matrix[np.sort(rng.choice(n_rows, k, replace=False))]).copy()
+    counts = np.zeros(k, dtype=np.float64)
+
+    for _ in range(n_iter):
+        batch = normalize_rows(matrix[np.sort(rng.choice(n_rows, min(batch_size, n_rows), replace=False))])
+        assign = (batch @ centroids.T).argmax(axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, batch)
+        batch_counts = np.bincount(assign, minlength=k)
+        counts += batch_counts
+
+        updated = batch_counts > 0
+        rate = (batch_counts[updated] / counts[updated]).astype(np.float32)[:, None]
+        means = sums[updated] / batch_counts[updated, None]
+        centroids[updated] = (1 - rate) * centroids[updated] + rate * means
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+def assign_clusters(matrix, centroids, block: int = SCORE_BLOCK) -> np.ndarray:
+    """Nearest centroid (highest dot product) for every row"""
+    out = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), block):
+        rows = np.asarray(matrix[start:start + block], dtype=np.float32)
+        out[start:start + len(rows)] = (rows @ centroids.T).argmax(axis=1)
+    return out
+
+
+def domain_centroids(meta: pd.DataFrame, matrix, block: int = SCORE_BLOCK):
+    """(domain names, normalised mean embedding per domain)"""
+    codes, domains = pd.factorize(meta["domain"].astype(str), sort=True)
+    sums = np.zeros((len(domains), matrix.shape[1]), dtype=np.float64)
+    for start in range(0, len(matrix), block):
+        rows = normalize_rows(matrix[start:start + block])
+        np.add.at(sums, codes[start:start + len(rows)], rows)
+    return [str(d) for d in domains], normalize_rows(sums)
+
+
+def centroid_similarity(keys, centroids) -> pd.DataFrame:
+    """Cosine similarity between every pair of centroids as a labelled matrix"""
+    centroids = normalize_rows(centroids)
+    return pd.DataFrame(centroids @ centroids.T, index=keys, columns=keys)
+
+
+class ClusterIndex:
+    """Cluster centroids plus row-id partitions for coarse-to-fine search"""
+
+    def __init__(self, centroids, partition: PartitionIndex, domain_keys, domain_vectors,
+                 fingerprint: str = ""):
+        self.centroids = centroids
+        self.partition = partition
+        self.domain_keys = list(domain_keys)
+        self.domain_vectors = domain_vectors
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, meta: pd.DataFrame, matrix, n_clusters=None, fingerprint: str = ""):
+        n_clusters = n_clusters or default_n_clusters(len(matrix))
+        centroids = minibatch_kmeans(matrix, n_clusters)
+        assign = assign_clusters(matrix, centroids)
+        partition = PartitionIndex.from_codes(assign, [str(i) for i in range(len(centroids))])
+        domain_keys, domain_vectors = domain_centroids(meta, matrix)
+        return cls(centroids, partition, domain_keys, domain_vectors, fingerprint)
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    def route(self, query_vector, nprobe: int = DEFAULT_NPROBE) -> np.ndarray:
+        """Sorted row ids of the nprobe clusters closest to the query"""
+        scores = self.centroids @ normalize_rows(query_vector)
+        nprobe = min(nprobe, len(scores))
+        best = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        return self.partition.rows_for([str(i) for i in best])
+
+    def domain_similarity(self) -> pd.DataFrame:
+        return centroid_similarity(self.domain_keys, self.domain_vectors)
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path, centroids=self.centroids, offsets=self.partition.offsets,
+            rows=self.partition.rows, domain_keys=np.asarray(self.domain_keys, dtype=str),
+            domain_vectors=self.domain_vectors, fingerprint=self.fingerprint
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            centroids = data["centroids"]
+            partition = PartitionIndex(
+                [str(i) for i in range(len(centroids))], data["offsets"], data["rows"]
+            )
+            return cls(centroids, partition, data["domain_keys"].tolist(),
+                       data["domain_vectors"], str(data["fingerprint"]))
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# 💾 EMBEDDING STORE
+# ----------------------------------------
+# Layout on disk (for EMBEDDINGS_PATH = "cross_domain_embeddings.pkl"):
+#   cross_domain_embeddings.pkl  -> row metadata (id, sentence, domain, label, ...)
+#   cross_domain_embeddings.npy  -> float32 matrix, one row per metadata row
+# The matrix is written first and the metadata last, so an existing .pkl
+# always points at a complete matrix.
+
+
+def matrix_path(path: str) -> str:
+    """Return the .npy matrix path that belongs to a metadata pickle"""
+    return os.path.splitext(path)[0] + ".npy"
+
+
+class EmbeddingWriter:
+    """Write embedding rows into a preallocated .npy file chunk by chunk"""
+
+    def __init__(self, path: str, n_rows: int, dim: int, dtype=np.float32):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.rows_written = 0
+        self._matrix = np.lib.format.open_memmap(
+            self.tmp_path, mode="w+", dtype=dtype, shape=(n_rows, dim)
+        )
+
+    def write(self, row_ids, vectors):
+        """Scatter a chunk of vectors into their original row positions"""
+        self._matrix[np.asarray(row_ids)] = vectors
+        self.rows_written += len(row_ids)
+
+    def close(self):
+        """Flush to disk and atomically move the matrix into place"""
+        self._matrix.flush()
+        del self._matrix
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Drop a partially written matrix"""
+        del self._matrix
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def save_metadata(df: pd.DataFrame, path: str):
+    """Save row metadata next to the embedding matrix (atomic replace)"""
+    tmp_path = path + ".tmp"
+    df.drop(columns=["embedding"], errors="ignore").reset_index(drop=True).to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_embeddings(path: str, mmap: bool = True):
+    """Load (metadata, matrix); also reads legacy pickles with an 'embedding' column"""
+    meta = pd.read_pickle(path)
+    npy_path = matrix_path(path)
+
+    if os.path.exists(npy_path):
+        matrix = np.load(npy_path, mmap_mode="r" if mmap else None)
+    elif "embedding" in meta.columns:
+        matrix = np.asarray(meta["embedding"].tolist(), dtype=np.float32)
+        meta = meta.drop(columns=["embedding"])
+    else:
+        raise ValueError(f"No embedding matrix found for {path}")
+
+    if len(meta) != len(matrix):
+        raise ValueError(
+            f"Embedding store is inconsistent: {len(meta)} rows vs {len(matrix)} vectors"
+        )
+    return meta.reset_index(drop=True), matrix
+
+
+def remove_embeddings(path: str):
+    """Delete the metadata pickle and its matrix"""
+    for p in (path, matrix_path(path)):
+        if os.path.exists(p):
+            os.remove(p)
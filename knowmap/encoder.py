@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from knowmap.embedding_store import EmbeddingWriter
+from knowmap.startup import import_timer
+
+# ----------------------------------------
+# ⚡ LENGTH-BUCKETED CORPUS ENCODER
+# ----------------------------------------
+MODEL_NAME = "all-MiniLM-L6-v2"
+BACKENDS = ["torch", "onnx", "onnx-int8"]
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_CHUNK_SIZE = 4096
+TOKENIZE_BLOCK = 10000
+
+# Minimum per-sentence cosine between a backend and the torch reference
+PARITY_MIN_COSINE = {"torch": 1.0, "onnx": 0.9999, "onnx-int8": 0.98}
+
+# Held by an encode call while it has changed the process-wide thread settings
+_thread_settings_lock = threading.Lock()
+
+
+def load_encoder(backend: str = "torch", model_name: str = MODEL_NAME, num_threads=None):
+    """Load the sentence encoder for the selected inference backend"""
+    if backend == "torch":
+        with import_timer("sentence_transformers"):
+            from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}'. Choose one of {BACKENDS}")
+
+    from knowmap.onnx_backend import ONNX_MODEL_DIR, OnnxSentenceEncoder, export_onnx, is_exported
+
+    quantized = backend == "onnx-int8"
+    if not is_exported(ONNX_MODEL_DIR, quantized=quantized):
+        export_onnx(model_name, ONNX_MODEL_DIR, quantize=quantized)
+    return OnnxSentenceEncoder(ONNX_MODEL_DIR, quantized=quantized, num_threads=num_threads)
+
+
+def token_lengths(model, sentences) -> np.ndarray:
+    """Token count per sentence (falls back to character length)"""
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return np.fromiter((len(s) for s in sentences), dtype=np.int32, count=len(sentences))
+
+    max_length = getattr(model, "max_seq_length", None) or 512
+    lengths = np.empty(len(sentences), dtype=np.int32)
+    for start in range(0, len(sentences), TOKENIZE_BLOCK):
+        block = sentences[start:start + TOKENIZE_BLOCK]
+        input_ids = tokenizer(
+            block, add_special_tokens=True, truncation=True, max_length=max_length
+        )["input_ids"]
+        lengths[start:start + len(block)] = [len(ids) for ids in input_ids]
+    return lengths
+
+
+def length_buckets(lengths: np.ndarray, batch_size: int):
+    """Split row ids into batches of similar token length"""
+    order = np.argsort(lengths, kind="stable")
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def padding_waste(lengths: np.ndarray, batches) -> float:
+    """Fraction of padded token slots that carry no real token"""
+    padded = sum(int(lengths[b].max()) * len(b) for b in batches)
+    if padded == 0:
+        return 0.0
+    return 1.0 - float(lengths.sum()) / padded
+
+
+@contextmanager
+def thread_settings(model, num_threads=None, num_workers=1):
+    """Apply thread settings for one encode call and restore the previous ones afterwards
+
+    The environment and torch's thread pool are process-wide (shared by every
+    session), so nothing set here may outlive the call, and calls that change
+    them run one at a time (otherwise overlapping calls could restore each
+    other's values).
+    """
+    if num_workers <= 1 and not num_threads:
+        yield
+        return
+    with _thread_settings_lock:
+        if num_workers > 1:
+            # Spawned workers inherit the environment: split the cores between them
+            per_worker = num_threads or max(1, (os.cpu_count() or 1) // num_workers)
+            previous = os.environ.get("OMP_NUM_THREADS")
+            os.environ["OMP_NUM_THREADS"] = str(per_worker)
+
+            def restore():
+                if previous is None:
+                    os.environ.pop("OMP_NUM_THREADS", None)
+                else:
+                    os.environ["OMP_NUM_THREADS"] = previous
+        elif hasattr(model, "set_num_threads"):
+            previous = getattr(model, "num_threads", None)
+            model.set_num_threads(num_threads)
+
+            def restore():
+                model.set_num_threads(previous)
+        else:
+            import torch
+            previous = torch.get_num_threads()
+            torch.set_num_threads(num_threads)
+
+            def restore():
+                torch.set_num_threads(previous)
+        try:
+            yield
+        finally:
+            restore()
+
+
+def encode_corpus(model, sentences, store_path, batch_size=DEFAULT_BATCH_SIZE,
+                  chunk_size=DEFAULT_CHUNK_SIZE, num_threads=None, num_workers=1,
+                  progress=None) -> dict:
+    """Encode sentences in length buckets and write them to the embedding store in chunks
+
+    Returns throughput statistics (sentences/sec, padding waste, ...).
+    """
+    sentences = [str(s) for s in sentences]
+    n_rows = len(sentences)
+    if n_rows == 0:
+        raise ValueError("Nothing to encode: the dataset has no sentences")
+
+    if num_workers > 1 and not hasattr(model, "start_multi_process_pool"):
+        raise ValueError("The multi-process pool is only available for the torch backend")
+
+    with thread_settings(model, num_threads, num_workers):
+        return _encode_chunks(model, sentences, store_path, batch_size, chunk_size, num_workers, progress)
+
+
+def _encode_chunks(model, sentences, store_path, batch_size, chunk_size, num_workers, progress) -> dict:
+    n_rows = len(sentences)
+    lengths = token_lengths(model, sentences)
+    batches = length_buckets(lengths, batch_size)
+    batches_per_chunk = max(1, chunk_size // batch_size)
+
+    writer = EmbeddingWriter(store_path, n_rows, model.get_sentence_embedding_dimension())
+    pool = None
+    start = time.perf_counter()
+    try:
+        if num_workers > 1:
+            pool = model.start_multi_process_pool(["cpu"] * num_workers)
+
+        for c in range(0, len(batches), batches_per_chunk):
+            row_ids = np.concatenate(batches[c:c + batches_per_chunk])
+            chunk = [sentences[i] for i in row_ids]
+
+            if pool is not None:
+                vectors = model.encode_multi_process(
+                    chunk, pool, batch_size=batch_size,
+                    chunk_size=max(batch_size, len(chunk) // num_workers)
+                )
+            else:
+                vectors = model.encode(
+                    chunk, batch_size=batch_size,
+                    show_progress_bar=False, convert_to_numpy=True
+                )
+
+            writer.write(row_ids, vectors)
+            if progress is not None:
+                progress(writer.rows_written / n_rows)
+
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "sentences": n_rows,
+        "seconds": elapsed,
+        "sentences_per_sec": n_rows / elapsed if elapsed > 0 else float("inf"),
+        "batches": len(batches),
+        "padding_waste": padding_waste(lengths, batches),
+    }
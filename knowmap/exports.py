@@ -0,0 +1,149 @@
+import glob
+import gzip
+import io
+import json
+import os
+
+import pandas as pd
+
+from knowmap.startup import import_timer
+
+# ----------------------------------------
+# 📦 CHUNK-WRITTEN EXPORTS
+# ----------------------------------------
+# Exports are written chunk by chunk (never one big in-memory string) to a
+# temp file and renamed into place, under a name that carries the dataset
+# version. A download therefore reuses the file until the data changes,
+# and only the newest version of each export is kept on disk. (Serving a
+# file still reads it into memory once, when the download is requested.)
+# Parquet needs pyarrow and zstd needs zstandard; both are optional.
+EXPORT_CHUNK_ROWS = 100_000
+EXPORT_FORMATS = {
+    # format: (file suffix, mime type)
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "csv.zst": (".csv.zst", "application/zstd"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    # graph formats, written by knowmap.graph_export.write_graph_file
+    "graphml": (".graphml", "application/xml"),
+    "gexf": (".gexf", "application/xml"),
+}
+ENTITY_COLUMNS = ["id", "entity", "entity_label"]
+EDGE_COLUMNS = ["id", "source", "relation", "target"]
+
+
+def available_formats() -> list:
+    """Export formats whose optional dependencies are installed"""
+    formats = ["csv", "csv.gz"]
+    try:
+        import zstandard  # noqa: F401
+        formats.append("csv.zst")
+    except ImportError:
+        pass
+    try:
+        import pyarrow  # noqa: F401
+        formats.append("parquet")
+    except ImportError:
+        pass
+    return formats
+
+
+def _chunks(frame: pd.DataFrame, chunk_rows: int):
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield start, frame.iloc[start:start + chunk_rows]
+
+
+def _write_csv_chunks(frame: pd.DataFrame, handle, chunk_rows: int):
+    for start, chunk in _chunks(frame, chunk_rows):
+        chunk.to_csv(handle, index=False, header=start == 0)
+
+
+def _json_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """Nested values (lists of entities / triples) as JSON text, for columnar formats"""
+    out = frame
+    for column in frame.columns:
+        if frame[column].dtype != object:
+            continue
+        sample = frame[column].dropna().head(1)
+        if len(sample) and isinstance(sample.iloc[0], (list, tuple, dict)):
+            if out is frame:
+                out = frame.copy()
+            out[column] = frame[column].map(json.dumps)
+    return out
+
+
+def write_table(frame: pd.DataFrame, path: str, fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Write a table in one of EXPORT_FORMATS, chunk by chunk, atomically"""
+    tmp_path = path + ".tmp"
+    if fmt == "csv":
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            _write_csv_chunks(frame, f, chunk_rows)
+    elif fmt == "csv.gz":
+        with gzip.open(tmp_path, "wt", encoding="utf-8", newline="", compresslevel=6) as f:
+            _write_csv_chunks(frame, f, chunk_rows)
+    elif fmt == "csv.zst":
+        with import_timer("zstandard"):
+            import zstandard
+        with open(tmp_path, "wb") as raw:
+            with zstandard.ZstdCompressor(level=6).stream_writer(raw) as compressed:
+                with io.TextIOWrapper(compressed, encoding="utf-8", newline="") as f:
+                    _write_csv_chunks(frame, f, chunk_rows)
+    elif fmt == "parquet":
+        with import_timer("pyarrow"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        frame = _json_columns(frame)
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for _, chunk in _chunks(frame, chunk_rows):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    os.replace(tmp_path, path)
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Read back any export written by write_table"""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".zst"):
+        with import_timer("zstandard"):
+            import zstandard
+        with open(path, "rb") as raw:
+            with zstandard.ZstdDecompressor().stream_reader(raw) as f:
+                return pd.read_csv(f)
+    return pd.read_csv(path)
+
+
+def entity_table(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per extracted entity: record id, entity text, entity label"""
+    exploded = df[["id", "entities"]].explode("entities").dropna(subset=["entities"])
+    pairs = pd.DataFrame(exploded["entities"].tolist(), columns=["entity", "entity_label"])
+    return pd.concat([exploded[["id"]].reset_index(drop=True), pairs], axis=1)[ENTITY_COLUMNS]
+
+
+def edge_table(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per SVO relation triple: record id, subject, verb lemma, object"""
+    exploded = df[["id", "relations"]].explode("relations").dropna(subset=["relations"])
+    triples = pd.DataFrame(exploded["relations"].tolist(), columns=["source", "relation", "target"])
+    return pd.concat([exploded[["id"]].reset_index(drop=True), triples], axis=1)[EDGE_COLUMNS]
+
+
+def export_path(directory: str, name: str, version: str, fmt: str) -> str:
+    return os.path.join(directory, f"{name}-{version[:16]}{EXPORT_FORMATS[fmt][0]}")
+
+
+def export_file(directory: str, name: str, version: str, fmt: str, build, write=write_table) -> str:
+    """Path of an export for one data version, writing it (write(build(), path, fmt)) only if it is missing
+
+    Older versions of the same export and format are deleted.
+    """
+    path = export_path(directory, name, version, fmt)
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    write(build(), path, fmt)
+    for stale in glob.glob(os.path.join(glob.escape(directory), f"{glob.escape(name)}-*{EXPORT_FORMATS[fmt][0]}")):
+        if stale != path and not stale.endswith(".tmp"):
+            os.remove(stale)
+    return path
@@ -0,0 +1,285 @@
+import datetime
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+# ----------------------------------------
+# 💬 FEEDBACK STORE (SQLite, WAL mode)
+# ----------------------------------------
+# One row per feedback event, indexed by record, user, status and time.
+# Per-dimension counts and hour/day rollups (type x status x domain x user)
+# are maintained in the same transaction as every insert or status change,
+# so the analysis page never scans the event table.
+# Each thread gets its own connection; WAL lets readers run alongside the
+# single writer and busy_timeout makes concurrent writers wait, not fail.
+FEEDBACK_COLUMNS = ["feedback_id", "record_id", "user", "feedback_type", "comment", "status", "timestamp", "domain"]
+COUNT_DIMENSIONS = ["feedback_type", "status", "user"]
+ROLLUP_DIMENSIONS = ["feedback_type", "status", "domain", "user"]
+GRANULARITIES = {"hour": 13, "day": 10}      # ISO timestamp prefix length per bucket
+FEEDBACK_TYPES = ["Error", "Suggestion", "Improvement", "Other"]
+FEEDBACK_STATUSES = ["Pending", "Reviewed", "Resolved", "Rejected"]
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    feedback_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    feedback_type TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    status TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    domain TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_record ON feedback(record_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_user ON feedback(user);
+CREATE INDEX IF NOT EXISTS idx_feedback_status ON feedback(status);
+CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback(timestamp);
+CREATE TABLE IF NOT EXISTS feedback_counts (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS feedback_rollups (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    feedback_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    user TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (granularity, bucket, feedback_type, status, domain, user)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('revision', 0);
+"""
+
+
+def bucket_of(timestamp, granularity: str) -> str:
+    """Start of the hour / day bucket holding a timestamp, as a sortable ISO string"""
+    iso = pd.Timestamp(timestamp).isoformat(timespec="seconds")
+    prefix = iso[:GRANULARITIES[granularity]]
+    return prefix + ":00:00" if granularity == "hour" else prefix
+
+
+class FeedbackStore:
+    """Durable feedback events with indexed lookups and incrementally maintained counts"""
+
+    def __init__(self, path: str, legacy_csv: str = None):
+        self.path = path
+        self._local = threading.local()
+        is_new = not os.path.exists(path)
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        self._migrate(conn)
+        if is_new and legacy_csv and os.path.exists(legacy_csv):
+            self.import_frame(pd.read_csv(legacy_csv))
+
+    # -- connections --------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn):
+        """Upgrade stores created before domain / rollups existed"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(feedback)")}
+        if "domain" not in columns:
+            conn.execute("ALTER TABLE feedback ADD COLUMN domain TEXT NOT NULL DEFAULT ''")
+        has_events = conn.execute("SELECT 1 FROM feedback LIMIT 1").fetchone()
+        has_rollups = conn.execute("SELECT 1 FROM feedback_rollups LIMIT 1").fetchone()
+        if has_events and not has_rollups:
+            with self._transaction() as tx:
+                for granularity, width in GRANULARITIES.items():
+                    suffix = "" if granularity == "day" else " || ':00:00'"
+                    tx.execute(
+                        f"INSERT INTO feedback_rollups SELECT ?, substr(timestamp, 1, {width}){suffix}, "
+                        f"{', '.join(ROLLUP_DIMENSIONS)}, COUNT(*) FROM feedback "
+                        f"GROUP BY 2, {', '.join(ROLLUP_DIMENSIONS)}",
+                        (granularity,)
+                    )
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction (BEGIN IMMEDIATE takes the write lock up front)
+
+        The revision is bumped only if the transaction changed any row, so a
+        no-op write keeps cached views valid.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        changes = conn.total_changes
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if conn.total_changes != changes:
+            conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'revision'")
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _bump_counts(conn, event: dict, delta: int):
+        conn.executemany(
+            "INSERT INTO feedback_counts (dimension, value, count) VALUES (?, ?, ?) "
+            "ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count",
+            [(dim, str(event[dim]), delta) for dim in COUNT_DIMENSIONS]
+        )
+
+    @staticmethod
+    def _bump_rollups(conn, event: dict, delta: int):
+        conn.executemany(
+            "INSERT INTO feedback_rollups VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(granularity, bucket, feedback_type, status, domain, user) "
+            "DO UPDATE SET count = count + excluded.count",
+            [(granularity, bucket_of(event["timestamp"], granularity),
+              *(str(event[dim]) for dim in ROLLUP_DIMENSIONS), delta)
+             for granularity in GRANULARITIES]
+        )
+
+    def _on_insert(self, conn, event: dict):
+        """Maintain derived aggregates inside the insert transaction"""
+        self._bump_counts(conn, event, 1)
+        self._bump_rollups(conn, event, 1)
+
+    def _on_status_change(self, conn, event: dict, new_status: str):
+        for row, delta in ((event, -1), (dict(event, status=new_status), 1)):
+            self._bump_counts(conn, row, delta)
+            self._bump_rollups(conn, row, delta)
+
+    # -- writes -------------------------------------------------------------
+    def _insert(self, conn, record_id, user, feedback_type, comment, status, timestamp, domain) -> int:
+        timestamp = pd.Timestamp(timestamp or datetime.datetime.now()).isoformat(timespec="seconds")
+        event = {"record_id": str(record_id), "user": str(user), "feedback_type": str(feedback_type),
+                 "comment": str(comment), "status": str(status), "timestamp": timestamp,
+                 "domain": str(domain or "")}
+        cursor = conn.execute(
+            f"INSERT INTO feedback ({', '.join(FEEDBACK_COLUMNS[1:])}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            tuple(event[c] for c in FEEDBACK_COLUMNS[1:])
+        )
+        event["feedback_id"] = cursor.lastrowid
+        self._on_insert(conn, event)
+        return event["feedback_id"]
+
+    def add(self, record_id, user: str, feedback_type: str, comment: str,
+            status: str = "Pending", timestamp=None, domain: str = "") -> int:
+        """Append one feedback event (O(1) plus index maintenance); returns its id
+
+        `domain` is the domain of the referenced dataset record, kept for the rollups.
+        """
+        with self._transaction() as conn:
+            return self._insert(conn, record_id, user, feedback_type, comment, status, timestamp, domain)
+
+    def set_status(self, feedback_id: int, status: str) -> bool:
+        """Change the status of one event, keeping the counts in step"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback WHERE feedback_id = ?", (int(feedback_id),)
+            ).fetchone()
+            if row is None or row[FEEDBACK_COLUMNS.index("status")] == status:
+                return False
+            event = dict(zip(FEEDBACK_COLUMNS, row))
+            conn.execute("UPDATE feedback SET status = ? WHERE feedback_id = ?", (status, int(feedback_id)))
+            self._on_status_change(conn, event, status)
+        return True
+
+    def import_frame(self, frame: pd.DataFrame):
+        """Bulk-load legacy feedback rows (e.g. the old feedback.csv) in one transaction"""
+        with self._transaction() as conn:
+            for row in frame.fillna("").to_dict("records"):
+                self._insert(conn, row.get("record_id", ""), row.get("user", ""),
+                             row.get("feedback_type", "") or "Other", row.get("comment", ""),
+                             row.get("status", "") or "Pending", row.get("timestamp") or None,
+                             row.get("domain", ""))
+
+    # -- reads --------------------------------------------------------------
+    def revision(self) -> int:
+        """Increases on every write (cache key for derived views)"""
+        return self._connection().execute(
+            "SELECT value FROM store_meta WHERE key = 'revision'"
+        ).fetchone()[0]
+
+    def total(self) -> int:
+        row = self._connection().execute(
+            "SELECT COALESCE(SUM(count), 0) FROM feedback_counts WHERE dimension = 'status'"
+        ).fetchone()
+        return int(row[0])
+
+    def counts(self, dimension: str) -> pd.Series:
+        """Maintained event counts per value of a dimension (no table scan)"""
+        if dimension not in COUNT_DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        rows = self._connection().execute(
+            "SELECT value, count FROM feedback_counts WHERE dimension = ? AND count > 0 ORDER BY count DESC",
+            (dimension,)
+        ).fetchall()
+        return pd.Series(dict(rows), dtype="int64", name=dimension)
+
+    def rollup(self, start=None, end=None, granularity: str = "day", by=("bucket",)) -> pd.DataFrame:
+        """Event counts in [start, end) grouped by bucket and/or rollup dimensions
+
+        Reads only the rollup table (range scan on its primary key), never the
+        events, so the cost depends on the number of buckets, not of events.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        by = list(by)
+        unknown = set(by) - set(ROLLUP_DIMENSIONS) - {"bucket"}
+        if unknown:
+            raise ValueError(f"Unknown rollup dimension(s): {sorted(unknown)}")
+
+        clauses, params = ["granularity = ?"], [granularity]
+        if start is not None:
+            clauses.append("bucket >= ?")
+            params.append(bucket_of(start, granularity))
+        if end is not None:
+            clauses.append("bucket < ?")
+            params.append(bucket_of(end, granularity))
+        group = ", ".join(by) if by else "granularity"
+        rows = self._connection().execute(
+            f"SELECT {', '.join(by + ['SUM(count)'])} FROM feedback_rollups "
+            f"WHERE {' AND '.join(clauses)} GROUP BY {group} HAVING SUM(count) > 0 ORDER BY {group}",
+            params
+        ).fetchall()
+        return pd.DataFrame(rows, columns=by + ["count"])
+
+    def query(self, record_id=None, user: str = None, status: str = None, domain: str = None,
+              start=None, end=None, limit: int = 100, offset: int = 0) -> pd.DataFrame:
+        """Newest-first events, filtered through the record / user / status / time indexes"""
+        clauses, params = [], []
+        for column, value in (("record_id", record_id), ("user", user), ("status", status), ("domain", domain)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).isoformat(timespec="seconds"))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(pd.Timestamp(end).isoformat(timespec="seconds"))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback {where} "
+            f"ORDER BY feedback_id DESC LIMIT ? OFFSET ?",
+            (*params, int(limit), int(offset))
+        ).fetchall()
+        return pd.DataFrame(rows, columns=FEEDBACK_COLUMNS)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Every event, oldest first (exports only)"""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback ORDER BY feedback_id"
+        ).fetchall()
+        return pd.DataFrame(rows, columns=FEEDBACK_COLUMNS)
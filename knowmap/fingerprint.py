@@ -0,0 +1,32 @@
+import hashlib
+
+import pandas as pd
+
+# ----------------------------------------
+# 🔏 DATASET FINGERPRINTS
+# ----------------------------------------
+CORE_COLUMNS = ["id", "sentence", "domain", "label"]
+
+
+def frame_fingerprint(df: pd.DataFrame, columns=None) -> str:
+    """Stable content hash of a DataFrame (optionally of selected columns)"""
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    digest = hashlib.sha1()
+    digest.update(",".join(map(str, df.columns)).encode())
+    digest.update(str(len(df)).encode())
+    for col in df.columns:
+        values = df[col].astype(str)
+        digest.update(pd.util.hash_pandas_object(values, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Version key of a dataset: content of the core columns plus the full column list
+
+    Derived columns (entities, relations) are identified by name only, so
+    hashing stays cheap however large they are.
+    """
+    digest = hashlib.sha1(frame_fingerprint(df, CORE_COLUMNS).encode())
+    digest.update("\x1f".join(map(str, df.columns)).encode())
+    return digest.hexdigest()
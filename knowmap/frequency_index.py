@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from knowmap.near_duplicates import normalize_sentence
+
+# ----------------------------------------
+# 🔢 EXACT SENTENCE FREQUENCY INDEX
+# ----------------------------------------
+# Built once at ingest: every sentence is normalised (case / whitespace) and
+# fingerprinted to a 64-bit hash, so counting compares integers, not
+# strings. Counts live in sorted integer tables; per-domain counts are a
+# second table ordered by (domain, count desc). Display text is looked up
+# through the first row holding each sentence.
+
+
+def sentence_hashes(sentences: pd.Series) -> np.ndarray:
+    """64-bit fingerprint of every normalised sentence"""
+    normalized = pd.Series([normalize_sentence(s) for s in sentences], dtype=object)
+    return pd.util.hash_pandas_object(normalized, index=False).values
+
+
+class FrequencyIndex:
+    """Exact counts of normalised sentences, overall and per domain"""
+
+    def __init__(self, keys, counts, first_rows, domains, pair_domains, pair_keys, pair_counts,
+                 domain_offsets, fingerprint: str = ""):
+        self.keys = keys                    # sorted unique hashes
+        self.counts = counts                # count per key
+        self.first_rows = first_rows        # first dataset row per key
+        self.domains = list(domains)
+        self.pair_domains = pair_domains    # (domain, key) pairs, by domain then count desc
+        self.pair_keys = pair_keys
+        self.pair_counts = pair_counts
+        self.domain_offsets = domain_offsets
+        self.fingerprint = fingerprint
+        self._order = np.argsort(-counts, kind="stable")
+
+    @classmethod
+    def build(cls, sentences: pd.Series, domains: pd.Series, fingerprint: str = ""):
+        hashes = sentence_hashes(sentences)
+        keys, first_rows, key_codes, counts = np.unique(
+            hashes, return_index=True, return_inverse=True, return_counts=True
+        )
+        domain_codes, domain_keys = pd.factorize(domains.astype(str), sort=True)
+
+        pairs, pair_counts = np.unique(
+            domain_codes.astype(np.int64) * len(keys) + key_codes.ravel(), return_counts=True
+        )
+        pair_domains, pair_keys = pairs // max(len(keys), 1), pairs % max(len(keys), 1)
+        order = np.lexsort((-pair_counts, pair_domains))
+        domain_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(pair_domains, minlength=len(domain_keys)))]
+        ).astype(np.int64)
+        return cls(keys, counts.astype(np.int64), first_rows.astype(np.int64), list(domain_keys),
+                   pair_domains[order], pair_keys[order], pair_counts[order].astype(np.int64),
+                   domain_offsets, fingerprint)
+
+    @property
+    def n_distinct(self) -> int:
+        return len(self.keys)
+
+    def _frame(self, key_ids, counts, sentences=None) -> pd.DataFrame:
+        rows = self.first_rows[key_ids]
+        frame = pd.DataFrame({"row": rows, "count": counts})
+        if sentences is not None:
+            frame.insert(0, "sentence", sentences.iloc[rows].astype(str).values)
+        return frame
+
+    def top(self, n: int = 10, sentences=None) -> pd.DataFrame:
+        """Most frequent sentences (optionally with their display text from `sentences`)"""
+        key_ids = self._order[:n]
+        return self._frame(key_ids, self.counts[key_ids], sentences)
+
+    def top_by_domain(self, domain: str, n: int = 10, sentences=None) -> pd.DataFrame:
+        if domain not in self.domains:
+            return self._frame(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), sentences)
+        d = self.domains.index(domain)
+        start = self.domain_offsets[d]
+        stop = min(self.domain_offsets[d + 1], start + n)
+        return self._frame(self.pair_keys[start:stop], self.pair_counts[start:stop], sentences)
+
+    def count(self, sentence: str) -> int:
+        """Occurrences of a sentence (after normalisation)"""
+        key = sentence_hashes(pd.Series([sentence]))[0]
+        pos = np.searchsorted(self.keys, key)
+        return int(self.counts[pos]) if pos < len(self.keys) and self.keys[pos] == key else 0
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path, keys=self.keys, counts=self.counts, first_rows=self.first_rows,
+            domains=np.asarray(self.domains, dtype=str), pair_domains=self.pair_domains,
+            pair_keys=self.pair_keys, pair_counts=self.pair_counts,
+            domain_offsets=self.domain_offsets, fingerprint=self.fingerprint
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls(data["keys"], data["counts"], data["first_rows"], data["domains"].tolist(),
+                       data["pair_domains"], data["pair_keys"], data["pair_counts"],
+                       data["domain_offsets"], str(data["fingerprint"]))
@@ -0,0 +1,266 @@
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+
+from knowmap.exports import EXPORT_CHUNK_ROWS
+from knowmap.sketches import pack_strings, unpack_strings
+from knowmap.startup import import_timer
+
+# ----------------------------------------
+# 🗂 COMPACT KNOWLEDGE GRAPH EXPORTS
+# ----------------------------------------
+# The graph (entity nodes, relation edges, cross-domain links) is kept as
+# flat arrays: node names and counts, one row per undirected edge (source,
+# target, relation code, cross-domain flag, score) and a symmetric CSR
+# adjacency (indptr / indices, plus the edge row of every entry). Saved as
+# one .npz it reloads without spaCy or networkx, and other tools can read
+# the arrays directly. Names and relation labels are stored as one UTF-8
+# byte array plus offsets (a fixed-width unicode array would pad every
+# entry to the longest name, and fallback entities can be long fragments).
+# GraphML / GEXF are streamed edge by edge to a temp file (networkx builds
+# the whole XML tree in memory first).
+NODE_COLUMNS = ["node", "count"]
+GRAPH_EDGE_COLUMNS = ["source", "target", "label", "cross_domain", "score"]
+
+
+def _object_strings(values) -> np.ndarray:
+    out = np.empty(len(values), dtype=object)
+    out[:] = [str(v) for v in values]
+    return out
+
+
+def _text(value) -> str:
+    """Edge label as text ("" for missing values)"""
+    return "" if value is None or value != value else str(value)
+
+
+class GraphData:
+    """Knowledge graph as arrays: nodes, undirected edge list and CSR adjacency"""
+
+    def __init__(self, names, counts, sources, targets, relation_codes, relations,
+                 cross_domain, scores, key: str = "", csr=None):
+        self.names = _object_strings(names)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.sources = np.asarray(sources, dtype=np.int32)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.relation_codes = np.asarray(relation_codes, dtype=np.int32)
+        self.relations = _object_strings(relations)             # relation label vocabulary
+        self.cross_domain = np.asarray(cross_domain, dtype=bool)
+        self.scores = np.asarray(scores, dtype=np.float32)      # NaN unless cross-domain
+        self.key = key
+        if csr is not None:
+            self.indptr, self.indices, self.edge_index = csr
+        else:
+            self._build_csr()
+
+    def _build_csr(self):
+        n = len(self.names)
+        rows = np.concatenate([self.sources, self.targets])
+        cols = np.concatenate([self.targets, self.sources])
+        edge_rows = np.tile(np.arange(len(self.sources), dtype=np.int32), 2)
+        order = np.lexsort((cols, rows))
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))]).astype(np.int64)
+        self.indices = cols[order]
+        self.edge_index = edge_rows[order]      # edge row of every adjacency entry
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.sources)
+
+    # -- conversion ---------------------------------------------------------
+    @classmethod
+    def from_networkx(cls, G, key: str = ""):
+        """Arrays of a graph from knowledge_graph.build_graph"""
+        names = list(G.nodes())
+        position = {name: i for i, name in enumerate(names)}
+        counts = [count for _, count in G.nodes(data="count", default=0)]
+        sources, targets, labels, cross, scores = [], [], [], [], []
+        for src, dst, data in G.edges(data=True):
+            sources.append(position[src])
+            targets.append(position[dst])
+            labels.append(_text(data.get("label", "")))
+            cross.append(bool(data.get("cross_domain", False)))
+            scores.append(data.get("score", np.nan))
+        relation_codes, relations = pd.factorize(pd.Series(labels, dtype=object), sort=True)
+        return cls(names, counts, sources, targets, relation_codes, list(relations),
+                   cross, np.asarray(scores, dtype=np.float32), key)
+
+    @classmethod
+    def from_edges(cls, edges: pd.DataFrame, nodes: pd.DataFrame = None, key: str = ""):
+        """Arrays from an edge table (GRAPH_EDGE_COLUMNS; only source / target are required)
+
+        Without a node table, a node's count is its number of non-cross-domain edges.
+        """
+        edges = edges.dropna(subset=["source", "target"])
+        cross = edges["cross_domain"].fillna(False).astype(bool).to_numpy() \
+            if "cross_domain" in edges else np.zeros(len(edges), dtype=bool)
+        endpoints = pd.concat([edges["source"], edges["target"]]).astype(str)
+        if nodes is not None:
+            endpoints = pd.concat([nodes["node"].astype(str), endpoints])
+        node_codes, names = pd.factorize(endpoints)
+        offset = len(nodes) if nodes is not None else 0
+        sources = node_codes[offset:offset + len(edges)]
+        targets = node_codes[offset + len(edges):]
+        if nodes is not None:
+            counts = np.zeros(len(names), dtype=np.int64)
+            counts[node_codes[:len(nodes)]] = nodes["count"].fillna(0).astype(np.int64).to_numpy()
+        else:
+            counts = np.bincount(np.concatenate([sources[~cross], targets[~cross]]), minlength=len(names))
+        labels = edges["label"].map(_text) if "label" in edges else pd.Series([""] * len(edges), dtype=object)
+        relation_codes, relations = pd.factorize(labels, sort=True)
+        scores = edges["score"].to_numpy(dtype=np.float32) if "score" in edges \
+            else np.full(len(edges), np.nan, dtype=np.float32)
+        return cls(list(names), counts, sources, targets, relation_codes, list(relations),
+                   cross, scores, key)
+
+    def to_networkx(self):
+        """networkx.Graph with the attributes knowledge_graph.render_graph_html uses"""
+        with import_timer("networkx"):
+            import networkx as nx
+        G = nx.Graph()
+        G.add_nodes_from((name, {"count": int(count)}) for name, count in zip(self.names.tolist(), self.counts))
+        for row, (src, dst) in enumerate(zip(self.sources, self.targets)):
+            attrs = {"label": self.relations[self.relation_codes[row]]}
+            if self.cross_domain[row]:
+                attrs.update(cross_domain=True, score=float(self.scores[row]))
+            G.add_edge(self.names[src], self.names[dst], **attrs)
+        return G
+
+    def nodes(self) -> pd.DataFrame:
+        return pd.DataFrame({"node": self.names, "count": self.counts})[NODE_COLUMNS]
+
+    def edges(self) -> pd.DataFrame:
+        """One row per undirected edge, with node names and relation labels spelled out"""
+        return pd.DataFrame({
+            "source": self.names[self.sources],
+            "target": self.names[self.targets],
+            "label": self.relations[self.relation_codes],
+            "cross_domain": self.cross_domain,
+            "score": self.scores,
+        })[GRAPH_EDGE_COLUMNS]
+
+    def neighbors(self, name: str) -> list:
+        """Names adjacent to a node (CSR row lookup)"""
+        hits = np.flatnonzero(self.names == name)
+        if not len(hits):
+            return []
+        start, stop = self.indptr[hits[0]], self.indptr[hits[0] + 1]
+        return self.names[self.indices[start:stop]].tolist()
+
+    # -- persistence --------------------------------------------------------
+    def save(self, path: str):
+        tmp_path = path + ".tmp.npz"
+        names, name_offsets = pack_strings(self.names)
+        relations, relation_offsets = pack_strings(self.relations)
+        np.savez(
+            tmp_path, names=names, name_offsets=name_offsets, counts=self.counts,
+            sources=self.sources, targets=self.targets, relation_codes=self.relation_codes,
+            relations=relations, relation_offsets=relation_offsets, cross_domain=self.cross_domain,
+            scores=self.scores, indptr=self.indptr, indices=self.indices, edge_index=self.edge_index,
+            key=self.key
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a graph saved by save() (a path or an open binary file)"""
+        with np.load(path) as data:
+            if "name_offsets" not in data.files:
+                # Early files stored fixed-width unicode arrays
+                return cls(data["names"], data["counts"], data["sources"], data["targets"],
+                           data["relation_codes"], data["relations"], data["cross_domain"],
+                           data["scores"], str(data["key"]))
+            return cls(unpack_strings(data["names"], data["name_offsets"]), data["counts"],
+                       data["sources"], data["targets"], data["relation_codes"],
+                       unpack_strings(data["relations"], data["relation_offsets"]),
+                       data["cross_domain"], data["scores"], str(data["key"]),
+                       csr=(data["indptr"], data["indices"], data["edge_index"]))
+
+
+# -- streamed XML formats ---------------------------------------------------
+def _write_lines(path: str, lines):
+    """Write an iterable of lines in blocks to a temp file, then rename it into place"""
+    tmp_path = path + ".tmp"
+    block = []
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            block.append(line)
+            if len(block) >= EXPORT_CHUNK_ROWS:
+                f.writelines(block)
+                block = []
+        f.writelines(block)
+    os.replace(tmp_path, path)
+
+
+def _graphml_lines(graph: GraphData):
+    yield "<?xml version='1.0' encoding='utf-8'?>\n"
+    yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    yield '  <key id="count" for="node" attr.name="count" attr.type="long"/>\n'
+    yield '  <key id="label" for="edge" attr.name="label" attr.type="string"/>\n'
+    yield '  <key id="cross_domain" for="edge" attr.name="cross_domain" attr.type="boolean"/>\n'
+    yield '  <key id="score" for="edge" attr.name="score" attr.type="double"/>\n'
+    yield '  <graph edgedefault="undirected">\n'
+    names = [quoteattr(name) for name in graph.names.tolist()]
+    for name, count in zip(names, graph.counts.tolist()):
+        yield f'    <node id={name}><data key="count">{count}</data></node>\n'
+    relations = [escape(label) for label in graph.relations.tolist()]
+    for src, dst, code, cross, score in zip(graph.sources.tolist(), graph.targets.tolist(),
+                                            graph.relation_codes.tolist(), graph.cross_domain.tolist(),
+                                            graph.scores.tolist()):
+        score_data = f'<data key="score">{score:.6g}</data>' if cross else ""
+        yield (f'    <edge source={names[src]} target={names[dst]}>'
+               f'<data key="label">{relations[code]}</data>'
+               f'<data key="cross_domain">{str(cross).lower()}</data>{score_data}</edge>\n')
+    yield "  </graph>\n</graphml>\n"
+
+
+def _gexf_lines(graph: GraphData):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n'
+    yield '  <graph mode="static" defaultedgetype="undirected">\n'
+    yield '    <attributes class="node"><attribute id="0" title="count" type="long"/></attributes>\n'
+    yield ('    <attributes class="edge"><attribute id="0" title="relation" type="string"/>'
+           '<attribute id="1" title="cross_domain" type="boolean"/>'
+           '<attribute id="2" title="score" type="double"/></attributes>\n')
+    yield "    <nodes>\n"
+    for i, (name, count) in enumerate(zip(graph.names.tolist(), graph.counts.tolist())):
+        yield (f'      <node id="{i}" label={quoteattr(name)}><attvalues>'
+               f'<attvalue for="0" value="{count}"/></attvalues></node>\n')
+    yield "    </nodes>\n    <edges>\n"
+    relations = [quoteattr(label) for label in graph.relations.tolist()]
+    for i, (src, dst, code, cross, score) in enumerate(zip(
+            graph.sources.tolist(), graph.targets.tolist(), graph.relation_codes.tolist(),
+            graph.cross_domain.tolist(), graph.scores.tolist())):
+        score_value = f'<attvalue for="2" value="{score:.6g}"/>' if cross else ""
+        yield (f'      <edge id="{i}" source="{src}" target="{dst}"><attvalues>'
+               f'<attvalue for="0" value={relations[code]}/>'
+               f'<attvalue for="1" value="{str(cross).lower()}"/>{score_value}</attvalues></edge>\n')
+    yield "    </edges>\n  </graph>\n</gexf>\n"
+
+
+def write_graph_file(graph: GraphData, path: str, fmt: str):
+    """Stream a graph to GraphML or GEXF (atomic replace)"""
+    if fmt == "graphml":
+        _write_lines(path, _graphml_lines(graph))
+    elif fmt == "gexf":
+        _write_lines(path, _gexf_lines(graph))
+    else:
+        raise ValueError(f"Unknown graph format: {fmt}")
+
+
+def read_graph_upload(uploaded) -> GraphData:
+    """GraphData from an uploaded .npz (exact) or an edge-list .parquet / .csv export"""
+    name = uploaded.name.lower()
+    if name.endswith(".npz"):
+        return GraphData.load(uploaded)
+    if name.endswith(".parquet"):
+        return GraphData.from_edges(pd.read_parquet(uploaded))
+    if name.endswith((".csv", ".csv.gz")):
+        return GraphData.from_edges(pd.read_csv(uploaded, compression="gzip" if name.endswith(".gz") else None))
+    raise ValueError(f"Unsupported graph file: {uploaded.name}")
@@ -0,0 +1,185 @@
+import os
+import re
+import tempfile
+from collections import Counter
+
+from knowmap.startup import import_timer
+
+# ----------------------------------------
+# 🧠 ENTITY / RELATION EXTRACTION & GRAPH BUILDING
+# ----------------------------------------
+# Plain functions (no Streamlit calls), shared by the extraction and graph
+# pages and by the background precompute pipeline. networkx / pyvis are
+# imported on first use so importing this module stays cheap.
+STRONG_RELATIONS = ["affects", "causes", "leads", "increases", "reduces"]
+GRAPH_OPTIONS = """
+const options = {
+  "nodes": { "borderWidth": 1 },
+  "edges": {
+    "smooth": { "type": "continuous" }
+  },
+  "physics": {
+    "barnesHut": {
+      "gravitationalConstant": -2000,
+      "centralGravity": 0.30,
+      "springLength": 160
+    }
+  }
+}
+"""
+
+# Colors
+GREEN = "#6FD88F"
+BLUE = "#4A86E8"
+PINK = "#FF6AA9"
+GRAY = "#B5B5B5"
+ORANGE = "#FFA62B"
+
+
+def extract_entities_relations(nlp, sentences, progress=None) -> dict:
+    """Named entities and SVO triples per sentence: {"entities": [...], "relations": [...]}"""
+    sentences = list(sentences)
+    all_entities = []
+    all_relations = []
+
+    for i, sentence in enumerate(sentences):
+        doc = nlp(sentence)
+
+        # ---------- Named Entity Extraction ----------
+        entities = [(ent.text, ent.label_) for ent in doc.ents]
+        all_entities.append(entities)
+
+        # ---------- Relation Extraction (SVO Triples) ----------
+        triples = []
+        for token in doc:
+            if token.dep_ == "ROOT" and token.pos_ == "VERB":  # find verb
+                subj = [child.text for child in token.children if child.dep_ in ("nsubj", "nsubjpass")]
+                obj = [child.text for child in token.children if child.dep_ in ("dobj", "pobj")]
+
+                if subj and obj:
+                    triples.append((subj[0], token.lemma_, obj[0]))
+
+        all_relations.append(triples)
+        if progress is not None and i % 1000 == 0:
+            progress(i / len(sentences))
+
+    return {"entities": all_entities, "relations": all_relations}
+
+
+def fallback_entities(text):
+    """Simple entity extraction backup: split on common relation verbs"""
+    parts = re.split(r"\b(uses?|affects?|contains?|requires?|forms?|drives?)\b",
+                     text, flags=re.IGNORECASE)
+    ents = [p.strip() for p in parts if p.strip()]
+    return ents[:2]
+
+
+def build_graph(df, nlp, cached_entities=None, links=None, progress=None):
+    """NetworkX knowledge graph of a dataset; None if no entities were found
+
+    Nodes carry `count` (how often the entity was extracted); edges carry
+    `label` and, for cross-domain links, `cross_domain` and `score`.
+    `cached_entities` (one [(text, label), ...] list per row, as produced by
+    extract_entities_relations) replaces running spaCy again. `links` is a
+    cross-domain link table whose pairs are added as extra edges.
+    """
+    with import_timer("networkx"):
+        import networkx as nx
+
+    G = nx.Graph()
+    freq = Counter()
+    row_entity = {}
+
+    # ------------- PROCESS DATASET --------------------
+    for position, (_, row) in enumerate(df.iterrows()):
+
+        sentence = str(row["sentence"])
+
+        # spaCy NER (from cached extraction results when available)
+        if cached_entities is not None:
+            ents = [text for text, _ in cached_entities[position]]
+        else:
+            ents = [ent.text for ent in nlp(sentence).ents]
+
+        # fallback if spaCy fails
+        if len(ents) < 2:
+            ents = fallback_entities(sentence)
+
+        if len(ents) < 2:
+            continue  # skip sentences with <2 entities
+
+        # use 2 entities max
+        src, dst = ents[:2]
+
+        freq[src] += 1
+        freq[dst] += 1
+        row_entity[row.get("id")] = src
+
+        G.add_node(src)
+        G.add_node(dst)
+        G.add_edge(src, dst, label=row.get("label", ""))
+
+        if progress is not None and position % 1000 == 0:
+            progress(0.9 * position / len(df))
+
+    # -------- CROSS-DOMAIN LINK EDGES --------
+    if links is not None:
+        from knowmap.link_discovery import unique_pairs
+
+        for link in unique_pairs(links).itertuples(index=False):
+            a = row_entity.get(link.source_id)
+            b = row_entity.get(link.target_id)
+            if a is not None and b is not None and a != b and not G.has_edge(a, b):
+                G.add_edge(a, b, label="cross-domain", cross_domain=True,
+                           score=float(link.score))
+
+    # If graph empty
+    if len(G.nodes()) == 0:
+        return None
+
+    nx.set_node_attributes(G, dict(freq), "count")
+    return G
+
+
+def render_graph_html(G) -> str:
+    """Interactive (pyvis) page for a graph from build_graph (or reloaded from an export)"""
+    with import_timer("pyvis"):
+        from pyvis.network import Network
+
+    # ---------------------------------------------------
+    # BUILD PYVIS GRAPH
+    # ---------------------------------------------------
+    net = Network(height="750px", width="100%", bgcolor="#fff", font_color="black")
+
+    # Keep layout stable
+    net.set_options(GRAPH_OPTIONS)
+
+    # Add nodes
+    for node, count in G.nodes(data="count", default=0):
+        color = GREEN if count > 1 else BLUE
+        size = 28 if count > 1 else 18
+
+        net.add_node(node, label=node, color=color, size=size)
+
+    # Add edges
+    for src, dst, data in G.edges(data=True):
+
+        label = data.get("label", "")
+
+        if data.get("cross_domain"):
+            net.add_edge(src, dst, color=ORANGE, width=2,
+                         title=f"cross-domain link (similarity {data['score']:.2f})")
+        elif any(rel in label.lower() for rel in STRONG_RELATIONS):
+            net.add_edge(src, dst, color=PINK, width=3)
+        else:
+            net.add_edge(src, dst, color=GRAY, width=2, dashes=True)
+
+    # Render through a temp file (pyvis only writes pages to .html paths)
+    fd, tmp_path = tempfile.mkstemp(suffix=".html")
+    os.close(fd)
+    try:
+        net.save_graph(tmp_path)
+        with open(tmp_path, "r", encoding="utf-8") as f:
+            return f.read()
+    finally:
+        os.remove(tmp_path)
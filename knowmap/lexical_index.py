@@ -0,0 +1,150 @@
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from knowmap.vector_ops import top_k
+
+# ----------------------------------------
+# 🔤 BM25 INVERTED INDEX
+# ----------------------------------------
+# Posting lists are stored CSR-style: for term t, documents live in
+# doc_ids[offsets[t]:offsets[t + 1]] (int32, ascending) with term
+# frequencies in the matching slice of tfs (uint16).
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+PREFILTER_CANDIDATES = 1000
+
+
+def tokenize(text: str) -> list:
+    """Lower-case word tokens; keeps acronyms, numbers and hyphenated names whole"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class BM25Index:
+    """Okapi BM25 over a list of sentences"""
+
+    def __init__(self, vocab: dict, offsets, doc_ids, tfs, doc_len, fingerprint: str = ""):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.fingerprint = fingerprint
+        self.n_docs = len(doc_len)
+        self.avg_len = float(doc_len.mean()) if self.n_docs else 0.0
+        df = np.diff(offsets)
+        self.idf = np.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    @classmethod
+    def build(cls, sentences, fingerprint: str = ""):
+        """Tokenise every sentence and lay out compact posting lists"""
+        vocab = {}
+        term_ids, docs, freqs = [], [], []
+        doc_len = np.zeros(len(sentences), dtype=np.int32)
+
+        for doc_id, sentence in enumerate(sentences):
+            tokens = tokenize(sentence)
+            doc_len[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                docs.append(doc_id)
+                freqs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")  # keeps doc ids ascending per term
+        counts = np.bincount(term_ids, minlength=len(vocab))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        doc_ids = np.asarray(docs, dtype=np.int32)[order]
+        tfs = np.minimum(np.asarray(freqs, dtype=np.int64), np.iinfo(np.uint16).max)[order].astype(np.uint16)
+        return cls(vocab, offsets, doc_ids, tfs, doc_len, fingerprint)
+
+    def save(self, path: str):
+        terms = np.empty(len(self.vocab), dtype=object)
+        for term, term_id in self.vocab.items():
+            terms[term_id] = term
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path, terms=terms.astype(str), offsets=self.offsets, doc_ids=self.doc_ids,
+            tfs=self.tfs, doc_len=self.doc_len, fingerprint=self.fingerprint
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            vocab = {term: i for i, term in enumerate(data["terms"].tolist())}
+            return cls(vocab, data["offsets"], data["doc_ids"], data["tfs"],
+                       data["doc_len"], str(data["fingerprint"]))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document (0 where no query term matches)"""
+        out = np.zeros(self.n_docs, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len / max(self.avg_len, 1e-9))
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            lo, hi = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[lo:hi]
+            tf = self.tfs[lo:hi].astype(np.float32)
+            # Each doc appears once per posting list, so plain fancy-index add is safe
+            out[docs] += self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + norm[docs])
+        return out
+
+    def scores_rows(self, query: str, rows) -> np.ndarray:
+        """BM25 score of the given sorted rows only (0 where no query term matches)
+
+        Each posting list is intersected with the rows by binary search from
+        the shorter side, so the cost follows the partition size and the
+        posting lengths, never the corpus size.
+        """
+        rows = np.asarray(rows)
+        out = np.zeros(len(rows), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None or not len(rows):
+                continue
+            lo, hi = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[lo:hi]
+            if len(docs) <= len(rows):
+                pos = np.minimum(np.searchsorted(rows, docs), len(rows) - 1)
+                hit = rows[pos] == docs
+                targets, posting = pos[hit], np.flatnonzero(hit)
+            else:
+                pos = np.minimum(np.searchsorted(docs, rows), len(docs) - 1)
+                hit = docs[pos] == rows
+                targets, posting = np.flatnonzero(hit), pos[hit]
+            matched = docs[posting]
+            tf = self.tfs[lo:hi][posting].astype(np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[matched] / max(self.avg_len, 1e-9))
+            out[targets] += self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + norm)
+        return out
+
+    def search(self, query: str, k: int = 10):
+        """(row indices, BM25 scores) of the best k matching documents"""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores)
+        best = matched[top_k(scores[matched], k)]
+        return best, scores[best]
+
+    def candidates(self, query: str, limit: int = PREFILTER_CANDIDATES) -> np.ndarray:
+        """Rows matching at least one query term, best BM25 first, capped at limit"""
+        return self.search(query, limit)[0]
+
+
+def reciprocal_rank_fusion(rankings, k: int = 10, rrf_k: int = RRF_K):
+    """Fuse several ranked row lists; returns (rows, fused scores) best first"""
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (rrf_k + rank)
+    if not fused:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    rows = np.fromiter(fused.keys(), dtype=np.int64, count=len(fused))
+    scores = np.fromiter(fused.values(), dtype=np.float32, count=len(fused))
+    best = top_k(scores, k)
+    return rows[best], scores[best]
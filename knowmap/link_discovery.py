@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from knowmap.vector_ops import inverse_norms, merge_top_k, sort_top_k
+
+# ----------------------------------------
+# 🔗 CROSS-DOMAIN LINK DISCOVERY
+# ----------------------------------------
+# Blocked similarity join: every sentence is compared with every sentence of
+# another domain, one (block x block) tile at a time, keeping only a running
+# top-k per sentence. Peak memory is O(block^2 + N*k), never N x N.
+LINK_BLOCK = 2048
+DEFAULT_LINKS_PER_SENTENCE = 5
+DEFAULT_MIN_SCORE = 0.5
+LINK_COLUMNS = [
+    "source_id", "source_sentence", "source_domain",
+    "target_id", "target_sentence", "target_domain", "score", "rank",
+]
+
+
+def discover_links(meta: pd.DataFrame, matrix, k: int = DEFAULT_LINKS_PER_SENTENCE,
+                   min_score: float = DEFAULT_MIN_SCORE, block: int = LINK_BLOCK,
+                   progress=None) -> pd.DataFrame:
+    """Top-k most similar sentences from other domains for every sentence"""
+    n_rows = len(matrix)
+    domain_codes, _ = pd.factorize(meta["domain"].astype(str))
+    inv = inverse_norms(matrix, block)
+
+    sources, targets, scores, ranks = [], [], [], []
+    for q_start in range(0, n_rows, block):
+        q_rows = np.asarray(matrix[q_start:q_start + block], dtype=np.float32)
+        q_rows = q_rows * inv[q_start:q_start + len(q_rows), None]
+        q_domains = domain_codes[q_start:q_start + len(q_rows)]
+
+        best_idx = np.empty((len(q_rows), 0), dtype=np.int64)
+        best_scores = np.empty((len(q_rows), 0), dtype=np.float32)
+        for c_start in range(0, n_rows, block):
+            c_rows = np.asarray(matrix[c_start:c_start + block], dtype=np.float32)
+            tile = (q_rows @ c_rows.T) * inv[c_start:c_start + len(c_rows)]
+            # Same-domain pairs (including self-pairs) are never links
+            tile[q_domains[:, None] == domain_codes[None, c_start:c_start + len(c_rows)]] = -np.inf
+            best_idx, best_scores = merge_top_k(best_idx, best_scores, tile, c_start, k)
+
+        best_idx, best_scores = sort_top_k(best_idx, best_scores)
+        keep = best_scores >= min_score
+        src = np.broadcast_to(np.arange(q_start, q_start + len(q_rows))[:, None], keep.shape)
+        rank = np.broadcast_to(np.arange(1, best_idx.shape[1] + 1)[None, :], keep.shape)
+        sources.append(src[keep])
+        targets.append(best_idx[keep])
+        scores.append(best_scores[keep])
+        ranks.append(rank[keep])
+
+        if progress is not None:
+            progress(min(1.0, (q_start + len(q_rows)) / n_rows))
+
+    return _links_frame(
+        meta,
+        np.concatenate(sources) if sources else np.empty(0, dtype=np.int64),
+        np.concatenate(targets) if targets else np.empty(0, dtype=np.int64),
+        np.concatenate(scores) if scores else np.empty(0, dtype=np.float32),
+        np.concatenate(ranks) if ranks else np.empty(0, dtype=np.int64),
+    )
+
+
+def _links_frame(meta, sources, targets, scores, ranks) -> pd.DataFrame:
+    src = meta.iloc[sources].reset_index(drop=True)
+    dst = meta.iloc[targets].reset_index(drop=True)
+    links = pd.DataFrame({
+        "source_id": src["id"].values,
+        "source_sentence": src["sentence"].values,
+        "source_domain": src["domain"].values,
+        "target_id": dst["id"].values,
+        "target_sentence": dst["sentence"].values,
+        "target_domain": dst["domain"].values,
+        "score": scores,
+        "rank": ranks,
+    })
+    return links.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def unique_pairs(links: pd.DataFrame) -> pd.DataFrame:
+    """Collapse A->B / B->A duplicates into one undirected link (highest score kept)"""
+    a = links[["source_id", "target_id"]].astype(str)
+    key = np.where(a["source_id"] <= a["target_id"],
+                   a["source_id"] + "\x1f" + a["target_id"],
+                   a["target_id"] + "\x1f" + a["source_id"])
+    return links.loc[~pd.Series(key, index=links.index).duplicated()].reset_index(drop=True)
+
+
+def save_links(links: pd.DataFrame, path: str):
+    tmp_path = path + ".tmp"
+    links.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def load_links(path: str) -> pd.DataFrame:
+    if os.path.exists(path):
+        return pd.read_csv(path)
+    return pd.DataFrame(columns=LINK_COLUMNS)
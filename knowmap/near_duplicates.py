@@ -0,0 +1,292 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from knowmap.clustering import assign_clusters, default_n_clusters, minibatch_kmeans
+from knowmap.partitions import PartitionIndex
+from knowmap.vector_ops import merge_top_k, normalize_rows
+
+# ----------------------------------------
+# 🧬 NEAR-DUPLICATE DETECTION (MinHash-LSH + embedding neighbours)
+# ----------------------------------------
+# Sentences are reduced to MinHash signatures over character shingles and
+# bucketed band by band (LSH), so only sentences sharing a bucket are ever
+# compared. Optionally, embedding neighbours found inside k-means clusters
+# add paraphrases that share few characters. Accepted pairs are joined into
+# clusters, each with a canonical sentence the admin can merge into.
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+LSH_BANDS = 16
+MAX_BUCKET_PAIRS = 32
+HASH_CHUNK = 50_000
+DEFAULT_JACCARD = 0.7
+DEFAULT_COSINE = 0.95
+EMBEDDING_NEIGHBOURS = 5
+EMBEDDING_BLOCK = 2048
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_BAND_MIX = np.uint64(0xC2B2AE3D27D4EB4F)
+
+
+def normalize_sentence(text) -> str:
+    """Dedup key: trimmed, whitespace-collapsed, lower-cased"""
+    return " ".join(str(text).split()).lower()
+
+
+def shingle_hashes(texts, k: int = SHINGLE_SIZE):
+    """64-bit hashes of every character k-shingle, concatenated over texts
+
+    Returns (hashes, offsets): the shingles of text i are
+    hashes[offsets[i]:offsets[i + 1]]. Texts shorter than k are padded, so
+    every text has at least one shingle.
+    """
+    encoded = [t.encode("utf-8").ljust(k, b"\0") for t in texts]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    counts = lengths - k + 1
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    buf = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    positions = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, counts)
+    powers = np.array([pow(257, k - 1 - t, 2 ** 64) for t in range(k)], dtype=np.uint64)
+    hashes = sliding_window_view(buf, k)[positions].astype(np.uint64) @ powers
+
+    hashes *= _MIX
+    hashes ^= hashes >> np.uint64(29)
+    return hashes, offsets
+
+
+def minhash_signatures(texts, num_perm: int = NUM_PERM, k: int = SHINGLE_SIZE,
+                       chunk: int = HASH_CHUNK, seed: int = 0, progress=None) -> np.ndarray:
+    """(n_texts, num_perm) uint32 MinHash signatures (multiply-shift hashing)"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    shift = np.uint64(32)
+
+    out = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), chunk):
+        hashes, offsets = shingle_hashes(texts[start:start + chunk], k)
+        for p in range(num_perm):
+            out[start:start + len(offsets) - 1, p] = np.minimum.reduceat(
+                (hashes * a[p] + b[p]) >> shift, offsets[:-1]
+            )
+        if progress is not None:
+            progress(min(1.0, (start + chunk) / len(texts)))
+    return out
+
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int = LSH_BANDS,
+                        max_pairs: int = MAX_BUCKET_PAIRS):
+    """Unique (i, j), i < j, pairs that share at least one LSH band bucket
+
+    Inside a bucket each member is paired with at most `max_pairs` following
+    members, so a huge bucket costs O(size * max_pairs), not O(size^2);
+    clustering still links the whole bucket through the chain.
+    """
+    n_rows, num_perm = signatures.shape
+    rows_per_band = num_perm // bands
+    mult = np.array([pow(0x100000001B3, t + 1, 2 ** 64) for t in range(rows_per_band)], dtype=np.uint64)
+
+    pair_keys = []
+    for band in range(bands):
+        cols = signatures[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        keys = (cols * mult).sum(axis=1) * _BAND_MIX
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # Drop singleton buckets before pairing
+        equal = sorted_keys[1:] == sorted_keys[:-1]
+        shared = np.zeros(n_rows, dtype=bool)
+        shared[1:] |= equal
+        shared[:-1] |= equal
+        order, sorted_keys = order[shared], sorted_keys[shared]
+        for d in range(1, max_pairs + 1):
+            same = sorted_keys[d:] == sorted_keys[:-d]
+            if not same.any():
+                break
+            i, j = order[:-d][same], order[d:][same]
+            pair_keys.append(np.minimum(i, j) * n_rows + np.maximum(i, j))
+
+    if not pair_keys:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pair_keys = np.unique(np.concatenate(pair_keys))
+    return pair_keys // n_rows, pair_keys % n_rows
+
+
+def signature_similarity(signatures: np.ndarray, i, j, chunk: int = 1_000_000) -> np.ndarray:
+    """Estimated Jaccard similarity of row pairs (fraction of equal MinHashes)"""
+    out = np.empty(len(i), dtype=np.float32)
+    for start in range(0, len(i), chunk):
+        a = signatures[i[start:start + chunk]]
+        b = signatures[j[start:start + chunk]]
+        out[start:start + len(a)] = (a == b).mean(axis=1)
+    return out
+
+
+def embedding_pairs(matrix, min_score: float = DEFAULT_COSINE, k: int = EMBEDDING_NEIGHBOURS,
+                    n_clusters=None, block: int = EMBEDDING_BLOCK, progress=None):
+    """(i, j, cosine) pairs among each row's top-k neighbours within its k-means cluster
+
+    Neighbours are only searched inside a row's own cluster (about sqrt(N)
+    rows), so cost is O(N * sqrt(N)) instead of all pairs; pairs split across
+    a cluster boundary are missed.
+    """
+    n_rows = len(matrix)
+    n_clusters = n_clusters or default_n_clusters(n_rows)
+    centroids = minibatch_kmeans(matrix, n_clusters)
+    partition = PartitionIndex.from_codes(
+        assign_clusters(matrix, centroids), [str(c) for c in range(len(centroids))]
+    )
+
+    sources, targets, scores = [], [], []
+    for c in range(len(partition.keys)):
+        rows = partition.rows[partition.offsets[c]:partition.offsets[c + 1]]
+        if len(rows) < 2:
+            continue
+        members = normalize_rows(matrix[rows])
+        for start in range(0, len(rows), block):
+            tile = members[start:start + block] @ members.T
+            tile[np.arange(len(tile)), np.arange(start, start + len(tile))] = -np.inf
+            best_idx, best_scores = merge_top_k(
+                np.empty((len(tile), 0), dtype=np.int64),
+                np.empty((len(tile), 0), dtype=np.float32), tile, 0, k
+            )
+            keep = best_scores >= min_score
+            src = np.broadcast_to(np.arange(start, start + len(tile))[:, None], keep.shape)
+            sources.append(rows[src[keep]])
+            targets.append(rows[best_idx[keep]])
+            scores.append(best_scores[keep])
+        if progress is not None:
+            progress(min(1.0, partition.offsets[c + 1] / n_rows))
+
+    if not sources:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(scores)
+
+
+def connected_components(n_nodes: int, i, j) -> np.ndarray:
+    """Component label (smallest member id) for every node, by min-label propagation"""
+    labels = np.arange(n_nodes)
+    while True:
+        edge_min = np.minimum(labels[i], labels[j])
+        updated = labels.copy()
+        np.minimum.at(updated, i, edge_min)
+        np.minimum.at(updated, j, edge_min)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def find_near_duplicates(sentences: pd.Series, threshold: float = DEFAULT_JACCARD,
+                         num_perm: int = NUM_PERM, bands: int = LSH_BANDS,
+                         matrix=None, matrix_sentences=None, min_cosine: float = DEFAULT_COSINE,
+                         progress=None) -> pd.DataFrame:
+    """Clusters of near-duplicate sentences, one row per distinct sentence
+
+    Sentences that normalise to the same text always share a cluster. Pass
+    an embedding matrix (with the sentence of each row) to also join
+    sentences whose embeddings have cosine similarity of at least `min_cosine`.
+
+    Columns: cluster, sentence, canonical (most frequent member), occurrences,
+    jaccard (estimated, to the canonical sentence).
+    """
+    counts = sentences.astype(str).value_counts(sort=False)
+    distinct = counts.index.to_series(index=np.arange(len(counts)))
+    key_codes, keys = pd.factorize(distinct.map(normalize_sentence))
+    n_keys = len(keys)
+
+    signatures = minhash_signatures(
+        list(keys), num_perm=num_perm,
+        progress=None if progress is None else (lambda f: progress(0.5 * f))
+    )
+    i, j = lsh_candidate_pairs(signatures, bands=bands)
+    keep = signature_similarity(signatures, i, j) >= threshold
+    i, j = i[keep], j[keep]
+
+    key_vectors = None
+    if matrix is not None and matrix_sentences is not None:
+        src, dst, _ = embedding_pairs(
+            matrix, min_score=min_cosine,
+            progress=None if progress is None else (lambda f: progress(0.5 + 0.5 * f))
+        )
+        row_keys = pd.Index(keys).get_indexer(pd.Series(matrix_sentences).astype(str).map(normalize_sentence))
+        src, dst = row_keys[src], row_keys[dst]
+        valid = (src >= 0) & (dst >= 0) & (src != dst)
+        i, j = np.concatenate([i, src[valid]]), np.concatenate([j, dst[valid]])
+
+        # One embedding per key (its first row), for the member-to-canonical check
+        key_rows = np.full(n_keys, -1, dtype=np.int64)
+        first = pd.Series(np.arange(len(row_keys)))[row_keys >= 0].groupby(row_keys[row_keys >= 0]).first()
+        key_rows[first.index.values] = first.values
+        key_vectors = (key_rows, matrix)
+
+    frame = pd.DataFrame({
+        "label": connected_components(n_keys, i, j)[key_codes],
+        "sentence": distinct.values,
+        "occurrences": counts.values,
+        "key": key_codes,
+    })
+    frame = _clustered(frame)
+
+    # Canonical = most frequent member (ties: shortest, then alphabetical)
+    frame = frame.assign(length=frame["sentence"].str.len()).sort_values(
+        ["label", "occurrences", "length", "sentence"], ascending=[True, False, True, True]
+    )
+    canonical = frame.groupby("label").head(1).set_index("label")
+    frame["canonical"] = frame["label"].map(canonical["sentence"])
+    canonical_keys = frame["label"].map(canonical["key"]).values
+    frame["jaccard"] = signature_similarity(signatures, frame["key"].values, canonical_keys).round(3)
+
+    # Components can chain A~B~C with A and C far apart: keep only members
+    # that are themselves close to the canonical sentence.
+    close = frame["jaccard"].values >= threshold
+    if key_vectors is not None:
+        close |= _key_cosine(key_vectors, frame["key"].values, canonical_keys) >= min_cosine
+    frame = _clustered(frame[close])
+
+    # Largest clusters (by affected rows) first
+    size = frame.groupby("label")["occurrences"].transform("sum")
+    frame = frame.assign(size=size).sort_values(
+        ["size", "label", "occurrences"], ascending=[False, True, False], kind="stable"
+    )
+    frame["cluster"] = pd.factorize(frame["label"])[0] + 1
+
+    if progress is not None:
+        progress(1.0)
+    return frame[["cluster", "sentence", "canonical", "occurrences", "jaccard"]].reset_index(drop=True)
+
+
+def _clustered(frame: pd.DataFrame) -> pd.DataFrame:
+    """Rows whose label is shared by at least two distinct sentences"""
+    return frame[frame.groupby("label")["sentence"].transform("size") > 1]
+
+
+def _key_cosine(key_vectors, a, b) -> np.ndarray:
+    key_rows, matrix = key_vectors
+    rows_a, rows_b = key_rows[a], key_rows[b]
+    out = np.full(len(a), -1.0, dtype=np.float32)
+    known = (rows_a >= 0) & (rows_b >= 0)
+    if known.any():
+        va = normalize_rows(matrix[rows_a[known]])
+        vb = normalize_rows(matrix[rows_b[known]])
+        out[known] = (va * vb).sum(axis=1)
+    return out
+
+
+def cluster_summary(duplicates: pd.DataFrame) -> pd.DataFrame:
+    """One row per cluster: canonical sentence, member count, affected rows, min similarity"""
+    return duplicates.groupby("cluster", sort=True).agg(
+        canonical=("canonical", "first"),
+        members=("sentence", "size"),
+        rows=("occurrences", "sum"),
+        min_jaccard=("jaccard", "min"),
+    ).reset_index()
+
+
+def merge_mapping(duplicates: pd.DataFrame, canonicals: dict) -> dict:
+    """{sentence: canonical} for the approved clusters ({cluster: canonical sentence})"""
+    approved = duplicates[duplicates["cluster"].isin(list(canonicals))]
+    targets = approved["cluster"].map(canonicals)
+    changed = approved["sentence"] != targets
+    return dict(zip(approved["sentence"][changed], targets[changed]))
@@ -0,0 +1,158 @@
+import json
+import os
+
+import numpy as np
+
+from knowmap.startup import import_timer
+
+# ----------------------------------------
+# 🚀 ONNX RUNTIME ENCODER BACKEND
+# ----------------------------------------
+# The MiniLM transformer is exported once (this step needs torch) and then
+# served through ONNX Runtime on CPU. Mean pooling and L2 normalisation are
+# done in numpy so that the runtime path never imports torch.
+ONNX_MODEL_DIR = "onnx_minilm"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+META_FILE = "encoder_meta.json"
+
+
+def export_onnx(model_name: str, out_dir: str = ONNX_MODEL_DIR, quantize: bool = True) -> str:
+    """Export a SentenceTransformer to ONNX (plus optional int8 dynamic quantization)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer.save_pretrained(out_dir)
+
+    dummy = tokenizer(["export the encoder"], return_tensors="pt")
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(out_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[k] for k in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state", "pooler_output"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(out_dir, INT8_FILE), weight_type=QuantType.QInt8)
+
+    meta = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "normalize": any(type(m).__name__ == "Normalize" for m in st_model),
+    }
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=4)
+    return out_dir
+
+
+def is_exported(out_dir: str = ONNX_MODEL_DIR, quantized: bool = False) -> bool:
+    """Check whether an exported model is available on disk"""
+    onnx_file = INT8_FILE if quantized else FP32_FILE
+    return all(
+        os.path.exists(os.path.join(out_dir, f)) for f in (onnx_file, META_FILE)
+    )
+
+
+class OnnxSentenceEncoder:
+    """SentenceTransformer-compatible encoder running on ONNX Runtime (CPU)"""
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = False, num_threads=None):
+        with import_timer("transformers"):
+            from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, META_FILE)) as f:
+            meta = json.load(f)
+
+        self.model_dir = model_dir
+        self.model_path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        self.quantized = quantized
+        self.max_seq_length = meta["max_seq_length"]
+        self.normalize = meta["normalize"]
+        self._dimension = meta["dimension"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.set_num_threads(num_threads)
+
+    def set_num_threads(self, num_threads=None):
+        """(Re)create the inference session with the given intra-op thread count"""
+        with import_timer("onnxruntime"):
+            import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.num_threads = num_threads
+        self.session = ort.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def _encode_batch(self, batch) -> np.ndarray:
+        encoded = self.tokenizer(
+            batch, padding=True, truncation=True,
+            max_length=self.max_seq_length, return_tensors="np"
+        )
+        feed = {k: v.astype(np.int64) for k, v in encoded.items() if k in self._input_names}
+        hidden = self.session.run(["last_hidden_state"], feed)[0]
+
+        # Mean pooling over real tokens
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Encode a sentence or a list of sentences into float32 vectors"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Sort by length so each batch pads as little as possible
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        out = np.empty((len(sentences), self._dimension), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([sentences[i] for i in idx])
+
+        if normalize_embeddings and not self.normalize:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def check_parity(reference, candidate, sentences, min_cosine: float = 0.99) -> dict:
+    """Compare two encoders on the same sentences"""
+    ref = np.asarray(reference.encode(list(sentences), convert_to_numpy=True), dtype=np.float32)
+    cand = np.asarray(candidate.encode(list(sentences), convert_to_numpy=True), dtype=np.float32)
+
+    ref_n = ref / np.clip(np.linalg.norm(ref, axis=1, keepdims=True), 1e-12, None)
+    cand_n = cand / np.clip(np.linalg.norm(cand, axis=1, keepdims=True), 1e-12, None)
+    cosines = (ref_n * cand_n).sum(axis=1)
+
+    return {
+        "sentences": len(ref),
+        "max_abs_diff": float(np.abs(ref - cand).max()) if len(ref) else 0.0,
+        "min_cosine": float(cosines.min()) if len(ref) else 1.0,
+        "mean_cosine": float(cosines.mean()) if len(ref) else 1.0,
+        "passed": bool(len(ref) == 0 or cosines.min() >= min_cosine),
+    }
@@ -0,0 +1,61 @@
+import re
+from collections import Counter
+
+import pandas as pd
+
+from knowmap.artifact_cache import artifact_key
+
+# ----------------------------------------
+# 📊 OVERVIEW STATISTICS
+# ----------------------------------------
+# Computed once per dataset version (fingerprint) with vectorized string ops
+# and kept in the artifact cache (memory + disk tiers), so revisiting the
+# Overview page (or restarting the server) does not recompute anything.
+NON_ALPHA = re.compile(r"[^a-zA-Z ]")
+WORD_CHUNK = 100_000
+TOP_WORDS = 50
+OVERVIEW_VERSION = "1"          # bump when compute_overview's output changes
+
+
+def word_counts(sentences: pd.Series, chunk: int = WORD_CHUNK) -> Counter:
+    """Lower-cased alphabetic word counts (non-letters are dropped, as before)
+
+    Each chunk is joined into one string, so the regex and split run once per
+    chunk instead of once per sentence.
+    """
+    counts = Counter()
+    values = sentences.astype(str)
+    for start in range(0, len(values), chunk):
+        text = " ".join(values.iloc[start:start + chunk].tolist())
+        counts.update(NON_ALPHA.sub("", text).lower().split())
+    return counts
+
+
+def compute_overview(df: pd.DataFrame, top_words: int = TOP_WORDS) -> dict:
+    """All Overview page statistics as a JSON-serialisable dict"""
+    lengths = df["sentence"].astype(str).str.len()
+    domain_counts = df["domain"].value_counts()
+    label_counts = df["label"].value_counts()
+    return {
+        "records": int(len(df)),
+        "unique_domains": int(df["domain"].nunique()),
+        "unique_labels": int(df["label"].nunique()),
+        "avg_length": float(lengths.mean()) if len(df) else 0.0,
+        "max_length": int(lengths.max()) if len(df) else 0,
+        "domain_counts": [[str(k), int(v)] for k, v in domain_counts.items()],
+        "label_counts": [[str(k), int(v)] for k, v in label_counts.items()],
+        "top_words": [[w, int(c)] for w, c in word_counts(df["sentence"]).most_common(top_words)],
+        "columns": [str(c) for c in df.columns],
+        "missing": {str(k): int(v) for k, v in df.isna().sum().items()},
+    }
+
+
+def load_overview(df: pd.DataFrame, fingerprint: str, cache) -> dict:
+    """Overview statistics for a dataset version, served from the artifact cache when possible"""
+    key = artifact_key(fingerprint, "overview", {"top_words": TOP_WORDS}, OVERVIEW_VERSION)
+    return cache.get_or_compute("overview", key, lambda: compute_overview(df))
+
+
+def counts_series(pairs) -> pd.Series:
+    """[[key, count], ...] back to a Series (for charts)"""
+    return pd.Series({k: v for k, v in pairs}, dtype="int64")
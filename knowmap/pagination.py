@@ -0,0 +1,60 @@
+import numpy as np
+
+# ----------------------------------------
+# 📄 PAGINATED RESULT CURSOR
+# ----------------------------------------
+# A cursor encodes its query once and keeps a bounded top-k buffer. Paging
+# inside the buffer never rescans the corpus; paging past it doubles the
+# buffer with one rescan, so browsing P pages costs O(log P) scans.
+PREFETCH_PAGES = 3
+MAX_BUFFERED_RESULTS = 1000
+
+
+class ResultCursor:
+    """Page through the ranked results of one query session"""
+
+    def __init__(self, engine, query: str, page_size: int = 10,
+                 prefetch_pages: int = PREFETCH_PAGES,
+                 max_results: int = MAX_BUFFERED_RESULTS, **search_kwargs):
+        self.engine = engine
+        self.query = query
+        self.page_size = max(1, int(page_size))
+        self.max_results = max_results
+        self.search_kwargs = search_kwargs
+        self.query_vector = engine.encode_queries([query])[0]
+
+        self.rows = np.empty(0, dtype=np.int64)
+        self.scores = np.empty(0, dtype=np.float32)
+        self.exhausted = False
+        self.scans = 0
+        self._extend(self.page_size * prefetch_pages)
+
+    def _extend(self, depth: int):
+        depth = min(depth, self.max_results)
+        self.rows, self.scores = self.engine.rank(
+            self.query, self.query_vector, depth, **self.search_kwargs
+        )
+        self.exhausted = len(self.rows) < depth or depth >= self.max_results
+        self.scans += 1
+
+    def _ensure(self, n_results: int):
+        while len(self.rows) < n_results and not self.exhausted:
+            self._extend(max(n_results, 2 * len(self.rows)))
+
+    @property
+    def buffered(self) -> int:
+        return len(self.rows)
+
+    def has_page(self, page: int) -> bool:
+        """True if the page may hold results (without extending the buffer)"""
+        return page >= 0 and (len(self.rows) > page * self.page_size or not self.exhausted)
+
+    def page(self, page: int):
+        """Results of a 0-based page as a DataFrame (empty past the end)"""
+        start = page * self.page_size
+        self._ensure(start + self.page_size)
+        rows = self.rows[start:start + self.page_size]
+        scores = self.scores[start:start + self.page_size]
+        return self.engine.results_frame(
+            [self.query], rows[None, :], scores[None, :], rank_offset=start
+        )
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# 🗂 PARTITIONS (row-id lists per domain / label / cluster)
+# ----------------------------------------
+PARTITION_COLUMNS = ["domain", "label"]
+
+
+class PartitionIndex:
+    """Row ids grouped by key
+
+    Rows of key i are rows[offsets[i]:offsets[i + 1]], sorted ascending, so a
+    filtered search only touches the rows of the selected partitions.
+    """
+
+    def __init__(self, keys, offsets, rows):
+        self.keys = [str(k) for k in keys]
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.offsets = offsets
+        self.rows = rows
+
+    @classmethod
+    def from_codes(cls, codes, keys):
+        """Build from one integer code per row (code i -> keys[i]; negative = no key)"""
+        codes = np.asarray(codes)
+        counts = np.bincount(codes[codes >= 0], minlength=len(keys))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        order = np.argsort(codes, kind="stable")
+        return cls(keys, offsets, order[codes[order] >= 0].astype(np.int64))
+
+    @classmethod
+    def from_values(cls, values: pd.Series):
+        """Build from the values of one categorical column"""
+        codes, uniques = pd.factorize(values.astype(str), sort=True)
+        return cls.from_codes(codes, list(uniques))
+
+    def rows_for(self, keys) -> np.ndarray:
+        """Sorted row ids belonging to any of the given keys"""
+        parts = [
+            self.rows[self.offsets[self.positions[k]]:self.offsets[self.positions[k] + 1]]
+            for k in keys if k in self.positions
+        ]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def sizes(self) -> dict:
+        return dict(zip(self.keys, np.diff(self.offsets).tolist()))
@@ -0,0 +1,196 @@
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# ----------------------------------------
+# ⚙️ BACKGROUND PRECOMPUTE PIPELINE
+# ----------------------------------------
+# A small dependency-ordered stage runner. Each stage is a plain function
+# (no Streamlit calls: it runs outside the script thread) that receives its
+# Stage; a stage starts as soon as all of its dependencies are done,
+# independent stages run side by side, and a failed stage skips everything
+# downstream of it. Pipelines are kept per workspace at module level, so
+# every rerun / session of that workspace sees the same status.
+# A pipeline that is cancelled or replaced (a new upload) must not touch the
+# workspace any more: stages write to run-private temp names and move them
+# into place through Stage.commit, which refuses once the run is stale, and
+# Stage.report raises Cancelled so long loops stop early.
+PENDING, RUNNING, DONE, FAILED, SKIPPED, CANCELLED = (
+    "pending", "running", "done", "failed", "skipped", "cancelled"
+)
+FINISHED = {DONE, FAILED, SKIPPED, CANCELLED}
+MAX_WORKERS = 2
+
+logger = logging.getLogger("knowmap.pipeline")
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+_run_ids = itertools.count(1)
+
+
+class Cancelled(Exception):
+    """Raised inside a stage whose pipeline was cancelled or replaced"""
+
+
+class Stage:
+    """One unit of background work: run(stage) after every stage in `depends` is done"""
+
+    def __init__(self, name: str, run, depends=()):
+        self.name = name
+        self.run = run
+        self.depends = tuple(depends)
+        self.status = PENDING
+        self.progress = 0.0
+        self.error = ""
+        self.started = None
+        self.finished = None
+        self.pipeline = None
+
+    @property
+    def run_id(self) -> str:
+        """Unique id of the pipeline run, for run-private temp file names"""
+        return self.pipeline.run_id if self.pipeline is not None else "0"
+
+    def current(self) -> bool:
+        return self.pipeline is None or self.pipeline.current()
+
+    def report(self, fraction, text=None):
+        """Progress callback; raises Cancelled once the run is stale"""
+        if not self.current():
+            raise Cancelled(self.name)
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+
+    def commit(self, publish):
+        """Run publish() (moving results into place) only while this run is current
+
+        Holds the registry lock, so a newer pipeline cannot be started for
+        the same key half-way through. Raises Cancelled for a stale run.
+        """
+        with _pipelines_lock:
+            if not self.current():
+                raise Cancelled(self.name)
+            publish()
+
+    def seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class Pipeline:
+    """Stages for one dataset version, executed on a background thread"""
+
+    def __init__(self, fingerprint: str, stages, max_workers: int = MAX_WORKERS, key: str = None):
+        self.fingerprint = fingerprint
+        self.key = key
+        self.run_id = f"run{next(_run_ids)}"
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            stage.pipeline = self
+        unknown = {d for s in stages for d in s.depends} - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stage dependencies: {sorted(unknown)}")
+        self.max_workers = max_workers
+        self.cancelled = False
+        self._thread = threading.Thread(target=self._run, name=f"precompute-{fingerprint[:8]}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Stop scheduling new stages; running ones stop at their next report or commit"""
+        self.cancelled = True
+
+    def current(self) -> bool:
+        """Not cancelled and (when registered under a key) still that key's pipeline"""
+        return not self.cancelled and (self.key is None or _pipelines.get(self.key) is self)
+
+    def _ready(self, stage: Stage) -> bool:
+        return stage.status == PENDING and all(self.stages[d].status == DONE for d in stage.depends)
+
+    def _skip_blocked(self):
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.status == PENDING and any(
+                    self.stages[d].status in (FAILED, SKIPPED, CANCELLED) for d in stage.depends
+                ):
+                    stage.status = SKIPPED
+                    changed = True
+
+    def _execute(self, stage: Stage):
+        stage.status, stage.started = RUNNING, time.time()
+        try:
+            stage.run(stage)
+        except Cancelled:
+            stage.status = CANCELLED
+        except Exception as e:
+            stage.status, stage.error = FAILED, str(e)
+            logger.exception("precompute stage %s failed", stage.name)
+        else:
+            stage.status, stage.progress = DONE, 1.0
+        stage.finished = time.time()
+
+    def _run(self):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while True:
+                if self.cancelled:
+                    for stage in self.stages.values():
+                        if stage.status == PENDING:
+                            stage.status = CANCELLED
+                else:
+                    for stage in self.stages.values():
+                        if self._ready(stage) and stage.name not in running:
+                            stage.status = RUNNING
+                            running[stage.name] = pool.submit(self._execute, stage)
+                if not running:
+                    break
+                done, _ = wait(list(running.values()), return_when=FIRST_COMPLETED)
+                running = {name: f for name, f in running.items() if f not in done}
+                self._skip_blocked()
+
+    def status(self, name: str) -> str:
+        stage = self.stages.get(name)
+        return stage.status if stage else ""
+
+    def finished(self) -> bool:
+        return all(stage.status in FINISHED for stage in self.stages.values())
+
+    def summary(self) -> list:
+        return [
+            {"stage": s.name, "status": s.status, "progress": s.progress,
+             "seconds": round(s.seconds(), 1), "error": s.error}
+            for s in self.stages.values()
+        ]
+
+
+def start_pipeline(key: str, fingerprint: str, stages, restart: bool = False) -> Pipeline:
+    """Start the stages for `key` (e.g. a workspace) unless that dataset version is already scheduled
+
+    A pipeline for an older dataset version under the same key is cancelled.
+    """
+    with _pipelines_lock:
+        current = _pipelines.get(key)
+        if current is not None and current.fingerprint == fingerprint and not restart:
+            return current
+        if current is not None:
+            current.cancel()
+        pipeline = _pipelines[key] = Pipeline(fingerprint, stages, key=key)
+    return pipeline.start()
+
+
+def get_pipeline(key: str):
+    return _pipelines.get(key)
+
+
+def stop_pipeline(key: str):
+    """Cancel and forget the pipeline for `key` (its status is no longer shown)"""
+    with _pipelines_lock:
+        pipeline = _pipelines.pop(key, None)
+    if pipeline is not None:
+        pipeline.cancel()
@@ -0,0 +1,274 @@
+import os
+
+import numpy as np
+
+from knowmap.vector_ops import SCORE_BLOCK, cosine_scores, normalize_rows, top_k
+
+# ----------------------------------------
+# 🗜 COMPRESSED EMBEDDING STORAGE
+# ----------------------------------------
+# First-pass search runs on compact codes held in RAM; only a shortlist is
+# re-ranked against the full-precision matrix, which stays memory-mapped on disk.
+STORAGE_MODES = ["float32", "float16", "int8", "pq"]
+RERANK_FACTOR = 10
+PQ_DEFAULT_SUBSPACES = 48
+PQ_CENTROIDS = 256
+KMEANS_SAMPLE = 20000
+
+
+def compressed_path(path: str, mode: str) -> str:
+    """Path of the compressed codes that belong to an embedding store"""
+    return f"{os.path.splitext(path)[0]}.{mode}.npz"
+
+
+def stored_mode(path: str) -> str:
+    """Storage mode an embedding store was built with: the mode of its codes file, else float32
+
+    Building codes removes those of every other mode, so at most one exists.
+    """
+    for mode in STORAGE_MODES[1:]:
+        if os.path.exists(compressed_path(path, mode)):
+            return mode
+    return "float32"
+
+
+# ----------------------------------------
+# 📐 K-MEANS (used to train PQ codebooks)
+# ----------------------------------------
+def assign_nearest(x, centroids, block: int = SCORE_BLOCK) -> np.ndarray:
+    """Index of the nearest centroid (squared L2) for every row"""
+    c_sq = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), block):
+        xb = np.asarray(x[start:start + block], dtype=np.float32)
+        out[start:start + len(xb)] = (c_sq[None, :] - 2 * xb @ centroids.T).argmin(axis=1)
+    return out
+
+
+def kmeans(x, k: int, iters: int = 20, seed: int = 0) -> np.ndarray:
+    """Plain Lloyd's k-means; returns the centroids"""
+    x = np.asarray(x, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+
+    for _ in range(iters):
+        assign = assign_nearest(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        nonempty = np.flatnonzero(counts)
+
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+
+        # Re-seed empty clusters with random points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+    return centroids
+
+
+# ----------------------------------------
+# 🔢 CODECS
+# ----------------------------------------
+class Float16Codec:
+    """Half-precision copy of the vectors (2x smaller)"""
+    mode = "float16"
+
+    def fit(self, x):
+        return self
+
+    def encode(self, x) -> np.ndarray:
+        return np.asarray(x, dtype=np.float16)
+
+    def scores(self, query, codes) -> np.ndarray:
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK):
+            block = codes[start:start + SCORE_BLOCK].astype(np.float32)
+            out[start:start + len(block)] = block @ query
+        return out
+
+    def state(self) -> dict:
+        return {}
+
+    def load_state(self, state):
+        return self
+
+
+class Int8Codec:
+    """Per-dimension min/max scalar quantization to uint8 (4x smaller)"""
+    mode = "int8"
+
+    def fit(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        self.low = x.min(axis=0)
+        self.scale = np.clip((x.max(axis=0) - self.low) / 255.0, 1e-12, None)
+        return self
+
+    def encode(self, x) -> np.ndarray:
+        codes = np.rint((np.asarray(x, dtype=np.float32) - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def scores(self, query, codes) -> np.ndarray:
+        # q . x ~= q . low + (q * scale) . code
+        weights = (query * self.scale).astype(np.float32)
+        offset = float(query @ self.low)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK):
+            block = codes[start:start + SCORE_BLOCK].astype(np.float32)
+            out[start:start + len(block)] = block @ weights + offset
+        return out
+
+    def state(self) -> dict:
+        return {"low": self.low, "scale": self.scale}
+
+    def load_state(self, state):
+        self.low, self.scale = state["low"], state["scale"]
+        return self
+
+
+class ProductQuantizer:
+    """Product quantization: one byte per subspace, scored with lookup tables"""
+    mode = "pq"
+
+    def __init__(self, n_subspaces: int = PQ_DEFAULT_SUBSPACES):
+        self.n_subspaces = n_subspaces
+
+    def fit(self, x, seed: int = 0):
+        x = np.asarray(x, dtype=np.float32)
+        dim = x.shape[1]
+        # Largest subspace count <= requested that divides the dimension
+        m = max(d for d in range(1, min(self.n_subspaces, dim) + 1) if dim % d == 0)
+        self.n_subspaces = m
+        self.sub_dim = dim // m
+
+        rng = np.random.default_rng(seed)
+        sample = x[rng.choice(len(x), min(len(x), KMEANS_SAMPLE), replace=False)]
+        sub = sample.reshape(len(sample), m, self.sub_dim)
+        k = min(PQ_CENTROIDS, len(sample))
+        self.codebooks = np.stack([kmeans(sub[:, j], k, seed=seed + j) for j in range(m)])
+        return self
+
+    def encode(self, x) -> np.ndarray:
+        codes = np.empty((len(x), self.n_subspaces), dtype=np.uint8)
+        for start in range(0, len(x), SCORE_BLOCK):
+            block = np.asarray(x[start:start + SCORE_BLOCK], dtype=np.float32)
+            sub = block.reshape(len(block), self.n_subspaces, self.sub_dim)
+            for j in range(self.n_subspaces):
+                codes[start:start + len(block), j] = assign_nearest(sub[:, j], self.codebooks[j])
+        return codes
+
+    def scores(self, query, codes) -> np.ndarray:
+        # Asymmetric distance: per-subspace table of query . centroid
+        tables = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.n_subspaces, self.sub_dim))
+        cols = np.arange(self.n_subspaces)[None, :]
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK):
+            block = codes[start:start + SCORE_BLOCK]
+            out[start:start + len(block)] = tables[cols, block].sum(axis=1)
+        return out
+
+    def state(self) -> dict:
+        return {"codebooks": self.codebooks}
+
+    def load_state(self, state):
+        self.codebooks = state["codebooks"]
+        self.n_subspaces, _, self.sub_dim = self.codebooks.shape
+        return self
+
+
+CODECS = {"float16": Float16Codec, "int8": Int8Codec, "pq": ProductQuantizer}
+
+
+# ----------------------------------------
+# 🔎 COMPRESSED INDEX WITH EXACT RE-RANKING
+# ----------------------------------------
+class CompressedIndex:
+    """Approximate first pass on codes, exact cosine re-rank on a shortlist
+
+    The inverse row norms of the full matrix are computed in the same pass as
+    the codes and saved with them, so opening a compressed store never has to
+    read the full-precision matrix end to end.
+    """
+
+    def __init__(self, codec, codes, full_matrix=None, inv_norms=None):
+        self.codec = codec
+        self.codes = codes
+        self.full_matrix = full_matrix
+        self.inv_norms = inv_norms
+
+    @property
+    def mode(self) -> str:
+        return self.codec.mode
+
+    @classmethod
+    def build(cls, matrix, mode: str):
+        """Fit a codec on the (normalised) vectors and encode them"""
+        if mode not in CODECS:
+            raise ValueError(f"Unknown storage mode '{mode}'. Choose one of {list(CODECS)}")
+        rng = np.random.default_rng(0)
+        rows = np.sort(rng.choice(len(matrix), min(len(matrix), KMEANS_SAMPLE * 5), replace=False))
+        sample = normalize_rows(matrix[rows])
+        codec = CODECS[mode]().fit(sample)
+        codes, inv_norms = [], []
+        for start in range(0, len(matrix), SCORE_BLOCK):
+            block = np.asarray(matrix[start:start + SCORE_BLOCK], dtype=np.float32)
+            inv = 1.0 / np.clip(np.linalg.norm(block, axis=1), 1e-12, None)
+            codes.append(codec.encode(block * inv[:, None]))
+            inv_norms.append(inv.astype(np.float32))
+        return cls(codec, np.concatenate(codes), full_matrix=matrix, inv_norms=np.concatenate(inv_norms))
+
+    def save(self, path: str):
+        """Write codes and codec parameters to a single .npz file"""
+        tmp_path = path + ".tmp.npz"
+        extra = {} if self.inv_norms is None else {"inv_norms": self.inv_norms}
+        np.savez(tmp_path, mode=self.mode, codes=self.codes, **extra, **self.codec.state())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, full_matrix=None):
+        with np.load(path) as data:
+            mode = str(data["mode"])
+            state = {k: data[k] for k in data.files if k not in ("mode", "codes", "inv_norms")}
+            codes = data["codes"]
+            # Files written before the norms were stored have none
+            inv_norms = data["inv_norms"] if "inv_norms" in data.files else None
+        return cls(CODECS[mode]().load_state(state), codes, full_matrix=full_matrix, inv_norms=inv_norms)
+
+    def nbytes(self) -> int:
+        """RAM used by the first-pass codes"""
+        return int(self.codes.nbytes)
+
+    def search(self, query, k: int = 10, shortlist=None):
+        """Return (row indices, cosine scores) of the top-k rows"""
+        q = normalize_rows(query)
+        approx = self.codec.scores(q, self.codes)
+        if self.full_matrix is None:
+            idx = top_k(approx, k)
+            return idx, approx[idx]
+
+        candidates = np.sort(top_k(approx, max(k, shortlist or k * RERANK_FACTOR)))
+        exact = cosine_scores(self.full_matrix[candidates], q)
+        best = top_k(exact, k)
+        return candidates[best], exact[best]
+
+
+def recall_at_k(index: CompressedIndex, full_matrix, query_rows, k: int = 10, shortlist=None) -> float:
+    """Share of the exact top-k that the compressed index also returns
+
+    Queries are stored rows held out of both result lists, so no query is
+    counted as finding itself.
+    """
+    hits = 0
+    total = 0
+    for row in np.asarray(query_rows, dtype=np.int64):
+        query = np.asarray(full_matrix[row], dtype=np.float32)
+        scores = cosine_scores(full_matrix, query)
+        scores[row] = -np.inf
+        exact = set(top_k(scores, min(k, len(scores) - 1)).tolist())
+        found, _ = index.search(query, k + 1, shortlist=shortlist)
+        found = [i for i in found.tolist() if i != row][:k]
+        hits += len(exact & set(found))
+        total += len(exact)
+    return hits / total if total else 1.0
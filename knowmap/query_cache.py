@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from knowmap.encoder import load_encoder
+
+# ----------------------------------------
+# ⚡ QUERY EMBEDDING CACHE
+# ----------------------------------------
+# The cache and the encoder it wraps live at module level, so they are shared
+# by every Streamlit session and survive script reruns.
+DEFAULT_CACHE_SIZE = 2048
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query: trimmed, whitespace-collapsed, lower-cased
+
+    MiniLM's tokenizer is uncased, so case variants encode identically.
+    """
+    return " ".join(str(text).split()).lower()
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings with an encoder-compatible encode()"""
+
+    def __init__(self, encoder, max_size: int = DEFAULT_CACHE_SIZE):
+        self.encoder = encoder
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """Encode queries, serving repeated ones from the cache"""
+        single = isinstance(sentences, str)
+        queries = [sentences] if single else list(sentences)
+        keys = [normalize_query(q) for q in queries]
+
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing:
+            vectors = np.asarray(
+                self.encoder.encode(missing, batch_size=batch_size, convert_to_numpy=True),
+                dtype=np.float32
+            )
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    found[key] = vector
+                    self._entries[key] = vector
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        out = np.stack([found[k] for k in keys])
+        return out[0] if single else out
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+def shared_query_cache(backend: str = "torch", max_size: int = DEFAULT_CACHE_SIZE) -> QueryEmbeddingCache:
+    """Process-wide query cache (and encoder) for a backend, loaded on first use"""
+    with _shared_lock:
+        if backend not in _shared_caches:
+            _shared_caches[backend] = QueryEmbeddingCache(load_encoder(backend), max_size)
+        return _shared_caches[backend]
+
+
+def is_warm(backend: str = "torch") -> bool:
+    """True once the shared encoder for a backend has been loaded"""
+    return backend in _shared_caches
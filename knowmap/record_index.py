@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# 🗂 RECORD ID INDEX (feedback joins)
+# ----------------------------------------
+# Maps each record ID (as a string) to the position of its first row, so
+# feedback events can be joined to dataset rows with one hash lookup per
+# event instead of filtering the whole dataset per record.
+
+
+class RecordIndex:
+    """Position of the first row for every distinct record ID"""
+
+    def __init__(self, ids: pd.Series):
+        keys = pd.Series(ids).astype(str)
+        first = ~keys.duplicated().values
+        self.index = pd.Index(keys.values[first])
+        self.positions = np.flatnonzero(first)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def rows(self, ids) -> np.ndarray:
+        """Row positions for the given IDs (-1 where the ID is not in the dataset)"""
+        found = self.index.get_indexer(pd.Index([str(i) for i in ids]))
+        return np.where(found >= 0, self.positions[found], -1)
+
+    def lookup(self, df: pd.DataFrame, record_id, column: str, default=""):
+        """One column value of a record's first row"""
+        position = self.rows([record_id])[0]
+        return df[column].iat[position] if position >= 0 else default
+
+    def join(self, frame: pd.DataFrame, df: pd.DataFrame, columns, on: str = "record_id") -> pd.DataFrame:
+        """Add dataset columns to `frame` by matching frame[on] against record IDs"""
+        out = frame.copy()
+        positions = self.rows(out[on])
+        hit = positions >= 0
+        for column in columns:
+            values = pd.Series(pd.NA, index=out.index, dtype=object)
+            values[hit] = df[column].values[positions[hit]]
+            out[column] = values
+        return out
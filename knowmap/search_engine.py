@@ -0,0 +1,244 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from knowmap.clustering import ClusterIndex
+from knowmap.embedding_store import load_embeddings
+from knowmap.fingerprint import frame_fingerprint
+from knowmap.lexical_index import PREFILTER_CANDIDATES, BM25Index, reciprocal_rank_fusion
+from knowmap.partitions import PARTITION_COLUMNS, PartitionIndex
+from knowmap.quantization import CompressedIndex, compressed_path
+from knowmap.vector_ops import SCORE_BLOCK, batch_top_k, inverse_norms, normalize_rows, top_k
+
+# ----------------------------------------
+# 🔍 SEMANTIC SEARCH ENGINE
+# ----------------------------------------
+# Usable from Python as well as from the Streamlit app:
+#
+#   engine = SemanticSearchEngine.from_store("cross_domain_embeddings.pkl",
+#                                            encoder=load_encoder("torch"))
+#   results = engine.search_batch(["photosynthesis", "neural networks"], k=10)
+QUERY_BATCH_SIZE = 64
+SEARCH_METHODS = ["dense", "hybrid", "prefilter"]
+HYBRID_DEPTH = 100
+RESULT_COLUMNS = ["query_id", "query", "rank", "row", "id", "sentence", "domain", "label", "score"]
+
+
+class SemanticSearchEngine:
+    """Cosine search over the embedding store, for one query or many"""
+
+    def __init__(self, meta: pd.DataFrame, matrix, encoder=None, compressed=None, lexical=None,
+                 clusters=None):
+        self.meta = meta
+        self.matrix = matrix
+        self.encoder = encoder
+        self.compressed = compressed
+        self._inv_norms = compressed.inv_norms if compressed is not None else None
+        self.fingerprint = frame_fingerprint(meta, ["sentence"])
+        self._lexical = lexical if lexical is not None and lexical.fingerprint == self.fingerprint else None
+        self._partitions = None
+        self.clusters = clusters if clusters is not None and clusters.fingerprint == self.fingerprint else None
+
+    @classmethod
+    def from_store(cls, path: str, encoder=None, storage_mode=None, lexical_path=None,
+                   clusters_path=None):
+        """Open an embedding store, plus its compressed codes, BM25 index and clusters when they exist"""
+        meta, matrix = load_embeddings(path)
+        compressed = None
+        if storage_mode and storage_mode != "float32":
+            codes_path = compressed_path(path, storage_mode)
+            if os.path.exists(codes_path):
+                compressed = CompressedIndex.load(codes_path, full_matrix=matrix)
+        lexical = None
+        if lexical_path and os.path.exists(lexical_path):
+            lexical = BM25Index.load(lexical_path)
+        clusters = None
+        if clusters_path and os.path.exists(clusters_path):
+            clusters = ClusterIndex.load(clusters_path)
+        return cls(meta, matrix, encoder=encoder, compressed=compressed, lexical=lexical,
+                   clusters=clusters)
+
+    @property
+    def inv_norms(self) -> np.ndarray:
+        """1 / ||row|| of the stored vectors (from the codes file when one is loaded, else one pass)"""
+        if self._inv_norms is None:
+            self._inv_norms = inverse_norms(self.matrix)
+        return self._inv_norms
+
+    @property
+    def lexical(self) -> BM25Index:
+        """BM25 index over the stored sentences (rebuilt if the ingest-time one is stale)"""
+        if self._lexical is None:
+            self._lexical = BM25Index.build(
+                self.meta["sentence"].astype(str).tolist(), self.fingerprint
+            )
+        return self._lexical
+
+    @property
+    def partitions(self) -> dict:
+        """Per-domain / per-label row-id partitions, built on first use"""
+        if self._partitions is None:
+            self._partitions = {
+                col: PartitionIndex.from_values(self.meta[col])
+                for col in PARTITION_COLUMNS if col in self.meta.columns
+            }
+        return self._partitions
+
+    def filter_rows(self, domains=None, labels=None):
+        """Sorted row ids allowed by the domain/label filters (None when unfiltered)"""
+        allowed = None
+        for col, keys in (("domain", domains), ("label", labels)):
+            if keys and col in self.partitions:
+                rows = self.partitions[col].rows_for(keys)
+                allowed = rows if allowed is None else np.intersect1d(allowed, rows, assume_unique=True)
+        return allowed
+
+    def score_rows(self, query_vector, rows, block: int = SCORE_BLOCK) -> np.ndarray:
+        """Exact cosine of one query against the selected rows only"""
+        q = normalize_rows(query_vector)
+        out = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), block):
+            sel = rows[start:start + block]
+            out[start:start + len(sel)] = (
+                np.asarray(self.matrix[sel], dtype=np.float32) @ q
+            ) * self.inv_norms[sel]
+        return out
+
+    def _dense_top(self, query_vector, k: int, allowed=None):
+        if allowed is None:
+            idx, scores = self.top_k_vectors(query_vector, k)
+            return idx[0], scores[0]
+        scores = self.score_rows(query_vector, allowed)
+        best = top_k(scores, k)
+        return allowed[best], scores[best]
+
+    def _lexical_top(self, query: str, k: int, allowed=None):
+        if allowed is None:
+            return self.lexical.search(query, k)
+        scores = self.lexical.scores_rows(query, allowed)
+        matched = np.flatnonzero(scores)
+        best = matched[top_k(scores[matched], k)]
+        return allowed[best], scores[best]
+
+    def __len__(self):
+        return len(self.meta)
+
+    def encode_queries(self, queries, batch_size: int = QUERY_BATCH_SIZE) -> np.ndarray:
+        """Encode query strings in batches"""
+        if self.encoder is None:
+            raise ValueError("This engine has no encoder; pass query vectors instead of text")
+        vectors = self.encoder.encode(list(queries), batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(queries), -1)
+
+    def top_k_vectors(self, query_vectors, k: int = 10, block: int = SCORE_BLOCK):
+        """(indices, scores) of the top-k rows for every query vector"""
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if self.compressed is not None:
+            hits = [self.compressed.search(q, k) for q in query_vectors]
+            return np.stack([h[0] for h in hits]), np.stack([h[1] for h in hits])
+        return batch_top_k(self.matrix, query_vectors, k, inv_norms=self.inv_norms, block=block)
+
+    def search(self, query: str, k: int = 3, method: str = "dense",
+               domains=None, labels=None, nprobe=None) -> pd.DataFrame:
+        """Top-k matches for a single query
+
+        method: "dense" (embeddings only), "hybrid" (BM25 + dense fused with
+        reciprocal-rank fusion) or "prefilter" (BM25 candidates re-ranked densely).
+        domains / labels restrict scoring to those partitions; nprobe routes the
+        query to its closest clusters first (needs a cluster index).
+        """
+        query_vector = self.encode_queries([query])[0]
+        rows, scores = self.rank(query, query_vector, k, method, domains, labels, nprobe)
+        return self.results_frame([query], rows[None, :], scores[None, :])
+
+    def rank(self, query: str, query_vector, k: int, method: str = "dense",
+             domains=None, labels=None, nprobe=None):
+        """(row indices, scores) of the top-k rows for an already encoded query"""
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method '{method}'. Choose one of {SEARCH_METHODS}")
+
+        allowed = self.filter_rows(domains, labels)
+        if nprobe and self.clusters is not None:
+            cluster_rows = self.clusters.route(query_vector, nprobe)
+            allowed = cluster_rows if allowed is None else np.intersect1d(
+                allowed, cluster_rows, assume_unique=True
+            )
+        if allowed is not None and len(allowed) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if method == "dense":
+            return self._dense_top(query_vector, k, allowed)
+        if method == "hybrid":
+            depth = max(k, HYBRID_DEPTH)
+            dense_rows, _ = self._dense_top(query_vector, depth, allowed)
+            lexical_rows, _ = self._lexical_top(query, depth, allowed)
+            return reciprocal_rank_fusion([dense_rows, lexical_rows], k)
+
+        candidates = np.sort(self._lexical_top(query, max(k, PREFILTER_CANDIDATES), allowed)[0])
+        return self._dense_top(query_vector, k, candidates if len(candidates) else allowed)
+
+    def cross_domain_search(self, query: str, exclude_domain=None, k_per_domain: int = 1) -> pd.DataFrame:
+        """Best match(es) from every domain other than exclude_domain, best first"""
+        query_vector = self.encode_queries([query])[0]
+        partition = self.partitions["domain"]
+
+        rows, scores = [], []
+        for domain in partition.keys:
+            if domain == exclude_domain:
+                continue
+            domain_rows, domain_scores = self._dense_top(
+                query_vector, k_per_domain, partition.rows_for([domain])
+            )
+            rows.append(domain_rows)
+            scores.append(domain_scores)
+
+        if not rows:
+            rows, scores = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.float32)]
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        order = np.argsort(-scores, kind="stable")
+        return self.results_frame([query], rows[order][None, :], scores[order][None, :])
+
+    def search_batch(self, queries, k: int = 10, batch_size: int = QUERY_BATCH_SIZE,
+                     block: int = SCORE_BLOCK) -> pd.DataFrame:
+        """Top-k matches per query as one long table (one row per query x rank)"""
+        queries = [str(q) for q in queries]
+        frames = []
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start:start + batch_size]
+            idx, scores = self.top_k_vectors(self.encode_queries(batch, batch_size), k, block)
+            frames.append(self.results_frame(batch, idx, scores, start))
+
+        if not frames:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def results_frame(self, queries, idx, scores, offset: int = 0, rank_offset: int = 0) -> pd.DataFrame:
+        n_queries, k = idx.shape
+        rows = idx.ravel()
+        hits = self.meta.iloc[rows].reset_index(drop=True)
+        out = pd.DataFrame({
+            "query_id": np.repeat(np.arange(offset, offset + n_queries), k),
+            "query": np.repeat(np.asarray(queries, dtype=object), k),
+            "rank": np.tile(np.arange(rank_offset + 1, rank_offset + k + 1), n_queries),
+            "row": rows,
+        })
+        for col in ("id", "sentence", "domain", "label"):
+            out[col] = hits[col].values if col in hits.columns else None
+        out["score"] = scores.ravel()
+        return out
+
+
+def read_queries(uploaded_file) -> list:
+    """Read queries from an uploaded TXT (one per line) or CSV ('query' or first column)"""
+    name = getattr(uploaded_file, "name", "")
+    if name.lower().endswith(".csv"):
+        table = pd.read_csv(uploaded_file)
+        column = "query" if "query" in table.columns else table.columns[0]
+        queries = table[column].dropna().astype(str).tolist()
+    else:
+        raw = uploaded_file.read()
+        text = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+        queries = text.splitlines()
+    return [q.strip() for q in queries if q.strip()]
+
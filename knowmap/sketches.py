@@ -0,0 +1,354 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from knowmap.frequency_index import sentence_hashes
+from knowmap.overview_stats import NON_ALPHA
+
+# ----------------------------------------
+# 📐 STREAMING SKETCHES (approximate statistics)
+# ----------------------------------------
+# Bounded-memory summaries that are updated chunk by chunk and merged
+# across chunks: HyperLogLog (distinct counts), Count-Min (point counts),
+# Space-Saving (heavy hitters with error bounds) and a merging t-digest
+# (quantiles). Values are hashed to 64 bits with pandas' vectorized hasher.
+HLL_PRECISION = 14
+CMS_WIDTH = 1 << 16
+CMS_DEPTH = 4
+SPACE_SAVING_CAPACITY = 1000
+TDIGEST_COMPRESSION = 100
+SKETCH_CHUNK = 50_000
+# Bump when what the sketches count changes; saved sketches of another version are rebuilt
+SKETCH_VERSION = 2
+
+_CMS_SEEDS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93],
+    dtype=np.uint64
+)
+
+
+def hash_values(values) -> np.ndarray:
+    """64-bit hash of every value (as string)"""
+    return pd.util.hash_pandas_object(pd.Series(values).astype(str), index=False).values
+
+
+def pack_strings(values):
+    """Strings as one utf-8 byte array plus offsets (compact, no pickling)"""
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.concatenate([[0], np.cumsum([len(b) for b in encoded])]).astype(np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data, offsets) -> np.ndarray:
+    """Inverse of pack_strings: an object array of str"""
+    raw = data.tobytes()
+    return np.array(
+        [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)], dtype=object
+    )
+
+
+class HyperLogLog:
+    """Distinct-count estimator with 2^p one-byte registers (~1.04 / sqrt(2^p) relative error)"""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray):
+        p = self.precision
+        idx = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        # Rank = position of the first set bit in the remaining 64 - p bits
+        rest = (hashes << np.uint64(p)) >> np.uint64(11)          # top 53 bits, exact in float64
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = np.where(rest == 0, 64 - p + 1, 54 - exponent).astype(np.uint8)
+        np.maximum.at(self.registers, idx, np.minimum(rank, 64 - p + 1).astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return float(m * np.log(m / zeros))      # linear counting for small cardinalities
+        return float(raw)
+
+
+class CountMinSketch:
+    """Point-count estimates that never undercount (overcount <= e/width * total, w.h.p.)"""
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.int64)
+        self._shift = np.uint64(64 - int(np.log2(width)))
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        return ((hashes[None, :] * _CMS_SEEDS[:self.depth, None]) >> self._shift).astype(np.int64)
+
+    def update(self, hashes: np.ndarray, counts=None):
+        counts = np.ones(len(hashes), dtype=np.int64) if counts is None else counts
+        for d, cols in enumerate(self._columns(hashes)):
+            np.add.at(self.table[d], cols, counts)
+
+    def merge(self, other: "CountMinSketch"):
+        self.table += other.table
+
+    def query(self, hashes: np.ndarray) -> np.ndarray:
+        cols = self._columns(np.atleast_1d(hashes))
+        return np.min([self.table[d, c] for d, c in enumerate(cols)], axis=0)
+
+
+class SpaceSaving:
+    """Top-k heavy hitters: count - error <= true count <= count
+
+    Keeps at most `capacity` (hash, count, error) counters plus one example
+    string per counter. Chunks are summarised exactly and folded in with the
+    mergeable Space-Saving rule, so updates are vectorized.
+    """
+
+    def __init__(self, capacity: int = SPACE_SAVING_CAPACITY, keys=None, counts=None, errors=None, labels=None):
+        self.capacity = capacity
+        self.keys = keys if keys is not None else np.empty(0, dtype=np.uint64)
+        self.counts = counts if counts is not None else np.empty(0, dtype=np.int64)
+        self.errors = errors if errors is not None else np.empty(0, dtype=np.int64)
+        self.labels = labels if labels is not None else np.empty(0, dtype=object)
+
+    @property
+    def floor(self) -> int:
+        """Count an unmonitored item may have had (0 while below capacity)"""
+        return int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+
+    def update(self, values, hashes=None):
+        values = pd.Series(values).astype(str).reset_index(drop=True)
+        hashes = hash_values(values) if hashes is None else hashes
+        codes, keys = pd.factorize(hashes)
+        counts = np.bincount(codes, minlength=len(keys)).astype(np.int64)
+        labels = values.groupby(codes).first().values
+        chunk = SpaceSaving(self.capacity, np.asarray(keys, dtype=np.uint64), counts,
+                            np.zeros(len(keys), dtype=np.int64), labels)
+        chunk._truncate()
+        self.merge(chunk)
+
+    def merge(self, other: "SpaceSaving"):
+        floor_a, floor_b = self.floor, other.floor
+        keys = np.concatenate([self.keys, other.keys])
+        codes, uniques = pd.factorize(keys)
+        n = len(uniques)
+        in_a = np.zeros(n, dtype=bool)
+        in_a[codes[:len(self.keys)]] = True
+        in_b = np.zeros(n, dtype=bool)
+        in_b[codes[len(self.keys):]] = True
+
+        counts = np.where(in_a, 0, floor_a) + np.where(in_b, 0, floor_b)
+        errors = counts.copy()
+        np.add.at(counts, codes, np.concatenate([self.counts, other.counts]))
+        np.add.at(errors, codes, np.concatenate([self.errors, other.errors]))
+        labels = np.empty(n, dtype=object)
+        labels[codes[::-1]] = np.concatenate([self.labels, other.labels])[::-1]
+
+        self.keys, self.counts, self.errors, self.labels = (
+            np.asarray(uniques, dtype=np.uint64), counts, errors, labels
+        )
+        self._truncate()
+
+    def _truncate(self):
+        if len(self.keys) > self.capacity:
+            keep = np.argpartition(-self.counts, self.capacity - 1)[:self.capacity]
+            self.keys, self.counts = self.keys[keep], self.counts[keep]
+            self.errors, self.labels = self.errors[keep], self.labels[keep]
+
+    def top(self, n: int = 10) -> pd.DataFrame:
+        order = np.argsort(-self.counts, kind="stable")[:n]
+        return pd.DataFrame({
+            "value": self.labels[order],
+            "count": self.counts[order],
+            "min_count": self.counts[order] - self.errors[order],
+        })
+
+
+class TDigest:
+    """Merging t-digest (k1 scale) for quantiles of a numeric stream"""
+
+    def __init__(self, compression: float = TDIGEST_COMPRESSION, means=None, weights=None,
+                 min_value=np.inf, max_value=-np.inf):
+        self.compression = compression
+        self.means = means if means is not None else np.empty(0, dtype=np.float64)
+        self.weights = weights if weights is not None else np.empty(0, dtype=np.float64)
+        self.min = float(min_value)
+        self.max = float(max_value)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    @property
+    def mean(self) -> float:
+        """Exact mean (centroid merges preserve the weighted sum)"""
+        return float(np.dot(self.means, self.weights) / self.count) if self.count else 0.0
+
+    def update(self, values):
+        values, counts = np.unique(np.asarray(values, dtype=np.float64), return_counts=True)
+        if len(values):
+            self.min, self.max = min(self.min, values[0]), max(self.max, values[-1])
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, counts.astype(np.float64)]))
+
+    def merge(self, other: "TDigest"):
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        if not total:
+            return
+
+        # Centroid boundaries where the k1 scale function advances by 1
+        def k_scale(q):
+            return self.compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+        out_means, out_weights = [], []
+        cur_mean, cur_weight, done = means[0], weights[0], 0.0
+        k_lower = k_scale(0.0)
+        for mean, weight in zip(means[1:], weights[1:]):
+            if k_scale((done + cur_weight + weight) / total) - k_lower <= 1:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                out_means.append(cur_mean)
+                out_weights.append(cur_weight)
+                done += cur_weight
+                k_lower = k_scale(done / total)
+                cur_mean, cur_weight = mean, weight
+        out_means.append(cur_mean)
+        out_weights.append(cur_weight)
+        self.means, self.weights = np.array(out_means), np.array(out_weights)
+
+    def quantile(self, q: float) -> float:
+        if not len(self.means):
+            return float("nan")
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+        return float(np.interp(q, np.concatenate([[0.0], centers, [1.0]]),
+                               np.concatenate([[self.min], self.means, [self.max]])))
+
+
+class DatasetSketch:
+    """All approximate Overview / Top-10 statistics of a dataset, mergeable across chunks"""
+
+    def __init__(self, fingerprint: str = "", version: int = SKETCH_VERSION):
+        self.fingerprint = fingerprint
+        self.version = version
+        self.rows = 0
+        self.distinct = {c: HyperLogLog() for c in ("sentence", "domain", "label", "word")}
+        self.top = {c: SpaceSaving() for c in ("sentence", "domain", "label", "word")}
+        self.word_counts = CountMinSketch()
+        self.sentence_counts = CountMinSketch()
+        self.lengths = TDigest()
+
+    def update(self, chunk: pd.DataFrame):
+        sentences = chunk["sentence"].astype(str)
+        raw_hashes = hash_values(sentences)
+        # Frequencies group case / whitespace variants, like the exact FrequencyIndex
+        normalized_hashes = sentence_hashes(sentences)
+        words = pd.Series(NON_ALPHA.sub("", " ".join(sentences.tolist())).lower().split(), dtype=object)
+        word_hashes = hash_values(words)
+
+        self.rows += len(chunk)
+        for column, values, hashes, top_hashes in (
+            ("sentence", sentences, raw_hashes, normalized_hashes),
+            ("domain", chunk["domain"], None, None),
+            ("label", chunk["label"], None, None),
+            ("word", words, word_hashes, None),
+        ):
+            hashes = hash_values(values) if hashes is None else hashes
+            self.distinct[column].update(hashes)
+            self.top[column].update(values, hashes if top_hashes is None else top_hashes)
+        self.word_counts.update(word_hashes)
+        self.sentence_counts.update(normalized_hashes)
+        self.lengths.update(sentences.str.len().values)
+
+    def merge(self, other: "DatasetSketch"):
+        self.rows += other.rows
+        for column in self.distinct:
+            self.distinct[column].merge(other.distinct[column])
+            self.top[column].merge(other.top[column])
+        self.word_counts.merge(other.word_counts)
+        self.sentence_counts.merge(other.sentence_counts)
+        self.lengths.merge(other.lengths)
+
+    def count_of(self, column: str, value) -> int:
+        """Count-Min estimate of how often a word or sentence occurs (never too low)"""
+        if column == "word":
+            return int(self.word_counts.query(hash_values([value]))[0])
+        return int(self.sentence_counts.query(sentence_hashes(pd.Series([value])))[0])
+
+    def overview(self, top_words: int = 50) -> dict:
+        """Approximate counterpart of overview_stats.compute_overview (plus sketch-only fields)"""
+        return {
+            "records": self.rows,
+            "unique_domains": round(self.distinct["domain"].estimate()),
+            "unique_labels": round(self.distinct["label"].estimate()),
+            "avg_length": self.lengths.mean,
+            "max_length": int(self.lengths.max) if self.rows else 0,
+            "domain_counts": self.top["domain"].top(SPACE_SAVING_CAPACITY)[["value", "count"]].values.tolist(),
+            "label_counts": self.top["label"].top(SPACE_SAVING_CAPACITY)[["value", "count"]].values.tolist(),
+            "top_words": self.top["word"].top(top_words)[["value", "count"]].values.tolist(),
+            "unique_sentences": round(self.distinct["sentence"].estimate()),
+            "unique_words": round(self.distinct["word"].estimate()),
+            "length_quantiles": {q: self.lengths.quantile(q) for q in (0.5, 0.9, 0.99)},
+        }
+
+    def save(self, path: str):
+        arrays = {"fingerprint": self.fingerprint, "version": self.version, "rows": self.rows,
+                  "word_counts": self.word_counts.table, "sentence_counts": self.sentence_counts.table,
+                  "length_means": self.lengths.means, "length_weights": self.lengths.weights,
+                  "length_range": np.array([self.lengths.min, self.lengths.max])}
+        for column in self.distinct:
+            arrays[f"hll_{column}"] = self.distinct[column].registers
+            top = self.top[column]
+            arrays[f"ss_{column}_keys"] = top.keys
+            arrays[f"ss_{column}_counts"] = top.counts
+            arrays[f"ss_{column}_errors"] = top.errors
+            arrays[f"ss_{column}_labels"], arrays[f"ss_{column}_label_offsets"] = pack_strings(top.labels)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetSketch":
+        with np.load(path) as data:
+            sketch = cls(str(data["fingerprint"]), int(data["version"]) if "version" in data.files else 1)
+            sketch.rows = int(data["rows"])
+            sketch.word_counts = CountMinSketch(table=data["word_counts"])
+            sketch.sentence_counts = CountMinSketch(table=data["sentence_counts"])
+            sketch.lengths = TDigest(means=data["length_means"], weights=data["length_weights"],
+                                     min_value=data["length_range"][0], max_value=data["length_range"][1])
+            for column in sketch.distinct:
+                sketch.distinct[column] = HyperLogLog(registers=data[f"hll_{column}"])
+                sketch.top[column] = SpaceSaving(
+                    keys=data[f"ss_{column}_keys"], counts=data[f"ss_{column}_counts"],
+                    errors=data[f"ss_{column}_errors"],
+                    labels=unpack_strings(data[f"ss_{column}_labels"], data[f"ss_{column}_label_offsets"])
+                )
+        return sketch
+
+
+def build_sketch(df: pd.DataFrame, fingerprint: str = "", chunk: int = SKETCH_CHUNK,
+                 progress=None) -> DatasetSketch:
+    """Sketch a dataset chunk by chunk (each chunk sketched separately, then merged)"""
+    sketch = DatasetSketch(fingerprint)
+    for start in range(0, len(df), chunk):
+        part = DatasetSketch()
+        part.update(df.iloc[start:start + chunk])
+        sketch.merge(part)
+        if progress is not None:
+            progress(min(1.0, (start + chunk) / len(df)))
+    return sketch
@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# ----------------------------------------
+# ⏱ STARTUP: IMPORT TIMING & ENCODER WARM-UP
+# ----------------------------------------
+# This module must stay dependency-free: main.py imports it before anything
+# else so that the login page never waits for numpy/pandas/ML libraries.
+WARM_UP_BATCH = ["warm up the sentence encoder"] * 8
+
+IMPORT_TIMINGS = {}
+_timings_logged = False
+_warm_up_threads = {}
+_warm_up_errors = {}
+_warm_up_lock = threading.Lock()
+
+logger = logging.getLogger("knowmap.startup")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+@contextmanager
+def import_timer(name: str):
+    """Time the imports inside the block; only the first (cold) import is recorded"""
+    start = time.perf_counter()
+    yield
+    IMPORT_TIMINGS.setdefault(name, time.perf_counter() - start)
+
+
+def log_import_timings():
+    """Log the cold import cost of every timed module once per process"""
+    global _timings_logged
+    if _timings_logged:
+        return
+    _timings_logged = True
+    report = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in IMPORT_TIMINGS.items())
+    logger.info("import timings: %s", report)
+
+
+def start_warm_up(backend: str = "torch", max_size=None):
+    """Load the shared query encoder and run a dummy batch in a background thread
+
+    Idempotent per backend; heavy imports happen inside the thread, never on
+    the caller's path.
+    """
+
+    def _run():
+        start = time.perf_counter()
+        try:
+            with import_timer("knowmap.query_cache"):
+                from knowmap.query_cache import DEFAULT_CACHE_SIZE, shared_query_cache
+            cache = shared_query_cache(backend, max_size or DEFAULT_CACHE_SIZE)
+            cache.encoder.encode(WARM_UP_BATCH, batch_size=len(WARM_UP_BATCH), convert_to_numpy=True)
+        except Exception as exc:
+            logger.exception("encoder warm-up (%s) failed", backend)
+            _warm_up_errors[backend] = f"{type(exc).__name__}: {exc}"
+            return
+        logger.info("encoder warm-up (%s) finished in %.1fs", backend, time.perf_counter() - start)
+
+    with _warm_up_lock:
+        if backend not in _warm_up_threads:
+            thread = threading.Thread(target=_run, name=f"encoder-warm-up-{backend}", daemon=True)
+            _warm_up_threads[backend] = thread
+            thread.start()
+        return _warm_up_threads[backend]
+
+
+def warm_up_error(backend: str = "torch"):
+    """Error message of a failed warm-up for a backend (None if it has not failed)"""
+    return _warm_up_errors.get(backend)
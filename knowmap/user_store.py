@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# ----------------------------------------
+# 👤 USER STORE (SQLite, WAL mode)
+# ----------------------------------------
+# One row per account, keyed by username, so login is a single primary-key
+# lookup however many accounts exist. Every change is one transaction on
+# one row; read-modify-write updates (saved graphs) take the write lock up
+# front, so concurrent registrations and edits cannot overwrite each other.
+# Imported before the login page, so it depends on the standard library only.
+USER_FIELDS = ["username", "password", "email", "role", "created_at", "saved_graphs", "preferences"]
+JSON_FIELDS = {"saved_graphs": list, "preferences": dict}
+USER_ROLES = ["student", "researcher", "admin"]
+USERS_PAGE_SIZE = 50
+BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    email TEXT NOT NULL DEFAULT '',
+    role TEXT NOT NULL DEFAULT 'student',
+    created_at TEXT NOT NULL DEFAULT '',
+    saved_graphs TEXT NOT NULL DEFAULT '[]',
+    preferences TEXT NOT NULL DEFAULT '{}'
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+"""
+
+
+def _to_row(username: str, record: dict) -> tuple:
+    values = {"username": username, **record}
+    row = []
+    for field in USER_FIELDS:
+        if field in JSON_FIELDS:
+            row.append(json.dumps(values.get(field) or JSON_FIELDS[field]()))
+        else:
+            row.append(str(values.get(field, "") or ""))
+    return tuple(row)
+
+
+def _from_row(row) -> dict:
+    record = dict(zip(USER_FIELDS, row))
+    for field in JSON_FIELDS:
+        record[field] = json.loads(record[field])
+    return record
+
+
+class UserStore:
+    """Accounts with keyed lookups and atomic single-record updates"""
+
+    def __init__(self, path: str, legacy_json: str = None):
+        self.path = path
+        self._local = threading.local()
+        is_new = not os.path.exists(path)
+        self._connection().executescript(_SCHEMA)
+        if is_new and legacy_json and os.path.exists(legacy_json):
+            with open(legacy_json, "r") as f:
+                self.import_users(json.load(f))
+
+    # -- connections --------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction (BEGIN IMMEDIATE takes the write lock up front)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # -- writes -------------------------------------------------------------
+    def create(self, username: str, record: dict) -> bool:
+        """Insert a new account; False if the username is taken"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO users ({', '.join(USER_FIELDS)}) VALUES ({', '.join('?' * len(USER_FIELDS))})",
+                _to_row(username, record)
+            )
+            return cursor.rowcount == 1
+
+    def import_users(self, users: dict):
+        """Bulk-load a users.json style {username: record} mapping (existing accounts are kept)"""
+        with self._transaction() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO users ({', '.join(USER_FIELDS)}) VALUES ({', '.join('?' * len(USER_FIELDS))})",
+                [_to_row(username, record) for username, record in users.items()]
+            )
+
+    def update(self, username: str, **fields) -> bool:
+        """Overwrite some fields of one account; False if it does not exist"""
+        unknown = set(fields) - set(USER_FIELDS[1:])
+        if unknown:
+            raise ValueError(f"Unknown user field(s): {sorted(unknown)}")
+        values = [json.dumps(v) if k in JSON_FIELDS else str(v) for k, v in fields.items()]
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE users SET {', '.join(f'{k} = ?' for k in fields)} WHERE username = ?",
+                values + [username]
+            )
+            return cursor.rowcount == 1
+
+    def add_saved_graph(self, username: str, graph: dict) -> bool:
+        """Append a graph to an account's saved graphs unless one with that name exists"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT saved_graphs FROM users WHERE username = ?", (username,)).fetchone()
+            if row is None:
+                return False
+            graphs = json.loads(row[0])
+            if graph["name"] not in [g["name"] for g in graphs]:
+                graphs.append(graph)
+                conn.execute("UPDATE users SET saved_graphs = ? WHERE username = ?",
+                             (json.dumps(graphs), username))
+            return True
+
+    def delete(self, username: str) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM users WHERE username = ?", (username,)).rowcount == 1
+
+    # -- reads --------------------------------------------------------------
+    def get(self, username: str):
+        """One account as a dict (None if unknown)"""
+        row = self._connection().execute(
+            f"SELECT {', '.join(USER_FIELDS)} FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        return _from_row(row) if row else None
+
+    def count(self, search: str = "") -> int:
+        where, params = self._search_clause(search)
+        return self._connection().execute(f"SELECT COUNT(*) FROM users{where}", params).fetchone()[0]
+
+    def page(self, search: str = "", page: int = 0, page_size: int = USERS_PAGE_SIZE) -> list:
+        """One page of accounts in username order, optionally filtered by username prefix"""
+        where, params = self._search_clause(search)
+        rows = self._connection().execute(
+            f"SELECT {', '.join(USER_FIELDS)} FROM users{where} ORDER BY username LIMIT ? OFFSET ?",
+            params + [page_size, max(0, page) * page_size]
+        ).fetchall()
+        return [_from_row(row) for row in rows]
+
+    @staticmethod
+    def _search_clause(search: str):
+        # Prefix range on the primary key instead of LIKE, so it stays an index seek
+        if not search:
+            return "", []
+        return " WHERE username >= ? AND username < ?", [search, search + "\U0010ffff"]
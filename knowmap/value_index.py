@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# 🔎 SEARCHABLE VALUE INDEX (record pickers)
+# ----------------------------------------
+# Distinct values of a column, sorted by their lower-cased text. Prefix
+# queries are two binary searches; substring queries intersect the posting
+# lists of the query's byte trigrams (CSR layout, built on first use) and
+# verify the few candidates. Callers only ever receive one page of matches,
+# listed in numeric order when every value is a number (ids: 2 before 10).
+PICKER_PAGE_SIZE = 50
+TRIGRAM_CHUNK = 50_000
+SEARCH_MODES = ["prefix", "contains"]
+
+_PREFIX_END = "\U0010ffff"
+
+
+def trigram_codes(data: bytes) -> np.ndarray:
+    """Distinct byte trigrams of a string as 24-bit integer codes"""
+    buf = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    if len(buf) < 3:
+        return np.empty(0, dtype=np.uint32)
+    return _sorted_unique((buf[:-2] << 16) | (buf[1:-1] << 8) | buf[2:])
+
+
+def _sorted_unique(x: np.ndarray) -> np.ndarray:
+    x = np.sort(x)
+    return x[np.concatenate([[True], x[1:] != x[:-1]])] if len(x) else x
+
+
+class TrigramIndex:
+    """Posting lists of value ids per byte trigram: ids containing grams[i] are docs[offsets[i]:offsets[i + 1]]"""
+
+    def __init__(self, grams, offsets, docs):
+        self.grams = grams
+        self.offsets = offsets
+        self.docs = docs
+
+    @classmethod
+    def build(cls, keys, chunk: int = TRIGRAM_CHUNK):
+        pairs = []
+        for start in range(0, len(keys), chunk):
+            encoded = [k.encode("utf-8") for k in keys[start:start + chunk]]
+            lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+            counts = np.clip(lengths - 2, 0, None)
+            ends = np.cumsum(lengths)
+            buf = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+            positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - (ends - lengths), counts)
+            doc_ids = np.repeat(np.arange(start, start + len(encoded), dtype=np.uint64), counts)
+            codes = (buf[positions] << np.uint64(16)) | (buf[positions + 1] << np.uint64(8)) | buf[positions + 2]
+            pairs.append(_sorted_unique((codes << np.uint64(32)) | doc_ids))
+
+        pairs = np.sort(np.concatenate(pairs)) if pairs else np.empty(0, dtype=np.uint64)
+        codes = (pairs >> np.uint64(32)).astype(np.uint32)
+        starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]])[:len(codes)])
+        offsets = np.concatenate([starts, [len(codes)]]).astype(np.int64)
+        return cls(codes[starts], offsets, (pairs & np.uint64(0xFFFFFFFF)).astype(np.int32))
+
+    def candidates(self, query: str):
+        """Sorted ids of values containing every trigram of the query (None if the query is too short)"""
+        codes = trigram_codes(query.encode("utf-8"))
+        if not len(codes):
+            return None
+        pos = np.searchsorted(self.grams, codes)
+        if (pos >= len(self.grams)).any() or (self.grams[np.minimum(pos, len(self.grams) - 1)] != codes).any():
+            return np.empty(0, dtype=np.int32)
+        postings = sorted(
+            (self.docs[self.offsets[p]:self.offsets[p + 1]] for p in pos), key=len
+        )
+        result = postings[0]
+        for posting in postings[1:]:
+            result = np.intersect1d(result, posting, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+
+class ValueIndex:
+    """Distinct values of one column, searchable by prefix or substring"""
+
+    def __init__(self, values: pd.Series):
+        distinct = pd.Series(values.dropna().unique())
+        keys = distinct.astype(str).str.lower()
+        order = np.argsort(keys.values.astype(object), kind="stable")
+        self.values = distinct.values[order]
+        self.keys = keys.values.astype(object)[order]
+        self._trigrams = None
+
+        # Numeric columns are listed by value; rank[id] is a value's position in that order
+        self.rank = None
+        numbers = pd.to_numeric(pd.Series(self.values), errors="coerce")
+        if len(numbers) and numbers.notna().all():
+            self.numeric_order = np.argsort(numbers.to_numpy(), kind="stable")
+            self.rank = np.empty(len(numbers), dtype=np.int64)
+            self.rank[self.numeric_order] = np.arange(len(numbers))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def trigrams(self) -> TrigramIndex:
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex.build(self.keys)
+        return self._trigrams
+
+    def matches(self, query: str, mode: str = "prefix") -> np.ndarray:
+        """Ids (positions in sorted order) of the values matching a query"""
+        query = str(query).lower()
+        if not query:
+            return np.arange(len(self.values))
+        if mode == "prefix":
+            lo, hi = np.searchsorted(self.keys, [query, query + _PREFIX_END])
+            return np.arange(lo, hi)
+
+        candidates = self.trigrams.candidates(query)
+        if candidates is None:
+            # Shorter than a trigram: plain scan
+            return np.flatnonzero([query in k for k in self.keys])
+        if len(query.encode("utf-8")) == 3:
+            return candidates.astype(np.int64)
+        return np.asarray([c for c in candidates if query in self.keys[c]], dtype=np.int64)
+
+    def search(self, query: str = "", mode: str = "prefix", page: int = 0,
+               page_size: int = PICKER_PAGE_SIZE):
+        """(values of one page of matches, total number of matches)"""
+        if self.rank is not None and not str(query):
+            ids = self.numeric_order
+        else:
+            ids = self.matches(query, mode)
+            if self.rank is not None:
+                ids = ids[np.argsort(self.rank[ids], kind="stable")]
+        start = max(0, page) * page_size
+        return self.values[ids[start:start + page_size]].tolist(), len(ids)
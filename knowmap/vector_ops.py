@@ -0,0 +1,80 @@
+import numpy as np
+
+# ----------------------------------------
+# 🧮 SHARED VECTOR HELPERS
+# ----------------------------------------
+SCORE_BLOCK = 65536
+
+
+def normalize_rows(x) -> np.ndarray:
+    """L2-normalise vectors (a single vector or one per row) as float32"""
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.clip(norms, 1e-12, None)
+
+
+def top_k(scores: np.ndarray, k: int):
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def cosine_scores(matrix, query, block: int = SCORE_BLOCK) -> np.ndarray:
+    """Cosine similarity of one query against every row, computed in row blocks"""
+    q = normalize_rows(query)
+    out = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), block):
+        rows = normalize_rows(matrix[start:start + block])
+        out[start:start + len(rows)] = rows @ q
+    return out
+
+
+def inverse_norms(matrix, block: int = SCORE_BLOCK) -> np.ndarray:
+    """1 / ||row|| for every row, computed in row blocks"""
+    out = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), block):
+        rows = np.asarray(matrix[start:start + block], dtype=np.float32)
+        out[start:start + len(rows)] = 1.0 / np.clip(np.linalg.norm(rows, axis=1), 1e-12, None)
+    return out
+
+
+def batch_top_k(matrix, queries, k: int, inv_norms=None, block: int = SCORE_BLOCK):
+    """Top-k cosine matches for many queries with one matrix-matrix product per row block
+
+    Returns (indices, scores), both shaped (n_queries, k) and sorted best first.
+    Memory stays at n_queries x block regardless of corpus size.
+    """
+    q = normalize_rows(np.atleast_2d(queries))
+    n_queries = len(q)
+    k = min(k, len(matrix))
+    if inv_norms is None:
+        inv_norms = inverse_norms(matrix, block)
+
+    best_idx = np.empty((n_queries, 0), dtype=np.int64)
+    best_scores = np.empty((n_queries, 0), dtype=np.float32)
+    for start in range(0, len(matrix), block):
+        rows = np.asarray(matrix[start:start + block], dtype=np.float32)
+        scores = (q @ rows.T) * inv_norms[start:start + len(rows)]
+        best_idx, best_scores = merge_top_k(best_idx, best_scores, scores, start, k)
+
+    return sort_top_k(best_idx, best_scores)
+
+
+def merge_top_k(best_idx, best_scores, block_scores, offset: int, k: int):
+    """Fold one (n_queries x block) score block into running per-row top-k arrays"""
+    kb = min(k, block_scores.shape[1])
+    part = np.argpartition(-block_scores, kb - 1, axis=1)[:, :kb]
+    cand_scores = np.concatenate([best_scores, np.take_along_axis(block_scores, part, axis=1)], axis=1)
+    cand_idx = np.concatenate([best_idx, part + offset], axis=1)
+
+    keep = np.argpartition(-cand_scores, min(k, cand_scores.shape[1]) - 1, axis=1)[:, :k]
+    return np.take_along_axis(cand_idx, keep, axis=1), np.take_along_axis(cand_scores, keep, axis=1)
+
+
+def sort_top_k(best_idx, best_scores):
+    """Order running top-k arrays best first along each row"""
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
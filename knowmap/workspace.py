@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+# ----------------------------------------
+# 📁 PER-USER / PER-PROJECT WORKSPACES
+# ----------------------------------------
+# Every derived artifact lives under <root>/<user>/<project>/, so sessions
+# of different users (or projects) never overwrite each other's files.
+# Files sharing a stem (cross_domain_embeddings.pkl / .npy / .int8.npz)
+# form one artifact: access time, eviction and size are tracked per
+# artifact in a small manifest. When a workspace exceeds its quota, the
+# least recently used artifacts are deleted (pinned ones, like the dataset,
+# never are); they are rebuilt on demand like any missing file.
+# Large files that are byte-identical across workspaces are hard-linked to
+# one copy under <root>/_blobs/. Writers in this repo replace files
+# atomically (tmp + os.replace), which never modifies a shared inode.
+MANIFEST_FILE = ".manifest.json"
+BLOBS_DIR = "_blobs"
+DEFAULT_PROJECT = "default"
+DEDUP_MIN_BYTES = 1 << 20
+HASH_CHUNK = 1 << 22
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def safe_name(name: str) -> str:
+    """Directory-safe version of a user or project name"""
+    return _UNSAFE.sub("_", str(name)).strip("._") or "_"
+
+
+def artifact_of(relpath: str) -> str:
+    """Artifact key of a workspace file: its relative path up to the first '.' of the file name"""
+    head, name = os.path.split(relpath)
+    return os.path.join(head, name.split(".", 1)[0] or name)
+
+
+def is_temp(name: str) -> bool:
+    """Whether a file name is a write in progress (x.tmp, x.run1.tmp or np.savez's x.tmp.npz)"""
+    return name.endswith(".tmp") or ".tmp." in name
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_projects(root: str, user: str) -> list:
+    user_dir = os.path.join(root, safe_name(user))
+    if not os.path.isdir(user_dir):
+        return []
+    return sorted(d for d in os.listdir(user_dir) if os.path.isdir(os.path.join(user_dir, d)))
+
+
+def list_workspaces(root: str) -> list:
+    """(user, project) directory names of every workspace under root"""
+    if not os.path.isdir(root):
+        return []
+    return [(user, project) for user in sorted(os.listdir(root)) if user != BLOBS_DIR
+            for project in list_projects(root, user)]
+
+
+def collect_blobs(root: str) -> int:
+    """Delete shared copies no workspace links to any more; returns bytes freed"""
+    freed = 0
+    for dirpath, _, files in os.walk(os.path.join(root, BLOBS_DIR)):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            stat = os.stat(path)
+            if stat.st_nlink == 1:
+                os.remove(path)
+                freed += stat.st_size
+    return freed
+
+
+class Workspace:
+    """Namespaced artifact directory with size accounting, a quota and LRU eviction"""
+
+    def __init__(self, root: str, user: str, project: str = DEFAULT_PROJECT,
+                 quota_bytes: int = None, pinned=()):
+        self.root = root
+        self.user = user
+        self.project = project
+        self.dir = os.path.join(root, safe_name(user), safe_name(project))
+        self.quota_bytes = quota_bytes
+        self.pinned = {artifact_of(p) for p in pinned}
+        os.makedirs(self.dir, exist_ok=True)
+        self._manifest_path = os.path.join(self.dir, MANIFEST_FILE)
+        self.manifest = self._read_manifest()
+
+    # -- manifest -----------------------------------------------------------
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        manifest.setdefault("files", {})
+        manifest.setdefault("last_access", {})
+        return manifest
+
+    def _write_manifest(self):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    # -- paths --------------------------------------------------------------
+    def path(self, name: str) -> str:
+        """Location of an artifact file (or directory) inside this workspace"""
+        return os.path.join(self.dir, name)
+
+    def touch(self, *paths):
+        """Mark the artifacts behind these paths as just used"""
+        now = time.time()
+        for path in paths:
+            key = artifact_of(os.path.relpath(path, self.dir))
+            self.manifest["last_access"][key] = now
+        self._write_manifest()
+
+    def _scan(self) -> dict:
+        """{relative path: os.stat} of every artifact file (manifest and temp files excluded)"""
+        found = {}
+        for dirpath, _, files in os.walk(self.dir):
+            for name in files:
+                if name == MANIFEST_FILE or is_temp(name):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    found[os.path.relpath(path, self.dir)] = os.stat(path)
+                except FileNotFoundError:
+                    continue
+        return found
+
+    # -- maintenance --------------------------------------------------------
+    def sync(self) -> dict:
+        """Refresh size accounting, deduplicate new large files and enforce the quota
+
+        Only files that are new or changed since the last sync are hashed.
+        Returns the usage summary.
+        """
+        files, accessed = self.manifest["files"], self.manifest["last_access"]
+        current = self._scan()
+        for relpath in set(files) - set(current):
+            del files[relpath]
+
+        for relpath, stat in current.items():
+            entry = files.get(relpath)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            digest = None
+            if stat.st_size >= DEDUP_MIN_BYTES:
+                digest, stat = self._dedup(relpath, stat)
+            files[relpath] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+            key = artifact_of(relpath)
+            accessed[key] = max(accessed.get(key, 0), stat.st_mtime)
+
+        live = {artifact_of(p) for p in files}
+        for key in set(accessed) - live:
+            del accessed[key]
+
+        if self.quota_bytes is not None:
+            self.evict(self.quota_bytes)
+        self._write_manifest()
+        return self.usage()
+
+    def _dedup(self, relpath: str, stat):
+        """Hash a file and hard-link it to the shared copy of identical content; returns (hash, new stat)"""
+        path = self.path(relpath)
+        digest = file_hash(path)
+        blob = os.path.join(self.root, BLOBS_DIR, digest[:2], digest)
+        try:
+            if os.path.exists(blob):
+                blob_stat = os.stat(blob)
+                if (blob_stat.st_dev, blob_stat.st_ino) != (stat.st_dev, stat.st_ino) \
+                        and blob_stat.st_size == stat.st_size:
+                    tmp_path = path + ".tmp"
+                    os.link(blob, tmp_path)
+                    os.replace(tmp_path, path)
+                    stat = os.stat(path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.link(path, blob)
+        except OSError:
+            # Different filesystem or no hard-link support: keep the private copy
+            pass
+        return digest, stat
+
+    def artifacts(self) -> list:
+        """[{artifact, files, bytes, last_access, pinned}] newest first"""
+        grouped = {}
+        for relpath, entry in self.manifest["files"].items():
+            key = artifact_of(relpath)
+            item = grouped.setdefault(key, {"artifact": key, "files": [], "bytes": 0,
+                                            "last_access": self.manifest["last_access"].get(key, 0),
+                                            "pinned": key in self.pinned})
+            item["files"].append(relpath)
+            item["bytes"] += entry["size"]
+        return sorted(grouped.values(), key=lambda a: a["last_access"], reverse=True)
+
+    def evict(self, max_bytes: int) -> list:
+        """Delete least recently used unpinned artifacts until usage <= max_bytes"""
+        artifacts = self.artifacts()
+        used = sum(a["bytes"] for a in artifacts)
+        evicted = []
+        for artifact in reversed(artifacts):
+            if used <= max_bytes:
+                break
+            if artifact["pinned"]:
+                continue
+            for relpath in artifact["files"]:
+                try:
+                    os.remove(self.path(relpath))
+                except FileNotFoundError:
+                    pass
+                self.manifest["files"].pop(relpath, None)
+            self.manifest["last_access"].pop(artifact["artifact"], None)
+            used -= artifact["bytes"]
+            evicted.append(artifact["artifact"])
+        if evicted:
+            collect_blobs(self.root)
+        return evicted
+
+    def usage(self) -> dict:
+        """Logical bytes in this workspace and how many of them are shared copies"""
+        files = self.manifest["files"]
+        shared = 0
+        for relpath, entry in files.items():
+            try:
+                if os.stat(self.path(relpath)).st_nlink > 1:
+                    shared += entry["size"]
+            except FileNotFoundError:
+                continue
+        return {
+            "files": len(files),
+            "bytes": sum(e["size"] for e in files.values()),
+            "shared_bytes": shared,
+            "quota_bytes": self.quota_bytes,
+        }
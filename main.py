@@ -1,14 +1,13 @@
-import streamlit as st
-import pandas as pd
 import os
 import datetime
-import plotly.express as px
-import numpy as np
-from sentence_transformers import SentenceTransformer, util
-import torch
 import io
 import hashlib
-import json
+
+from knowmap.startup import IMPORT_TIMINGS, import_timer, log_import_timings, start_warm_up, warm_up_error
+from knowmap.user_store import USER_ROLES, USERS_PAGE_SIZE, UserStore
+
+with import_timer("streamlit"):
+    import streamlit as st
 
 # ----------------------------------------
 # 🎨 APP CONFIGURATION
@@ -24,8 +23,69 @@ st.set_page_config(
 # ----------------------------------------
 EMBEDDINGS_PATH = "cross_domain_embeddings.pkl"
 KNOWLEDGE_GRAPH_PATH = "knowledge_graph.html"
-FEEDBACK_FILE = "feedback.csv"
-USERS_FILE = "users.json"
+KNOWLEDGE_GRAPH_DATA_PATH = "knowledge_graph.npz"   # CSR arrays of the same graph (reloads without spaCy)
+FEEDBACK_FILE = "feedback.csv"          # legacy; imported once into FEEDBACK_DB_PATH
+FEEDBACK_DB_PATH = "feedback.db"
+USERS_FILE = "users.json"                # legacy; imported once into USERS_DB_PATH
+USERS_DB_PATH = "users.db"
+LEXICAL_INDEX_PATH = "lexical_index.npz"
+LINKS_PATH = "cross_domain_links.csv"
+CLUSTERS_PATH = "embedding_clusters.npz"
+ARTIFACT_CACHE_DIR = "artifact_cache"
+EXPORTS_DIR = "exports"
+# Derived-artifact cache bounds: disk tier per workspace, memory tier per server process
+ARTIFACT_CACHE_MB = int(os.environ.get("KNOWMAP_ARTIFACT_CACHE_MB", "1024"))
+ARTIFACT_MEMORY_MB = int(os.environ.get("KNOWMAP_ARTIFACT_MEMORY_MB", "256"))
+SKETCH_PATH = "dataset_sketch.npz"
+FREQUENCY_INDEX_PATH = "sentence_frequency.npz"
+DATASET_PATH = "dataset.pkl"
+# Artifact paths above (except feedback / users) are resolved inside the
+# logged-in user's project workspace: WORKSPACES_DIR/<user>/<project>/
+WORKSPACES_DIR = "workspaces"
+WORKSPACE_QUOTA_MB = int(os.environ.get("KNOWMAP_WORKSPACE_QUOTA_MB", "2048"))
+NEW_PROJECT = "➕ New project"
+# Above this many rows the stats pages default to sketch-based (approximate) statistics
+APPROX_STATS_ROWS = int(os.environ.get("KNOWMAP_APPROX_STATS_ROWS", "1000000"))
+
+# spaCy pipeline used for entity / relation extraction and the knowledge graph
+NER_MODEL = "en_core_web_sm"
+GRAPH_VERSION = "2"          # bump when the graph builder's output changes
+
+# Opt-in background precompute after upload (overview, NER, embeddings, graph);
+# the default of the checkbox on the upload page
+PRECOMPUTE_ON_UPLOAD = os.environ.get("KNOWMAP_PRECOMPUTE", "0") == "1"
+PRECOMPUTE_LABELS = {
+    "overview": "Overview statistics",
+    "ner": "Entity & relation extraction",
+    "embeddings": "Embeddings",
+    "graph": "Knowledge graph",
+}
+PRECOMPUTE_ICONS = {
+    "pending": "🕓", "running": "⏳", "done": "✅", "failed": "❌", "skipped": "⏭", "cancelled": "⛔"
+}
+
+# Encoder inference backend: "torch", "onnx" or "onnx-int8"
+ENCODER_BACKEND = os.environ.get("KNOWMAP_ENCODER_BACKEND", "torch")
+
+# Embedding storage for first-pass search: "float32", "float16", "int8" or "pq"
+STORAGE_MODE = os.environ.get("KNOWMAP_STORAGE_MODE", "float32")
+
+# Query embedding LRU cache size and encoder warm-up on server start
+QUERY_CACHE_SIZE = int(os.environ.get("KNOWMAP_QUERY_CACHE_SIZE", "2048"))
+WARM_UP_ON_START = os.environ.get("KNOWMAP_WARM_UP", "1") != "0"
+
+
+# ----------------------------------------
+# 🔥 ENCODER WARM-UP
+# ----------------------------------------
+def warm_up_encoder():
+    """Start the background encoder warm-up (once per server process)
+
+    Called after the page has been rendered, so the first search does not pay
+    the model load cost and the first page view does not wait for it either.
+    """
+    if WARM_UP_ON_START:
+        start_warm_up(ENCODER_BACKEND, QUERY_CACHE_SIZE)
 
 # ----------------------------------------
 # 🔐 USER AUTHENTICATION FUNCTIONS
@@ -35,70 +95,48 @@ def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
 
 
-def load_users():
-    """Load users from JSON file"""
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    return {}
-
-
-def save_users(users: dict):
-    """Save users to JSON file"""
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=4)
+@st.cache_resource
+def get_user_store():
+    """Shared account store (one per server process; connections are per thread)"""
+    return UserStore(USERS_DB_PATH, legacy_json=USERS_FILE)
 
 
 def register_user(username, password, email, role="student"):
     """Register a new user"""
-    users = load_users()
-    if username in users:
-        return False, "Username already exists"
-    
-    users[username] = {
+    created = get_user_store().create(username, {
         "password": hash_password(password),
         "email": email,
         "role": role,
         "created_at": str(datetime.datetime.now()),
         "saved_graphs": [],
         "preferences": {}
-    }
-    save_users(users)
+    })
+    if not created:
+        return False, "Username already exists"
     return True, "Registration successful"
 
 
 def authenticate_user(username, password):
     """Authenticate user credentials"""
-    users = load_users()
-    if username not in users:
+    user = get_user_store().get(username)
+    if user is None:
         return False, "User not found"
-    
-    if users[username]["password"] == hash_password(password):
-        return True, users[username]
+
+    if user["password"] == hash_password(password):
+        return True, user
     return False, "Invalid password"
 
 
 def update_user_preferences(username, preferences):
     """Update user preferences"""
-    users = load_users()
-    if username in users:
-        users[username]["preferences"] = preferences
-        save_users(users)
-        return True
-    return False
+    return get_user_store().update(username, preferences=preferences)
 
 
 def save_graph_to_profile(username, graph_name):
     """Save graph info to user profile"""
-    users = load_users()
-    if username in users:
-        if graph_name not in [g["name"] for g in users[username].get("saved_graphs", [])]:
-            users[username].setdefault("saved_graphs", []).append(
-                {"name": graph_name, "saved_at": str(datetime.datetime.now())}
-            )
-            save_users(users)
-        return True
-    return False
+    return get_user_store().add_saved_graph(
+        username, {"name": graph_name, "saved_at": str(datetime.datetime.now())}
+    )
 
 # ----------------------------------------
 # 🔐 LOGIN / REGISTRATION PAGE
@@ -325,7 +363,7 @@ def login_page():
             
             reg_role = st.selectbox(
                 "🎭 Select Your Role",
-                ["student", "researcher", "admin"],
+                USER_ROLES,
                 key="reg_role",
                 format_func=lambda x: (
                     f"🎓 {x.title()}" if x == "student"
@@ -472,8 +510,298 @@ if 'embeddings_generated' not in st.session_state:
 # ----------------------------------------
 if not st.session_state.logged_in:
     login_page()
+    warm_up_encoder()
     st.stop()
 
+# ----------------------------------------
+# 📦 DEFERRED IMPORTS (not needed by the login page)
+# ----------------------------------------
+# Heavy ML / visualization libraries (torch, sentence-transformers, spaCy,
+# NetworkX, PyVis, Plotly) are imported lazily by the pages that use them.
+with import_timer("pandas"):
+    import pandas as pd
+with import_timer("numpy"):
+    import numpy as np
+with import_timer("knowmap"):
+    from knowmap.clustering import (
+        DEFAULT_NPROBE, ClusterIndex, centroid_similarity, default_n_clusters, domain_centroids
+    )
+    from knowmap.embedding_store import load_embeddings, matrix_path, save_metadata
+    from knowmap.encoder import (
+        BACKENDS, DEFAULT_BATCH_SIZE, PARITY_MIN_COSINE, encode_corpus, load_encoder
+    )
+    from knowmap.onnx_backend import check_parity
+    from knowmap.quantization import STORAGE_MODES, CompressedIndex, compressed_path, recall_at_k, stored_mode
+    from knowmap.query_cache import is_warm, shared_query_cache
+    from knowmap.exports import (
+        EXPORT_FORMATS, available_formats, edge_table, entity_table, export_file, export_path
+    )
+    from knowmap.feedback_store import (
+        FEEDBACK_STATUSES, FEEDBACK_TYPES, GRANULARITIES, FeedbackStore
+    )
+    from knowmap.fingerprint import CORE_COLUMNS, dataset_fingerprint, frame_fingerprint
+    from knowmap.frequency_index import FrequencyIndex
+    from knowmap.graph_export import GraphData, read_graph_upload, write_graph_file
+    from knowmap.knowledge_graph import build_graph, extract_entities_relations, render_graph_html
+    from knowmap.lexical_index import BM25Index
+    from knowmap.link_discovery import (
+        DEFAULT_LINKS_PER_SENTENCE, DEFAULT_MIN_SCORE, discover_links, load_links, save_links
+    )
+    from knowmap.artifact_cache import artifact_key, shared_artifact_cache
+    from knowmap.bulk_ops import (
+        UndoLog, delete_records, merge_sentences, read_id_list, read_merge_mapping, undo_operation
+    )
+    from knowmap.near_duplicates import (
+        DEFAULT_COSINE, DEFAULT_JACCARD, cluster_summary, find_near_duplicates, merge_mapping
+    )
+    from knowmap.overview_stats import counts_series, load_overview
+    from knowmap.pagination import ResultCursor
+    from knowmap.pipeline import DONE, FAILED, PENDING, RUNNING, Stage, get_pipeline, start_pipeline, stop_pipeline
+    from knowmap.record_index import RecordIndex
+    from knowmap.search_engine import SemanticSearchEngine, read_queries
+    from knowmap.sketches import SKETCH_VERSION, DatasetSketch, build_sketch
+    from knowmap.value_index import PICKER_PAGE_SIZE, SEARCH_MODES, ValueIndex
+    from knowmap.workspace import DEFAULT_PROJECT, Workspace, list_projects, list_workspaces
+
+log_import_timings()
+
+
+def session_fingerprint(df):
+    """Dataset version key, recomputed only when the session's DataFrame object or its columns change"""
+    memo = st.session_state.get("dataset_fingerprint")
+    columns = tuple(df.columns)
+    if memo is None or memo[0] is not df or memo[1] != columns:
+        memo = (df, columns, dataset_fingerprint(df))
+        st.session_state.dataset_fingerprint = memo
+    return memo[2]
+
+
+def columns_fingerprint(df, columns):
+    """frame_fingerprint of some columns, memoized on the dataset version like session_fingerprint"""
+    version = session_fingerprint(df)
+    memo = st.session_state.get("columns_fingerprints")
+    if memo is None or memo[0] != version:
+        memo = (version, {})
+        st.session_state.columns_fingerprints = memo
+    key = tuple(columns)
+    if key not in memo[1]:
+        memo[1][key] = frame_fingerprint(df, list(columns))
+    return memo[1][key]
+
+
+def ner_key(df, nlp):
+    """Artifact key of the entity / relation columns for the dataset's sentences"""
+    return artifact_key(
+        frame_fingerprint(df, ["sentence"]), "ner", {"model": NER_MODEL}, nlp.meta.get("version", "")
+    )
+
+
+def graph_key(df, nlp, links=None):
+    """Artifact key of the knowledge-graph page (core columns only: NER columns do not change it)"""
+    return artifact_key(
+        frame_fingerprint(df, CORE_COLUMNS), "graph",
+        {"links": frame_fingerprint(links) if links is not None else None},
+        f"{GRAPH_VERSION}/{NER_MODEL}-{nlp.meta.get('version', '')}"
+    )
+
+
+def graph_artifact(df, nlp, cache, links=None, progress=None):
+    """Cached {"html": page, "graph": GraphData} of the knowledge graph; None if no entities were found"""
+    key = graph_key(df, nlp, links)
+    artifact = cache.get("graph", key)
+    if artifact is None:
+        ner = cache.get("ner", ner_key(df, nlp))
+        G = build_graph(df, nlp, ner["entities"] if ner is not None else None, links, progress)
+        if G is None:
+            return None
+        artifact = cache.put("graph", key, {"html": render_graph_html(G), "graph": GraphData.from_networkx(G, key)})
+    return artifact
+
+
+def staging_path(path, stage=None):
+    """Temp name a result is written to before it is moved into place (run-private for background stages)"""
+    return f"{path}.{stage.run_id}.tmp" if stage is not None else path + ".tmp"
+
+
+def discard(staged):
+    for tmp_path in staged.values():
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def publish(staged, stage=None, remove=()):
+    """Move staged files into place, in order ({final path: staged path}), after deleting `remove`
+
+    For a background stage this happens only while its run is current; a
+    cancelled or replaced run's files are dropped (the stage raises Cancelled).
+    """
+    def move():
+        for path in remove:
+            if path not in staged and os.path.exists(path):
+                os.remove(path)
+        for path, tmp_path in staged.items():
+            os.replace(tmp_path, path)
+
+    try:
+        if stage is not None:
+            stage.commit(move)
+        else:
+            move()
+    finally:
+        discard(staged)
+
+
+def write_graph(artifact, html_path, data_path, stage=None):
+    """Write the graph page and its arrays (atomic replace, so shared copies stay intact)"""
+    staged = {html_path: staging_path(html_path, stage), data_path: staging_path(data_path, stage)}
+    try:
+        with open(staged[html_path], "w", encoding="utf-8") as f:
+            f.write(artifact["html"])
+        artifact["graph"].save(staged[data_path])
+    except BaseException:
+        discard(staged)
+        raise
+    publish(staged, stage)
+
+
+def precompute_stages(df, fingerprint):
+    """Background stages for a freshly uploaded dataset
+
+    Paths and caches are bound now (to the current workspace); the stages
+    never touch Streamlit. Files are staged under run-private names and only
+    published while this run is the workspace's current pipeline, so a
+    superseded run never overwrites a newer dataset's results.
+    """
+    df = df.copy()
+    cache, embeddings_path = artifact_cache, EMBEDDINGS_PATH
+    graph_path, graph_data_path = KNOWLEDGE_GRAPH_PATH, KNOWLEDGE_GRAPH_DATA_PATH
+    models = {}
+
+    def load_nlp():
+        if "nlp" not in models:
+            with import_timer("spacy"):
+                import spacy
+            models["nlp"] = spacy.load(NER_MODEL)
+        return models["nlp"]
+
+    def run_overview(stage):
+        load_overview(df, fingerprint, cache)
+
+    def run_ner(stage):
+        nlp = load_nlp()
+        cache.get_or_compute(
+            "ner", ner_key(df, nlp), lambda: extract_entities_relations(nlp, df["sentence"], stage.report)
+        )
+
+    def run_embeddings(stage):
+        model = load_encoder(ENCODER_BACKEND)
+        store = matrix_path(embeddings_path)
+        # Matrix, then codes, then metadata: the metadata always points at a complete store
+        staged = {store: staging_path(store, stage)}
+        try:
+            encode_corpus(model, df["sentence"].astype(str).tolist(), staged[store], progress=stage.report)
+            if STORAGE_MODE != "float32":
+                codes = compressed_path(embeddings_path, STORAGE_MODE)
+                staged[codes] = staging_path(codes, stage)
+                full_matrix = np.load(staged[store], mmap_mode="r")
+                CompressedIndex.build(full_matrix, STORAGE_MODE).save(staged[codes])
+                del full_matrix
+            staged[embeddings_path] = staging_path(embeddings_path, stage)
+            save_metadata(df, staged[embeddings_path])
+        except BaseException:
+            discard(staged)
+            raise
+        # Codes built for the previous embeddings are stale now
+        publish(staged, stage, remove=[compressed_path(embeddings_path, mode) for mode in STORAGE_MODES[1:]])
+
+    def run_graph(stage):
+        artifact = graph_artifact(df, load_nlp(), cache, progress=stage.report)
+        if artifact is None:
+            raise ValueError("No entities found — cannot build graph.")
+        write_graph(artifact, graph_path, graph_data_path, stage)
+
+    return [
+        Stage("overview", run_overview),
+        Stage("ner", run_ner),
+        Stage("embeddings", run_embeddings),
+        Stage("graph", run_graph, depends=["ner"]),
+    ]
+
+
+def precompute_status(stage):
+    """Show the background status of a stage on its page; returns the status ("" if none)"""
+    pipeline = get_pipeline(workspace.dir)
+    status = pipeline.status(stage) if pipeline is not None else ""
+    label = PRECOMPUTE_LABELS[stage]
+    if status in (PENDING, RUNNING):
+        st.info(
+            f"⏳ {label}: in progress ({pipeline.stages[stage].progress:.0%}). "
+            "It is being computed in the background; this page will be ready when it finishes."
+        )
+        st.button("🔄 Refresh status", key=f"precompute_refresh_{stage}")
+    elif status == DONE:
+        st.success(f"✅ {label}: ready (precomputed in the background).")
+    elif status == FAILED:
+        st.warning(f"⚠️ Background {label.lower()} failed: {pipeline.stages[stage].error}")
+    return status
+
+
+def save_dataset(df):
+    """Persist the session dataset in the workspace (atomic replace)"""
+    tmp_path = DATASET_PATH + ".tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, DATASET_PATH)
+
+
+@st.cache_resource(max_entries=2)
+def load_record_index(fingerprint, _ids):
+    return RecordIndex(_ids)
+
+
+def record_index(df):
+    """ID -> row position index of the session dataset"""
+    return load_record_index(session_fingerprint(df), df["id"])
+
+
+@st.cache_resource(max_entries=2)
+def load_sketch_file(path, mtime):
+    return DatasetSketch.load(path)
+
+
+def dataset_sketch(df):
+    """Sketch of the session dataset from disk, rebuilt (chunked) if it belongs to another version"""
+    fingerprint = session_fingerprint(df)
+    if os.path.exists(SKETCH_PATH):
+        sketch = load_sketch_file(SKETCH_PATH, os.path.getmtime(SKETCH_PATH))
+        if sketch.fingerprint == fingerprint and sketch.version == SKETCH_VERSION:
+            return sketch
+    with st.spinner("Building dataset sketches..."):
+        sketch = build_sketch(df, fingerprint)
+        sketch.save(SKETCH_PATH)
+    return sketch
+
+
+@st.cache_resource(max_entries=2)
+def load_graph_file(path, mtime):
+    return GraphData.load(path)
+
+
+@st.cache_resource(max_entries=2)
+def load_frequency_file(path, mtime):
+    return FrequencyIndex.load(path)
+
+
+def sentence_frequencies(df):
+    """Exact sentence frequency index of the session dataset, rebuilt if it belongs to another version"""
+    fingerprint = session_fingerprint(df)
+    if os.path.exists(FREQUENCY_INDEX_PATH):
+        index = load_frequency_file(FREQUENCY_INDEX_PATH, os.path.getmtime(FREQUENCY_INDEX_PATH))
+        if index.fingerprint == fingerprint:
+            return index
+    index = FrequencyIndex.build(df["sentence"], df["domain"], fingerprint)
+    index.save(FREQUENCY_INDEX_PATH)
+    return index
+
 # ----------------------------------------
 # 📚 SIDEBAR NAVIGATION & USER INFO
 # ----------------------------------------
@@ -493,6 +821,43 @@ if st.sidebar.button("🚪 Logout"):
 
 st.sidebar.markdown("---")
 
+# ----------------------------------------
+# 📁 WORKSPACE (per user / project)
+# ----------------------------------------
+projects = list_projects(WORKSPACES_DIR, st.session_state.username) or [DEFAULT_PROJECT]
+project = st.sidebar.selectbox("📁 Project", projects + [NEW_PROJECT])
+if project == NEW_PROJECT:
+    project = st.sidebar.text_input("New project name").strip() or DEFAULT_PROJECT
+
+workspace = Workspace(
+    WORKSPACES_DIR, st.session_state.username, project,
+    quota_bytes=WORKSPACE_QUOTA_MB * 2**20, pinned=[DATASET_PATH]
+)
+DATASET_PATH = workspace.path(DATASET_PATH)
+EMBEDDINGS_PATH = workspace.path(EMBEDDINGS_PATH)
+KNOWLEDGE_GRAPH_PATH = workspace.path(KNOWLEDGE_GRAPH_PATH)
+KNOWLEDGE_GRAPH_DATA_PATH = workspace.path(KNOWLEDGE_GRAPH_DATA_PATH)
+LEXICAL_INDEX_PATH = workspace.path(LEXICAL_INDEX_PATH)
+LINKS_PATH = workspace.path(LINKS_PATH)
+CLUSTERS_PATH = workspace.path(CLUSTERS_PATH)
+ARTIFACT_CACHE_DIR = workspace.path(ARTIFACT_CACHE_DIR)
+EXPORTS_DIR = workspace.path(EXPORTS_DIR)
+SKETCH_PATH = workspace.path(SKETCH_PATH)
+FREQUENCY_INDEX_PATH = workspace.path(FREQUENCY_INDEX_PATH)
+
+# Every page looks derived data up here (by dataset fingerprint, stage,
+# parameters and model version) before recomputing it
+artifact_cache = shared_artifact_cache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MB * 2**20, ARTIFACT_MEMORY_MB * 2**20)
+
+# Switching user or project swaps in that workspace's dataset
+if st.session_state.get("workspace_dir") != workspace.dir:
+    st.session_state.workspace_dir = workspace.dir
+    st.session_state.df = pd.read_pickle(DATASET_PATH) if os.path.exists(DATASET_PATH) else None
+    st.session_state.embeddings_generated = False
+    st.session_state.pop("undo_log", None)
+
+st.sidebar.markdown("---")
+
 # Role-based page access
 pages = [
     "📤 Upload Dataset",
@@ -517,15 +882,43 @@ pages.append("⚙️ User Preferences")
 
 choice = st.sidebar.radio("📑 Navigate Pages", pages)
 
+# Background precompute status of this workspace
+precompute = get_pipeline(workspace.dir)
+if precompute is not None:
+    with st.sidebar.expander("⚙️ Background Precompute", expanded=not precompute.finished()):
+        for row in precompute.summary():
+            st.write(
+                f"{PRECOMPUTE_ICONS.get(row['status'], '')} {PRECOMPUTE_LABELS.get(row['stage'], row['stage'])}: "
+                f"{row['status']}" + (f" ({row['progress']:.0%})" if row["status"] == RUNNING else "")
+            )
+        if not precompute.finished():
+            st.button("🔄 Refresh", key="precompute_sidebar_refresh")
+
+# Artifacts each page reads, marked as recently used before the quota is enforced
+PAGE_ARTIFACTS = {
+    "🏠 Overview": [EMBEDDINGS_PATH, CLUSTERS_PATH, SKETCH_PATH],
+    "🌐 Knowledge Graph": [KNOWLEDGE_GRAPH_PATH, LINKS_PATH, EMBEDDINGS_PATH],
+    "🔍 Semantic Search": [EMBEDDINGS_PATH, LEXICAL_INDEX_PATH, CLUSTERS_PATH],
+    "🧩 Top 10 Sentences": [FREQUENCY_INDEX_PATH, SKETCH_PATH],
+    "🛠 Admin Tools": [EMBEDDINGS_PATH],
+    "💾 Download Options": [KNOWLEDGE_GRAPH_PATH, KNOWLEDGE_GRAPH_DATA_PATH],
+}
+workspace.touch(*[p for p in PAGE_ARTIFACTS.get(choice, []) if os.path.exists(p)])
+workspace_usage = workspace.sync()
+st.sidebar.caption(
+    f"💽 Workspace: {workspace_usage['bytes'] / 2**20:,.1f} MB of {WORKSPACE_QUOTA_MB:,} MB"
+    + (f" ({workspace_usage['shared_bytes'] / 2**20:,.1f} MB shared)" if workspace_usage["shared_bytes"] else "")
+)
+
 # ----------------------------------------
-# 💬 LOAD FEEDBACK FILE
+# 💬 FEEDBACK STORE (shared by all sessions)
 # ----------------------------------------
-if os.path.exists(FEEDBACK_FILE):
-    feedback_df = pd.read_csv(FEEDBACK_FILE)
-else:
-    feedback_df = pd.DataFrame(
-        columns=["record_id", "user", "feedback_type", "comment", "status", "timestamp"]
-    )
+@st.cache_resource
+def get_feedback_store():
+    return FeedbackStore(FEEDBACK_DB_PATH, legacy_csv=FEEDBACK_FILE)
+
+
+feedback_store = get_feedback_store()
 
 # ----------------------------------------
 # 📤 UNIVERSAL UPLOAD DATASET PAGE
@@ -533,6 +926,12 @@ else:
 if choice == "📤 Upload Dataset":
     st.title("📤 Upload Your Dataset (Any Format Supported)")
 
+    run_precompute = st.checkbox(
+        "⚡ Precompute in the background after upload (overview, entities, embeddings, graph)",
+        value=PRECOMPUTE_ON_UPLOAD,
+        help="Each page then shows 'ready' or 'in progress' instead of computing on demand."
+    )
+
     uploaded_file = st.file_uploader(
         "Upload CSV, Excel, or TXT file",
         type=['csv', 'xlsx', 'xls', 'txt'],
@@ -620,9 +1019,43 @@ if choice == "📤 Upload Dataset":
             # 📌 SAVE FINAL CLEAN DATASET
             # ======================================================
             st.session_state.df = processed_df
+            save_dataset(processed_df)
+
+            # ======================================================
+            # 📌 BUILD LEXICAL (BM25) INDEX AT INGEST
+            # ======================================================
+            BM25Index.build(
+                processed_df["sentence"].tolist(),
+                frame_fingerprint(processed_df, ["sentence"])
+            ).save(LEXICAL_INDEX_PATH)
+
+            # ======================================================
+            # 📌 SENTENCE FREQUENCY INDEX AT INGEST
+            # ======================================================
+            FrequencyIndex.build(
+                processed_df["sentence"], processed_df["domain"], session_fingerprint(processed_df)
+            ).save(FREQUENCY_INDEX_PATH)
+
+            # ======================================================
+            # 📌 SKETCH STATISTICS AT INGEST (chunked, mergeable)
+            # ======================================================
+            sketch_progress = st.progress(0.0, text="Sketching dataset statistics...")
+            build_sketch(
+                processed_df, session_fingerprint(processed_df), progress=sketch_progress.progress
+            ).save(SKETCH_PATH)
 
             st.success("🎉 Dataset processed successfully!")
 
+            # ======================================================
+            # 📌 BACKGROUND PRECOMPUTE (opt-in; idempotent per dataset version)
+            # ======================================================
+            if run_precompute:
+                upload_fingerprint = session_fingerprint(processed_df)
+                start_pipeline(workspace.dir, upload_fingerprint, precompute_stages(processed_df, upload_fingerprint))
+                st.info("⚙️ Background precompute started — see the sidebar for per-stage status.")
+            else:
+                stop_pipeline(workspace.dir)
+
             st.subheader("📋 Parsed Dataset Preview")
             st.dataframe(processed_df.head(10), use_container_width=True)
 
@@ -664,23 +1097,44 @@ elif choice == "🏠 Overview":
     sentence structure, and automatic insights.
     """)
 
+    approximate = st.checkbox(
+        "⚡ Approximate statistics (sketches)",
+        value=len(df) > APPROX_STATS_ROWS,
+        help="HyperLogLog distinct counts, Space-Saving top-k and t-digest length quantiles, "
+             "maintained at ingest with bounded memory."
+    )
+    if approximate:
+        stats = dataset_sketch(df).overview()
+        stats["columns"] = [str(c) for c in df.columns]
+        stats["missing"] = {str(k): int(v) for k, v in df.isna().sum().items()}
+    else:
+        # Computed once per dataset version, then served from memory / disk
+        if precompute_status("overview") in (PENDING, RUNNING):
+            st.stop()
+        stats = load_overview(df, session_fingerprint(df), artifact_cache)
+
     # -----------------------------------------------------------------------------
     # 🔢 TOP METRICS
     # -----------------------------------------------------------------------------
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("📌 Total Records", len(df))
+        st.metric("📌 Total Records", stats["records"])
 
     with col2:
-        st.metric("🍀 Unique Domains", df["domain"].nunique())
+        st.metric("🍀 Unique Domains", stats["unique_domains"])
 
     with col3:
-        st.metric("🏷 Unique Labels", df["label"].nunique())
+        st.metric("🏷 Unique Labels", stats["unique_labels"])
 
     with col4:
-        avg_length = df["sentence"].astype(str).apply(len).mean()
-        st.metric("✏️ Avg Sentence Length", f"{avg_length:.1f} chars")
+        st.metric("✏️ Avg Sentence Length", f"{stats['avg_length']:.1f} chars")
+
+    if approximate:
+        q_cols = st.columns(4)
+        q_cols[0].metric("🧩 Distinct Sentences (≈)", f"{stats['unique_sentences']:,}")
+        for col, (q, value) in zip(q_cols[1:], stats["length_quantiles"].items()):
+            col.metric(f"📏 p{int(q * 100)} Length", f"{value:.0f} chars")
 
     st.markdown("---")
 
@@ -688,7 +1142,7 @@ elif choice == "🏠 Overview":
     # 📊 DOMAIN DISTRIBUTION
     # -----------------------------------------------------------------------------
     st.subheader("📊 Domain Distribution")
-    domain_counts = df["domain"].value_counts()
+    domain_counts = counts_series(stats["domain_counts"])
 
     st.bar_chart(domain_counts)
 
@@ -696,9 +1150,41 @@ elif choice == "🏠 Overview":
     # 🏷 LABEL DISTRIBUTION
     # -----------------------------------------------------------------------------
     st.subheader("🏷 Label Type Distribution")
-    label_counts = df["label"].value_counts()
+    label_counts = counts_series(stats["label_counts"])
     st.bar_chart(label_counts)
 
+    # -----------------------------------------------------------------------------
+    # 🌡 DOMAIN x DOMAIN SIMILARITY (embedding centroids)
+    # -----------------------------------------------------------------------------
+    if os.path.exists(EMBEDDINGS_PATH):
+        @st.cache_data
+        def load_domain_similarity(path, mtime, clusters_mtime):
+            if clusters_mtime:
+                clusters = ClusterIndex.load(CLUSTERS_PATH)
+                return clusters.domain_similarity()
+            meta, matrix = load_embeddings(path)
+            return centroid_similarity(*domain_centroids(meta, matrix))
+
+        embeddings_mtime = os.path.getmtime(EMBEDDINGS_PATH)
+        clusters_mtime = os.path.getmtime(CLUSTERS_PATH) if os.path.exists(CLUSTERS_PATH) else 0
+        # Clusters built before the current embeddings are stale
+        domain_similarity = load_domain_similarity(
+            EMBEDDINGS_PATH, embeddings_mtime,
+            clusters_mtime if clusters_mtime >= embeddings_mtime else 0
+        )
+        if len(domain_similarity) > 1:
+            with import_timer("plotly.express"):
+                import plotly.express as px
+
+            st.subheader("🌡 Cross-Domain Similarity (embedding centroids)")
+            st.plotly_chart(
+                px.imshow(
+                    domain_similarity, text_auto=".2f", color_continuous_scale="Greens",
+                    labels={"color": "Cosine"}
+                ),
+                use_container_width=True
+            )
+
     st.markdown("---")
 
     # -----------------------------------------------------------------------------
@@ -706,16 +1192,7 @@ elif choice == "🏠 Overview":
     # -----------------------------------------------------------------------------
     st.subheader("🧠 Most Frequent Words in Sentences")
 
-    import re
-    from collections import Counter
-
-    words = []
-
-    for s in df["sentence"].astype(str):
-        cleaned = re.sub(r"[^a-zA-Z ]", "", s).lower().split()
-        words.extend(cleaned)
-
-    common_words = Counter(words).most_common(10)
+    common_words = stats["top_words"][:10]
 
     st.write("### 🔝 Top 10 Most Common Words")
     st.table(pd.DataFrame(common_words, columns=["Word", "Frequency"]))
@@ -730,11 +1207,11 @@ elif choice == "🏠 Overview":
     colA, colB = st.columns(2)
     with colA:
         st.write("### Columns in Dataset:")
-        st.write(df.columns.tolist())
+        st.write(stats["columns"])
 
     with colB:
         st.write("### Missing Values per Column:")
-        st.write(df.isna().sum())
+        st.write(pd.Series(stats["missing"], dtype="int64"))
 
     st.markdown("---")
 
@@ -746,15 +1223,15 @@ elif choice == "🏠 Overview":
     insights = []
 
     # 1) Most frequent domain
-    top_domain = domain_counts.idxmax()
-    insights.append(f"⭐ **Most frequent domain:** {top_domain}")
+    if len(domain_counts):
+        top_domain = domain_counts.idxmax()
+        insights.append(f"⭐ **Most frequent domain:** {top_domain}")
 
     # 2) Longest sentence
-    longest_sentence = df.loc[df['sentence'].str.len().idxmax()]['sentence']
-    insights.append(f"📝 **Longest sentence length:** {len(longest_sentence)} characters")
+    insights.append(f"📝 **Longest sentence length:** {stats['max_length']} characters")
 
     # 3) Dataset balance
-    if df["domain"].nunique() > 1:
+    if stats["unique_domains"] > 1:
         ratio = domain_counts.max() / domain_counts.min()
         if ratio > 3:
             insights.append("⚠️ **Dataset is imbalanced across domains.**")
@@ -777,7 +1254,8 @@ elif choice == "🏠 Overview":
 # 🧠 ENTITY & RELATION EXTRACTION
 # ----------------------------------------
 elif choice == "🧠 Entity & Relation Extraction":
-    import spacy
+    with import_timer("spacy"):
+        import spacy
 
     st.title("🧠 Entity & Relation Extraction")
     st.write("""
@@ -790,46 +1268,41 @@ elif choice == "🧠 Entity & Relation Extraction":
 
     # Try loading the spaCy model
     try:
-        nlp = spacy.load("en_core_web_sm")
+        nlp = spacy.load(NER_MODEL)
         st.success("✅ spaCy model loaded successfully!")
     except Exception as e:
         st.error("❌ spaCy model 'en_core_web_sm' is not installed.")
         st.info("Install it using: `python -m spacy download en_core_web_sm`")
         st.stop()
 
-    # Button to run NLP processing
+    # Background extraction: wait for it, then apply its cached columns without re-running spaCy
+    ner_status = precompute_status("ner")
+    if ner_status in (PENDING, RUNNING):
+        st.stop()
+    if ner_status == DONE and "entities" not in st.session_state.df.columns:
+        extracted = artifact_cache.get("ner", ner_key(st.session_state.df, nlp))
+        if extracted is not None:
+            df = st.session_state.df.copy()
+            df["entities"] = extracted["entities"]
+            df["relations"] = extracted["relations"]
+            st.session_state.df = df
+            save_dataset(df)
+
+    # Button to run NLP processing (results are cached per sentence set and model version)
     if st.button("🚀 Run Entity & Relation Extraction"):
         with st.spinner("Processing dataset... Please wait ⏳"):
             df = st.session_state.df.copy()
-
-            all_entities = []
-            all_relations = []
-
-            for sentence in df['sentence']:
-                doc = nlp(sentence)
-
-                # ---------- Named Entity Extraction ----------
-                entities = [(ent.text, ent.label_) for ent in doc.ents]
-                all_entities.append(entities)
-
-                # ---------- Relation Extraction (SVO Triples) ----------
-                triples = []
-                for token in doc:
-                    if token.dep_ == "ROOT" and token.pos_ == "VERB":  # find verb
-                        subj = [child.text for child in token.children if child.dep_ in ("nsubj", "nsubjpass")]
-                        obj = [child.text for child in token.children if child.dep_ in ("dobj", "pobj")]
-
-                        if subj and obj:
-                            triples.append((subj[0], token.lemma_, obj[0]))
-
-                all_relations.append(triples)
+            extracted = artifact_cache.get_or_compute(
+                "ner", ner_key(df, nlp), lambda: extract_entities_relations(nlp, df["sentence"])
+            )
 
             # Add results to dataframe
-            df["entities"] = all_entities
-            df["relations"] = all_relations
+            df["entities"] = extracted["entities"]
+            df["relations"] = extracted["relations"]
 
-            # Save back to session
+            # Save back to session (and the workspace)
             st.session_state.df = df
+            save_dataset(df)
 
             st.success("✅ NLP processing completed!")
             st.balloons()
@@ -863,23 +1336,103 @@ elif choice == "🌐 Knowledge Graph":
     ✔ Blue = related entities<br>
     ✔ Pink edges = strong relations<br>
     ✔ Dashed grey = normal relations<br>
+    ✔ Orange = discovered cross-domain links<br>
     """, unsafe_allow_html=True)
 
-    # Imports
-    try:
-        import networkx as nx
-        from pyvis.network import Network
-        import re
-        import spacy
-        from collections import Counter
-    except Exception as e:
-        st.error(f"Missing required libraries: {e}")
+    # ---------------------------------------------------
+    # 🔗 CROSS-DOMAIN LINK DISCOVERY
+    # ---------------------------------------------------
+    with st.expander("🔗 Cross-Domain Link Discovery"):
+        st.write(
+            "Finds the most similar sentences in *other* domains for every sentence, "
+            "using the stored embeddings (blocked, bounded-memory similarity join)."
+        )
+        if not os.path.exists(EMBEDDINGS_PATH):
+            st.info("Generate embeddings on the 🔍 Semantic Search page first.")
+        else:
+            lcol1, lcol2 = st.columns(2)
+            with lcol1:
+                link_k = st.number_input(
+                    "Links per sentence", min_value=1, max_value=50,
+                    value=DEFAULT_LINKS_PER_SENTENCE
+                )
+            with lcol2:
+                link_min_score = st.slider(
+                    "Minimum similarity", min_value=0.0, max_value=1.0,
+                    value=DEFAULT_MIN_SCORE, step=0.05
+                )
+
+            if st.button("🚀 Discover Links"):
+                try:
+                    # Keyed by the embedding store's version as well: regenerating embeddings is a new key
+                    link_key = artifact_key(
+                        session_fingerprint(df), "links",
+                        {"k": int(link_k), "min_score": float(link_min_score),
+                         "embeddings": os.path.getmtime(matrix_path(EMBEDDINGS_PATH))}
+                    )
+                    links = artifact_cache.get("links", link_key)
+                    if links is None:
+                        link_meta, link_matrix = load_embeddings(EMBEDDINGS_PATH)
+                        link_progress = st.progress(0.0)
+                        with st.spinner("Comparing sentences across domains..."):
+                            links = discover_links(
+                                link_meta, link_matrix, k=int(link_k),
+                                min_score=float(link_min_score), progress=link_progress.progress
+                            )
+                        artifact_cache.put("links", link_key, links)
+                    save_links(links, LINKS_PATH)
+                    st.success(f"✅ Found {len(links)} cross-domain links")
+                except Exception as e:
+                    st.error(f"❌ Link discovery failed: {e}")
+
+            saved_links = load_links(LINKS_PATH)
+            if not saved_links.empty:
+                st.dataframe(saved_links.head(100), use_container_width=True)
+                st.download_button(
+                    "⬇️ Download Link Table CSV",
+                    saved_links.to_csv(index=False).encode("utf-8"),
+                    "cross_domain_links.csv",
+                    mime="text/csv"
+                )
+
+    include_links = st.checkbox(
+        "➕ Add discovered cross-domain links as graph edges",
+        value=os.path.exists(LINKS_PATH)
+    )
+
+    if precompute_status("graph") in (PENDING, RUNNING):
         st.stop()
 
+    # ---------------------------------------------------
+    # ♻️ RELOAD AN EXPORTED GRAPH (no spaCy run)
+    # ---------------------------------------------------
+    with st.expander("♻️ Load Exported Graph"):
+        st.write(
+            "Shows a graph exported from 💾 Download Options: the compact `.npz` "
+            "(exact), or an edge list (`.parquet` / `.csv`; node sizes from edge counts)."
+        )
+        graph_upload = st.file_uploader("Graph file", type=["npz", "parquet", "csv", "gz"])
+        if graph_upload is not None and st.button("♻️ Load Graph"):
+            try:
+                graph_data = read_graph_upload(graph_upload)
+                with st.spinner("Rendering graph..."):
+                    html = render_graph_html(graph_data.to_networkx())
+            except ImportError as e:
+                st.error(f"Missing required libraries: {e}")
+                st.stop()
+            except (ValueError, KeyError, OSError) as e:
+                st.error(f"❌ Could not read graph file: {e}")
+                st.stop()
+            write_graph({"html": html, "graph": graph_data}, KNOWLEDGE_GRAPH_PATH, KNOWLEDGE_GRAPH_DATA_PATH)
+            st.success(f"✅ Loaded {graph_data.n_nodes} nodes and {graph_data.n_edges} edges")
+            st.rerun()
+
     # Load spaCy
     try:
-        nlp = spacy.load("en_core_web_sm")
-    except:
+        with import_timer("spacy"):
+            import spacy
+        nlp = spacy.load(NER_MODEL)
+    except Exception:
         st.error("spaCy model missing. Run: python -m spacy download en_core_web_sm")
         st.stop()
 
@@ -889,100 +1442,24 @@ elif choice == "🌐 Knowledge Graph":
     build = st.button("⚙️ Build Knowledge Graph")
 
     if build:
+        # Same dataset, links and model -> same page: serve it from the artifact cache
+        links = load_links(LINKS_PATH) if include_links else None
         with st.spinner("Generating graph..."):
-
-            G = nx.Graph()
-            freq = Counter()
-
-            # -------- SIMPLE ENTITY EXTRACTION BACKUP --------
-            def fallback_entities(text):
-                parts = re.split(r"\b(uses?|affects?|contains?|requires?|forms?|drives?)\b",
-                                 text, flags=re.IGNORECASE)
-                ents = [p.strip() for p in parts if p.strip()]
-                return ents[:2]
-
-            # ------------- PROCESS DATASET --------------------
-            for _, row in df.iterrows():
-
-                sentence = str(row["sentence"])
-
-                # spaCy NER
-                doc = nlp(sentence)
-                ents = [ent.text for ent in doc.ents]
-
-                # fallback if spaCy fails
-                if len(ents) < 2:
-                    ents = fallback_entities(sentence)
-
-                if len(ents) < 2:
-                    continue  # skip sentences with <2 entities
-
-                # use 2 entities max
-                src, dst = ents[:2]
-
-                freq[src] += 1
-                freq[dst] += 1
-
-                G.add_node(src)
-                G.add_node(dst)
-                G.add_edge(src, dst, label=row.get("label", ""))
-
-            # If graph empty
-            if len(G.nodes()) == 0:
-                st.error("❌ No entities found — cannot build graph.")
+            try:
+                artifact = graph_artifact(df, nlp, artifact_cache, links)
+            except ImportError as e:
+                st.error(f"Missing required libraries: {e}")
                 st.stop()
 
-            # ---------------------------------------------------
-            # BUILD PYVIS GRAPH
-            # ---------------------------------------------------
-            net = Network(height="750px", width="100%", bgcolor="#fff", font_color="black")
-
-            # Keep layout stable
-            net.set_options("""
-            const options = {
-              "nodes": { "borderWidth": 1 },
-              "edges": { 
-                "smooth": { "type": "continuous" } 
-              },
-              "physics": {
-                "barnesHut": {
-                  "gravitationalConstant": -2000,
-                  "centralGravity": 0.30,
-                  "springLength": 160
-                }
-              }
-            }
-            """)
-
-            # Colors
-            GREEN = "#6FD88F"
-            BLUE = "#4A86E8"
-            PINK = "#FF6AA9"
-            GRAY = "#B5B5B5"
-
-            # Add nodes
-            for node in G.nodes():
-                color = GREEN if freq[node] > 1 else BLUE
-                size = 28 if freq[node] > 1 else 18
-
-                net.add_node(node, label=node, color=color, size=size)
-
-            # Add edges
-            for src, dst, data in G.edges(data=True):
-
-                label = data.get("label", "")
-                strong_rels = ["affects", "causes", "leads", "increases", "reduces"]
-
-                if any(rel in label.lower() for rel in strong_rels):
-                    net.add_edge(src, dst, color=PINK, width=3)
-                else:
-                    net.add_edge(src, dst, color=GRAY, width=2, dashes=True)
+        # If graph empty
+        if artifact is None:
+            st.error("❌ No entities found — cannot build graph.")
+            st.stop()
 
-            # Save
-            net.save_graph(KNOWLEDGE_GRAPH_PATH)
+        write_graph(artifact, KNOWLEDGE_GRAPH_PATH, KNOWLEDGE_GRAPH_DATA_PATH)
 
-            st.success("🎉 Knowledge Graph Generated Successfully!")
-            st.rerun()
+        st.success("🎉 Knowledge Graph Generated Successfully!")
+        st.rerun()
 
     # ---------------------------------------------------
     # DISPLAY GRAPH
@@ -1009,6 +1486,9 @@ elif choice == "🔍 Semantic Search":
     # --------------------------
     # 2️⃣ Ensure embeddings exist
     # --------------------------
+    if precompute_status("embeddings") in (PENDING, RUNNING):
+        st.stop()
+
     if not os.path.exists(EMBEDDINGS_PATH):
         st.warning("⚠️ Embeddings not found. Generate them first.")
         st.info("""
@@ -1017,23 +1497,81 @@ elif choice == "🔍 Semantic Search":
         2️⃣ Click the button below
         """)
 
+        with st.expander("⚙️ Encoder Settings"):
+            enc_backend = st.selectbox(
+                "Inference backend", BACKENDS,
+                index=BACKENDS.index(ENCODER_BACKEND) if ENCODER_BACKEND in BACKENDS else 0,
+                help="ONNX backends run on ONNX Runtime; the model is exported on first use."
+            )
+            enc_storage = st.selectbox(
+                "Storage mode", STORAGE_MODES,
+                index=STORAGE_MODES.index(STORAGE_MODE) if STORAGE_MODE in STORAGE_MODES else 0,
+                help="Compressed modes search on compact codes and re-rank a shortlist exactly."
+            )
+            enc_batch_size = st.number_input(
+                "Batch size", min_value=8, max_value=1024,
+                value=DEFAULT_BATCH_SIZE, step=8
+            )
+            enc_threads = st.number_input(
+                "Torch threads (0 = library default)", min_value=0,
+                max_value=os.cpu_count() or 1, value=0, step=1
+            )
+            enc_workers = st.number_input(
+                "CPU worker processes", min_value=1,
+                max_value=os.cpu_count() or 1, value=1, step=1,
+                disabled=enc_backend != "torch"
+            )
+
+            if enc_backend != "torch" and st.button("🧪 Check Backend Parity"):
+                with st.spinner("Comparing against the PyTorch encoder..."):
+                    sample = df["sentence"].astype(str).head(256).tolist()
+                    parity = check_parity(
+                        load_encoder("torch"), load_encoder(enc_backend), sample,
+                        min_cosine=PARITY_MIN_COSINE[enc_backend]
+                    )
+                if parity["passed"]:
+                    st.success(f"✅ Parity check passed (min cosine {parity['min_cosine']:.5f})")
+                else:
+                    st.error(f"❌ Parity check failed (min cosine {parity['min_cosine']:.5f})")
+                st.json(parity)
+
         if st.button("🚀 Generate Embeddings"):
             try:
                 with st.spinner("Loading MiniLM model..."):
-                    model = SentenceTransformer("all-MiniLM-L6-v2")
+                    model = load_encoder(enc_backend)
+
+                # Codes built for the previous embeddings are stale now
+                for mode in STORAGE_MODES[1:]:
+                    if os.path.exists(compressed_path(EMBEDDINGS_PATH, mode)):
+                        os.remove(compressed_path(EMBEDDINGS_PATH, mode))
 
                 with st.spinner("Generating embeddings... This may take a minute."):
-                    embeddings = model.encode(
-                        df["sentence"].tolist(),
-                        show_progress_bar=True,
-                        convert_to_numpy=True
+                    progress_bar = st.progress(0.0)
+                    stats = encode_corpus(
+                        model,
+                        df["sentence"].astype(str).tolist(),
+                        matrix_path(EMBEDDINGS_PATH),
+                        batch_size=int(enc_batch_size),
+                        num_threads=int(enc_threads) or None,
+                        num_workers=int(enc_workers) if enc_backend == "torch" else 1,
+                        progress=progress_bar.progress
                     )
 
-                embdf = df.copy()
-                embdf["embedding"] = embeddings.tolist()
-                embdf.to_pickle(EMBEDDINGS_PATH)
+                if enc_storage != "float32":
+                    with st.spinner(f"Compressing embeddings ({enc_storage})..."):
+                        full_matrix = np.load(matrix_path(EMBEDDINGS_PATH), mmap_mode="r")
+                        CompressedIndex.build(full_matrix, enc_storage).save(
+                            compressed_path(EMBEDDINGS_PATH, enc_storage)
+                        )
+
+                save_metadata(df, EMBEDDINGS_PATH)
 
                 st.success("✅ Embeddings generated successfully!")
+                st.info(
+                    f"⚡ Encoded {stats['sentences']} sentences in {stats['seconds']:.1f}s "
+                    f"({stats['sentences_per_sec']:.0f} sentences/sec, "
+                    f"{stats['padding_waste']:.1%} padding waste)"
+                )
                 st.info("Reload the Semantic Search page.")
 
             except Exception as e:
@@ -1041,86 +1579,253 @@ elif choice == "🔍 Semantic Search":
             st.stop()
 
     # --------------------------
-    # 3️⃣ Load embeddings
+    # 3️⃣ Load search engine
     # --------------------------
+    @st.cache_resource
+    def load_search_engine(path, mtime, storage_mode):
+        return SemanticSearchEngine.from_store(
+            path, storage_mode=storage_mode, lexical_path=LEXICAL_INDEX_PATH,
+            clusters_path=CLUSTERS_PATH
+        )
+
+    # The mode chosen when the embeddings were generated (its codes file), not the env default
+    storage_mode = stored_mode(EMBEDDINGS_PATH)
     try:
-        embdf = pd.read_pickle(EMBEDDINGS_PATH)
+        engine = load_search_engine(
+            EMBEDDINGS_PATH, os.path.getmtime(EMBEDDINGS_PATH), storage_mode
+        )
     except Exception as e:
         st.error(f"❌ Could not load embeddings: {e}")
         st.stop()
 
+    embdf = engine.meta
+    stored_embeddings = engine.matrix
+    compressed_index = engine.compressed
+
     st.sidebar.success(f"📌 Embeddings loaded: {len(embdf)} sentences")
 
     # --------------------------
-    # 4️⃣ Query selection
+    # 🗜 Compressed index (optional)
     # --------------------------
-    st.write("Enter a query manually or select from frequent sentences:")
+    with st.expander("🗜 Compressed Storage"):
+        st.write(
+            f"Storage mode: **{storage_mode}** — full-precision matrix: "
+            f"{stored_embeddings.nbytes / 1e6:.1f} MB on disk"
+        )
+        if compressed_index is not None:
+            st.write(f"First-pass codes in RAM: {compressed_index.nbytes() / 1e6:.1f} MB")
+        else:
+            st.info("No compressed codes: choose a compressed storage mode when generating embeddings.")
 
-    top_sentences = embdf["sentence"].value_counts().head(3).index.tolist()
-    query_options = top_sentences + ["Manual Entry"]
+        if compressed_index is not None and st.button("📏 Measure Recall@10"):
+            with st.spinner("Comparing compressed search against exact search..."):
+                rng = np.random.default_rng(0)
+                sample_rows = rng.choice(len(stored_embeddings), min(50, len(stored_embeddings)), replace=False)
+                recall = recall_at_k(compressed_index, stored_embeddings, np.sort(sample_rows), k=10)
+            st.metric("Recall@10 vs exact search", f"{recall:.3f}")
 
-    selected_query = st.selectbox("Choose a Query:", query_options)
+    # --------------------------
+    # 🧭 Coarse-to-fine routing (optional)
+    # --------------------------
+    with st.expander("🧭 Coarse-to-Fine Routing"):
+        if engine.clusters is not None:
+            st.write(f"Cluster index ready: **{engine.clusters.n_clusters}** clusters")
+        else:
+            st.info("No cluster index yet — every query scans the full matrix.")
 
-    if selected_query == "Manual Entry":
-        final_query = st.text_input("Type your query here:").strip()
-    else:
-        final_query = selected_query.strip()
+        n_clusters = st.number_input(
+            "Number of clusters", min_value=1, max_value=max(1, len(embdf)),
+            value=min(default_n_clusters(len(embdf)), max(1, len(embdf)))
+        )
+        if st.button("🧩 Build Cluster Index"):
+            with st.spinner("Clustering embeddings (mini-batch k-means)..."):
+                cluster_index = ClusterIndex.build(
+                    embdf, stored_embeddings, int(n_clusters), fingerprint=engine.fingerprint
+                )
+                cluster_index.save(CLUSTERS_PATH)
+                engine.clusters = cluster_index
+            st.success(f"✅ Built {cluster_index.n_clusters} clusters")
 
-    st.write(f"**Current Query:** `{final_query if final_query else '(none)'}`")
+    search_mode = st.radio("Search Mode", ["Single Query", "Bulk Queries"], horizontal=True)
 
-    # --------------------------
-    # 5️⃣ Cache model
-    # --------------------------
-    @st.cache_resource
-    def load_semantic_model():
-        return SentenceTransformer("all-MiniLM-L6-v2")
+    if search_mode == "Single Query":
+        # --------------------------
+        # 4️⃣ Query selection
+        # --------------------------
+        st.write("Enter a query manually or select from frequent sentences:")
 
-    # --------------------------
-    # 6️⃣ Perform Search
-    # --------------------------
-    if st.button("🔍 Search"):
-        if not final_query:
-            st.warning("⚠️ Please enter a query.")
-            st.stop()
+        dataset_df = st.session_state.get("df")
+        if dataset_df is not None and "sentence" in dataset_df.columns:
+            top_sentences = sentence_frequencies(dataset_df).top(3, dataset_df["sentence"])["sentence"].tolist()
+        else:
+            top_sentences = embdf["sentence"].value_counts().head(3).index.tolist()
+        query_options = top_sentences + ["Manual Entry"]
 
-        try:
-            st.subheader(f"🔎 Top 3 Semantic Matches for: '{final_query}'")
-
-            model = load_semantic_model()
-
-            # Encode query (⚠ FIXED: no .astype)
-            query_embedding = model.encode(
-                final_query,
-                convert_to_tensor=True
-            ).float()
-
-            # Convert stored embeddings into tensor
-            stored_embeddings = np.array(embdf["embedding"].tolist(), dtype=np.float32)
-            embeddings_tensor = torch.tensor(stored_embeddings, dtype=torch.float32)
-
-            # Cosine similarity
-            similarity_scores = util.cos_sim(query_embedding, embeddings_tensor)
-            top_results = similarity_scores[0].topk(3)
-
-            # -------------------------------
-            # Display search results
-            # -------------------------------
-            for idx, score in zip(top_results.indices, top_results.values):
-                row = embdf.iloc[int(idx)]
-
-                st.markdown(f"""
-                <div style="background:#b7e4c7;border-radius:8px;padding:12px;margin-bottom:10px;">
-                    ✅ <b style="color:#2d6a4f;">Domain:</b> {row['domain']}<br>
-                    💬 <b style="color:#2d6a4f;">Sentence:</b> {row['sentence']}<br>
-                    🏷 <b style="color:#2d6a4f;">Label:</b> {row['label']}<br>
-                    📈 <b style="color:#ffbe0b;">Similarity Score:</b>
-                        <span style="color:#3c096c;font-weight:bold;">{float(score):.4f}</span>
-                </div>
-                """, unsafe_allow_html=True)
+        selected_query = st.selectbox("Choose a Query:", query_options)
 
-        except Exception as e:
-            st.error(f"❌ Error during search: {e}")
-            st.info("Try deleting embeddings.pkl and regenerate again.")
+        if selected_query == "Manual Entry":
+            final_query = st.text_input("Type your query here:").strip()
+        else:
+            final_query = selected_query.strip()
+
+        st.write(f"**Current Query:** `{final_query if final_query else '(none)'}`")
+
+        retrieval_labels = {
+            "dense": "🧠 Embeddings only",
+            "hybrid": "🔀 Hybrid (BM25 + embeddings, rank fusion)",
+            "prefilter": "⚡ BM25 prefilter + embedding re-rank",
+        }
+        retrieval_method = st.radio(
+            "Retrieval Method", list(retrieval_labels),
+            format_func=retrieval_labels.get, horizontal=True,
+            help="Hybrid modes help exact-term queries such as acronyms and chemical names."
+        )
+
+        # Domain / label filters (scored on the matching partitions only)
+        domain_keys = engine.partitions["domain"].keys if "domain" in engine.partitions else []
+        label_keys = engine.partitions["label"].keys if "label" in engine.partitions else []
+
+        fcol1, fcol2 = st.columns(2)
+        with fcol1:
+            filter_domains = st.multiselect("Restrict to Domains", domain_keys)
+        with fcol2:
+            filter_labels = st.multiselect("Restrict to Labels", label_keys)
+
+        nprobe = 0
+        if engine.clusters is not None:
+            nprobe = st.slider(
+                "Clusters to probe (0 = exhaustive search)", min_value=0,
+                max_value=engine.clusters.n_clusters,
+                value=min(DEFAULT_NPROBE, engine.clusters.n_clusters)
+            )
+
+        cross_domain = st.checkbox("🌍 Cross-domain mode — best match from each other domain")
+        exclude_domain = None
+        if cross_domain:
+            own_domain = embdf.loc[embdf["sentence"] == final_query, "domain"].astype(str)
+            domain_options = ["(none)"] + domain_keys
+            exclude_domain = st.selectbox(
+                "Query's own domain (excluded)", domain_options,
+                index=domain_options.index(own_domain.iloc[0]) if len(own_domain) else 0
+            )
+            exclude_domain = None if exclude_domain == "(none)" else exclude_domain
+
+        # --------------------------
+        # 5️⃣ Perform Search
+        # --------------------------
+        user_prefs = (st.session_state.user_data or {}).get("preferences", {})
+        results_per_page = int(user_prefs.get("results_per_page", 10))
+
+        def render_result(row, score_label="Similarity Score"):
+            st.markdown(f"""
+            <div style="background:#b7e4c7;border-radius:8px;padding:12px;margin-bottom:10px;">
+                ✅ <b style="color:#2d6a4f;">Domain:</b> {row['domain']}<br>
+                💬 <b style="color:#2d6a4f;">Sentence:</b> {row['sentence']}<br>
+                🏷 <b style="color:#2d6a4f;">Label:</b> {row['label']}<br>
+                📈 <b style="color:#ffbe0b;">{score_label}:</b>
+                    <span style="color:#3c096c;font-weight:bold;">{float(row['score']):.4f}</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+        if st.button("🔍 Search"):
+            if not final_query:
+                st.warning("⚠️ Please enter a query.")
+                st.stop()
+
+            try:
+                # Shared encoder behind the query embedding LRU cache
+                engine.encoder = shared_query_cache(ENCODER_BACKEND, QUERY_CACHE_SIZE)
+
+                if cross_domain:
+                    st.session_state.search_cursor = None
+                    st.subheader(f"🌍 Best Match per Domain for: '{final_query}'")
+                    results = engine.cross_domain_search(final_query, exclude_domain=exclude_domain)
+                    if results.empty:
+                        st.info("No other domains to match against.")
+                    for _, row in results.iterrows():
+                        render_result(row)
+                else:
+                    # New query session: encode once, buffer the top results
+                    st.session_state.search_cursor = ResultCursor(
+                        engine, final_query, page_size=results_per_page,
+                        method=retrieval_method, domains=filter_domains,
+                        labels=filter_labels, nprobe=nprobe
+                    )
+                    st.session_state.search_page = 0
+
+            except Exception as e:
+                st.error(f"❌ Error during search: {e}")
+                st.info("Try deleting embeddings.pkl and regenerate again.")
+
+        # -------------------------------
+        # Display the current results page
+        # -------------------------------
+        cursor = st.session_state.get("search_cursor")
+        if cursor is not None and cursor.engine is engine:
+            page_no = st.session_state.get("search_page", 0)
+            page_results = cursor.page(page_no)
+
+            st.subheader(f"🔎 Semantic Matches for: '{cursor.query}' — page {page_no + 1}")
+            if page_results.empty:
+                st.info("No matches in the selected domains/labels.")
+            # Hybrid results are ranked by reciprocal rank fusion, not by cosine similarity
+            score_label = "Fusion Score (RRF)" if cursor.search_kwargs.get("method") == "hybrid" \
+                else "Similarity Score"
+            for _, row in page_results.iterrows():
+                render_result(row, score_label)
+
+            if not page_results.empty:
+                st.caption(
+                    f"Results {int(page_results['rank'].min())}–{int(page_results['rank'].max())} "
+                    f"· {cursor.buffered} buffered · {cursor.scans} corpus scan(s) this session"
+                )
+
+            nav_prev, nav_next = st.columns(2)
+            with nav_prev:
+                if st.button("⬅️ Previous Page", disabled=page_no == 0):
+                    st.session_state.search_page = page_no - 1
+                    st.rerun()
+            with nav_next:
+                if st.button("Next Page ➡️", disabled=not cursor.has_page(page_no + 1)):
+                    st.session_state.search_page = page_no + 1
+                    st.rerun()
+
+    else:
+        # --------------------------
+        # 📚 Bulk query mode
+        # --------------------------
+        st.write("Paste one query per line or upload a TXT/CSV file of queries.")
+
+        bulk_text = st.text_area("Queries (one per line)", height=150)
+        bulk_file = st.file_uploader(
+            "...or upload queries", type=["txt", "csv"],
+            help="CSV files use a 'query' column if present, otherwise the first column."
+        )
+        bulk_k = st.number_input("Results per query (top-k)", min_value=1, max_value=100, value=10)
+
+        if st.button("🚀 Run Bulk Search"):
+            queries = read_queries(bulk_file) if bulk_file is not None else [
+                q.strip() for q in bulk_text.splitlines() if q.strip()
+            ]
+            if not queries:
+                st.warning("⚠️ Please enter or upload at least one query.")
+                st.stop()
+
+            try:
+                with st.spinner(f"Searching {len(queries)} queries..."):
+                    engine.encoder = shared_query_cache(ENCODER_BACKEND, QUERY_CACHE_SIZE)
+                    bulk_results = engine.search_batch(queries, k=int(bulk_k))
+
+                st.success(f"✅ {len(queries)} queries answered ({len(bulk_results)} result rows)")
+                st.dataframe(bulk_results, use_container_width=True)
+                st.download_button(
+                    "⬇️ Download Results CSV",
+                    bulk_results.to_csv(index=False).encode("utf-8"),
+                    "bulk_search_results.csv",
+                    mime="text/csv"
+                )
+            except Exception as e:
+                st.error(f"❌ Error during bulk search: {e}")
 
 # ----------------------------------------
 # 🧩 TOP 10 SENTENCES
@@ -1138,8 +1843,31 @@ elif choice == "🧩 Top 10 Sentences":
         st.error("❌ The loaded dataset has no 'sentence' column.")
         st.stop()
 
-    # Compute top 10 most frequent sentences
-    top_objects = df["sentence"].astype(str).value_counts().head(10)
+    approximate = st.checkbox(
+        "⚡ Approximate counts (Space-Saving sketch)",
+        value=len(df) > APPROX_STATS_ROWS,
+        help="Served from the sketch built at ingest; counts are upper bounds."
+    )
+
+    # Top 10 most frequent sentences (case / whitespace variants counted together)
+    if approximate:
+        top_table = dataset_sketch(df).top["sentence"].top(10)
+        top_objects = pd.Series(
+            [f"{c}" if c == m else f"≤ {c} (≥ {m})" for c, m in zip(top_table["count"], top_table["min_count"])],
+            index=top_table["value"]
+        )
+    else:
+        frequencies = sentence_frequencies(df)
+        domain_choice = st.selectbox("Domain", ["All domains"] + frequencies.domains)
+        if domain_choice == "All domains":
+            top_table = frequencies.top(10, df["sentence"])
+        else:
+            top_table = frequencies.top_by_domain(domain_choice, 10, df["sentence"])
+        top_objects = pd.Series(top_table["count"].values, index=top_table["sentence"].values)
+
+        lookup = st.text_input("🔎 How many times does a sentence appear?")
+        if lookup.strip():
+            st.info(f"Appears **{frequencies.count(lookup)}** time(s) (ignoring case and extra whitespace).")
 
     st.subheader("📋 Top Sentences List")
     for i, (sentence, count) in enumerate(top_objects.items(), start=1):
@@ -1164,23 +1892,29 @@ elif choice == "💬 Feedback Section":
     st.header("💬 Feedback Section")
 
     # ------------------------------------------
-    # 1️⃣ Initialize feedback storage
+    # 1️⃣ Duplicate-submission guard
     # ------------------------------------------
-    if "feedback_df" not in st.session_state:
-        st.session_state.feedback_df = pd.DataFrame(
-            columns=["feedback_id", "record_id", "user", "feedback_type",
-                     "comment", "status", "timestamp"]
-        )
-
     if "last_feedback_hash" not in st.session_state:
         st.session_state.last_feedback_hash = None
 
-    feedback_df = st.session_state.feedback_df
-
     # ------------------------------------------
-    # 2️⃣ Display feedback table
+    # 2️⃣ Display recent feedback (indexed filters, newest first)
     # ------------------------------------------
-    st.dataframe(feedback_df, use_container_width=True)
+    f1, f2, f3 = st.columns(3)
+    filter_record = f1.text_input("Filter by Record ID").strip()
+    filter_user = f2.text_input("Filter by User").strip()
+    filter_status = f3.selectbox("Filter by Status", ["All"] + FEEDBACK_STATUSES)
+
+    st.dataframe(
+        feedback_store.query(
+            record_id=filter_record or None,
+            user=filter_user or None,
+            status=None if filter_status == "All" else filter_status,
+            limit=200
+        ),
+        use_container_width=True
+    )
+    st.caption(f"Showing up to 200 of {feedback_store.total():,} feedback entries.")
 
     st.markdown("---")
     st.subheader("✍️ Submit Feedback")
@@ -1209,8 +1943,7 @@ elif choice == "💬 Feedback Section":
     )
 
     user = st.session_state.get("username", "guest")
-    feedback_type = st.selectbox("Feedback Type",
-                                 ["Error", "Suggestion", "Improvement", "Other"])
+    feedback_type = st.selectbox("Feedback Type", FEEDBACK_TYPES)
     comment = st.text_area("Enter your feedback")
 
     # ------------------------------------------
@@ -1233,23 +1966,17 @@ elif choice == "💬 Feedback Section":
             st.info("ℹ️ Feedback already submitted. Not adding again.")
             st.stop()
 
-        # Assign next feedback_id
-        next_id = 1 if feedback_df.empty else int(feedback_df["feedback_id"].max()) + 1
-
-        new_entry = {
-            "feedback_id": next_id,
-            "record_id": record_id,
-            "user": user,
-            "feedback_type": feedback_type,
-            "comment": comment,
-            "status": "Pending",
-            "timestamp": pd.Timestamp.now()
-        }
-
-        # Save feedback
-        st.session_state.feedback_df = pd.concat(
-            [feedback_df, pd.DataFrame([new_entry])],
-            ignore_index=True
+        # Save feedback (single indexed insert; the store assigns feedback_id
+        # and rolls the event into the hourly / daily buckets)
+        domain = record_index(df).lookup(df, record_id, "domain") if "domain" in df.columns else ""
+        feedback_store.add(
+            record_id=record_id,
+            user=user,
+            feedback_type=feedback_type,
+            comment=comment,
+            status="Pending",
+            timestamp=pd.Timestamp.now(),
+            domain=domain
         )
 
         # Save hash to avoid duplicate submission after rerun
@@ -1268,13 +1995,87 @@ elif choice == "📈 Feedback Analysis":
         st.stop()
 
     st.header("📈 Feedback Analysis")
-    if not feedback_df.empty:
-        st.subheader("🧩 Feedback Type Distribution")
-        st.bar_chart(feedback_df['feedback_type'].value_counts())
-        st.subheader("🕒 Feedback Status Overview")
-        st.bar_chart(feedback_df['status'].value_counts())
-    else:
+    if not feedback_store.total():
         st.info("No feedback available yet.")
+        st.stop()
+
+    # ------------------------------------------
+    # 1️⃣ Time range (all charts read the maintained rollups, not the events)
+    # ------------------------------------------
+    today = datetime.date.today()
+    r1, r2, r3 = st.columns(3)
+    start_date = r1.date_input("From", today - datetime.timedelta(days=30))
+    end_date = r2.date_input("To", today)
+    granularity = r3.selectbox("Granularity", list(GRANULARITIES), index=1)
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+
+    over_time = feedback_store.rollup(start, end, granularity, by=["bucket", "feedback_type"])
+    if over_time.empty:
+        st.info("No feedback in the selected range.")
+        st.stop()
+
+    st.metric("Feedback in range", f"{int(over_time['count'].sum()):,}")
+    st.subheader("🕒 Feedback Over Time")
+    series = over_time.pivot_table(index="bucket", columns="feedback_type", values="count", aggfunc="sum", fill_value=0)
+    series.index = pd.to_datetime(series.index)
+    st.bar_chart(series)
+
+    # ------------------------------------------
+    # 2️⃣ Breakdowns
+    # ------------------------------------------
+    def breakdown(dimension, top=None):
+        table = feedback_store.rollup(start, end, granularity, by=[dimension])
+        table = table.sort_values("count", ascending=False)
+        if top:
+            table = table.head(top)
+        return table.set_index(dimension)["count"]
+
+    b1, b2 = st.columns(2)
+    with b1:
+        st.subheader("🧩 By Type")
+        st.bar_chart(breakdown("feedback_type"))
+        st.subheader("🌍 By Domain")
+        st.bar_chart(breakdown("domain").rename(index={"": "(unknown)"}))
+    with b2:
+        st.subheader("📌 By Status")
+        st.bar_chart(breakdown("status"))
+        st.subheader("👤 Top Users")
+        st.bar_chart(breakdown("user", top=10))
+
+    # ------------------------------------------
+    # 3️⃣ Moderation queue (events joined to dataset rows via the ID index)
+    # ------------------------------------------
+    st.markdown("---")
+    st.subheader("🛡 Moderation")
+    m1, m2 = st.columns(2)
+    mod_status = m1.selectbox("Status", FEEDBACK_STATUSES, key="mod_status")
+    mod_limit = m2.number_input("Rows", min_value=10, max_value=500, value=50, step=10)
+    queue = feedback_store.query(status=mod_status, start=start, end=end, limit=int(mod_limit))
+
+    df = st.session_state.get("df")
+    if df is not None and "id" in df.columns and not queue.empty:
+        context_columns = [c for c in ["sentence", "domain", "label"] if c in df.columns]
+        queue = record_index(df).join(
+            queue.drop(columns=[c for c in context_columns if c in queue.columns]), df, context_columns
+        )
+
+    # Result of the last bulk update (shown after the rerun that refreshes the queue)
+    moderation_message = st.session_state.pop("moderation_message", None)
+    if moderation_message:
+        st.success(moderation_message)
+
+    if queue.empty:
+        st.info(f"No '{mod_status}' feedback in the selected range.")
+    else:
+        st.dataframe(queue, use_container_width=True)
+        u1, u2, u3 = st.columns([2, 2, 1])
+        selected = u1.multiselect("Feedback IDs", queue["feedback_id"].tolist())
+        new_status = u2.selectbox("Set status to", FEEDBACK_STATUSES, key="mod_new_status")
+        if u3.button("✅ Apply") and selected:
+            changed = sum(feedback_store.set_status(int(fid), new_status) for fid in selected)
+            st.session_state.moderation_message = f"Updated {changed} feedback entr{'y' if changed == 1 else 'ies'}."
+            st.rerun()
 
 # # ----------------------------------------
 # 🛠 ADMIN TOOLS (ADMIN ONLY)
@@ -1287,6 +2088,74 @@ elif choice == "🛠 Admin Tools":
 
     st.header("🛠 Admin Tools")
 
+    # ⚡ Query embedding cache statistics
+    with st.expander("⚡ Query Embedding Cache", expanded=False):
+        if is_warm(ENCODER_BACKEND):
+            query_cache = shared_query_cache(ENCODER_BACKEND, QUERY_CACHE_SIZE)
+            cache_stats = query_cache.stats()
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Hits", cache_stats["hits"])
+            c2.metric("Misses", cache_stats["misses"])
+            c3.metric("Hit Rate", f"{cache_stats['hit_rate']:.1%}")
+            c4.metric("Entries", f"{cache_stats['size']} / {cache_stats['max_size']}")
+            if st.button("🧹 Clear Query Cache"):
+                query_cache.clear()
+                st.rerun()
+        elif warm_up_error(ENCODER_BACKEND):
+            st.error(f"Encoder ({ENCODER_BACKEND}) warm-up failed: {warm_up_error(ENCODER_BACKEND)}")
+        else:
+            st.info(f"Encoder ({ENCODER_BACKEND}) is still warming up.")
+
+    # ⏱ Cold import cost of the heavy dependencies loaded so far
+    with st.expander("⏱ Startup Import Timing", expanded=False):
+        st.caption("First (cold) import of each module in this server process.")
+        st.dataframe(
+            pd.DataFrame(
+                [{"module": name, "seconds": round(seconds, 3)} for name, seconds in IMPORT_TIMINGS.items()]
+            ).sort_values("seconds", ascending=False),
+            use_container_width=True
+        )
+
+    # 🗃 Derived-artifact cache of this workspace
+    with st.expander("🗃 Artifact Cache", expanded=False):
+        memory = artifact_cache.memory_usage()
+        st.caption(
+            f"Memory tier: {memory['entries']} artifact(s), {memory['bytes'] / 2**20:,.1f} of "
+            f"{memory['max_bytes'] / 2**20:,.0f} MB · disk tier limit {ARTIFACT_CACHE_MB:,} MB"
+        )
+        st.dataframe(
+            pd.DataFrame(artifact_cache.metrics(), columns=[
+                "stage", "memory_hits", "disk_hits", "misses", "writes", "evictions",
+                "hit_rate", "disk_files", "disk_bytes"
+            ]),
+            use_container_width=True, hide_index=True
+        )
+        if st.button("🧹 Clear Artifact Cache"):
+            artifact_cache.clear()
+            st.rerun()
+
+    # 💽 Disk use of every workspace (deduplicated copies are counted in each)
+    with st.expander("💽 Workspaces", expanded=False):
+        rows = []
+        for ws_user, ws_project in list_workspaces(WORKSPACES_DIR):
+            usage = Workspace(WORKSPACES_DIR, ws_user, ws_project).usage()
+            rows.append({"user": ws_user, "project": ws_project, "files": usage["files"],
+                         "MB": round(usage["bytes"] / 2**20, 1),
+                         "shared MB": round(usage["shared_bytes"] / 2**20, 1)})
+        st.dataframe(pd.DataFrame(rows, columns=["user", "project", "files", "MB", "shared MB"]),
+                     use_container_width=True, hide_index=True)
+        st.caption(f"Quota per workspace: {WORKSPACE_QUOTA_MB:,} MB (KNOWMAP_WORKSPACE_QUOTA_MB).")
+        st.subheader("Current workspace artifacts")
+        st.dataframe(
+            pd.DataFrame(
+                [{"artifact": a["artifact"], "MB": round(a["bytes"] / 2**20, 2),
+                  "last used": datetime.datetime.fromtimestamp(a["last_access"]).isoformat(timespec="seconds"),
+                  "pinned": a["pinned"]} for a in workspace.artifacts()],
+                columns=["artifact", "MB", "last used", "pinned"]
+            ),
+            use_container_width=True, hide_index=True
+        )
+
     # 2️⃣ Dataset availability check
     df = st.session_state.get("df", None)
     if df is None:
@@ -1299,7 +2168,147 @@ elif choice == "🛠 Admin Tools":
         st.error(f"❌ Dataset is missing required column(s): {', '.join(missing_cols)}")
         st.stop()
 
-    # 4️⃣ Admin tools layout
+    # Every merge / delete goes through the bulk engine and is recorded here
+    if "undo_log" not in st.session_state:
+        st.session_state.undo_log = UndoLog()
+    undo_log = st.session_state.undo_log
+
+    def commit_change(new_df, diff, undo_entry):
+        """Store the edited dataset, record the undo entry and keep the diff for display"""
+        st.session_state.df = new_df
+        save_dataset(new_df)
+        undo_log.push(undo_entry, st.session_state.username)
+        st.session_state.last_admin_diff = (undo_entry["summary"], diff)
+
+    last_diff = st.session_state.pop("last_admin_diff", None)
+    if last_diff:
+        st.success(f"✅ {last_diff[0]}")
+        if last_diff[1] is not None:
+            with st.expander("🧾 Change summary", expanded=True):
+                st.dataframe(last_diff[1], use_container_width=True, hide_index=True)
+
+    # 4️⃣ Near-duplicate finder (MinHash-LSH, optional embedding neighbours)
+    st.subheader("🧬 Near-Duplicate Sentences")
+    st.caption(
+        "Finds clusters of near-identical sentences without comparing all pairs. "
+        "Approve clusters to merge every member into its canonical sentence."
+    )
+
+    sentence_fingerprint = columns_fingerprint(df, ["sentence"])
+    dup_col1, dup_col2 = st.columns(2)
+    with dup_col1:
+        dup_threshold = st.slider(
+            "Min. shingle similarity (Jaccard)", 0.5, 1.0, DEFAULT_JACCARD, 0.05, key="dup_threshold"
+        )
+    with dup_col2:
+        use_embeddings = st.checkbox(
+            "Also use embedding neighbours",
+            value=False,
+            disabled=not os.path.exists(EMBEDDINGS_PATH),
+            help="Joins paraphrases with high cosine similarity (needs generated embeddings)."
+        )
+        dup_min_cosine = st.slider(
+            "Min. embedding similarity (cosine)", 0.8, 1.0, DEFAULT_COSINE, 0.01,
+            key="dup_min_cosine", disabled=not use_embeddings
+        )
+
+    if st.button("🔎 Find Near-Duplicates"):
+        dup_start = datetime.datetime.now()
+        dup_params = {"threshold": dup_threshold}
+        if use_embeddings:
+            dup_params.update(min_cosine=dup_min_cosine,
+                              embeddings=os.path.getmtime(matrix_path(EMBEDDINGS_PATH)))
+        dup_key = artifact_key(sentence_fingerprint, "near_duplicates", dup_params)
+        clusters = artifact_cache.get("near_duplicates", dup_key)
+        if clusters is None:
+            dup_progress = st.progress(0.0)
+            dup_matrix, dup_matrix_sentences = None, None
+            if use_embeddings:
+                dup_meta, dup_matrix = load_embeddings(EMBEDDINGS_PATH)
+                dup_matrix_sentences = dup_meta["sentence"]
+            clusters = artifact_cache.put("near_duplicates", dup_key, find_near_duplicates(
+                df["sentence"], threshold=dup_threshold,
+                matrix=dup_matrix, matrix_sentences=dup_matrix_sentences,
+                min_cosine=dup_min_cosine, progress=dup_progress.progress
+            ))
+        st.session_state.near_duplicates = {
+            "fingerprint": sentence_fingerprint,
+            "clusters": clusters,
+            "seconds": (datetime.datetime.now() - dup_start).total_seconds(),
+        }
+
+    near_duplicates = st.session_state.get("near_duplicates")
+    if near_duplicates and near_duplicates["fingerprint"] != sentence_fingerprint:
+        st.info("ℹ️ The dataset changed since the last scan. Run the finder again.")
+    elif near_duplicates:
+        duplicates = near_duplicates["clusters"]
+        if duplicates.empty:
+            st.success("✅ No near-duplicate sentences found.")
+        else:
+            summary = cluster_summary(duplicates)
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Clusters", len(summary))
+            m2.metric("Distinct Sentences", len(duplicates))
+            m3.metric("Rows Affected", int(summary["rows"].sum()))
+            m4.metric("Scan Time", f"{near_duplicates['seconds']:.1f}s")
+
+            approve_all = st.checkbox("Approve all clusters", value=False, key="dup_approve_all")
+            edited = st.data_editor(
+                summary.assign(approve=approve_all)[
+                    ["approve", "cluster", "canonical", "members", "rows", "min_jaccard"]
+                ],
+                disabled=["cluster", "members", "rows", "min_jaccard"],
+                hide_index=True,
+                use_container_width=True,
+                key=f"dup_editor_{approve_all}"
+            )
+            with st.expander("🔍 Cluster members", expanded=False):
+                st.dataframe(duplicates, use_container_width=True, hide_index=True)
+
+            approved = edited[edited["approve"]]
+            if st.button(f"✅ Merge {len(approved)} Approved Cluster(s)", disabled=approved.empty):
+                mapping = merge_mapping(duplicates, dict(zip(approved["cluster"], approved["canonical"])))
+                commit_change(*merge_sentences(df, mapping))
+                del st.session_state["near_duplicates"]
+                st.rerun()
+
+    st.markdown("---")
+
+    # 5️⃣ Searchable pickers: only one page of matches is sent to the browser
+    @st.cache_resource(max_entries=4)
+    def load_value_index(column, fingerprint, _values):
+        return ValueIndex(_values)
+
+    def record_picker(label, index, key):
+        """Prefix / substring search box plus a selectbox holding one page of matches"""
+        q_col, mode_col = st.columns([3, 1])
+        query = q_col.text_input(f"Search {label.lower()}", key=f"{key}_query")
+        mode = mode_col.selectbox("Match", SEARCH_MODES, key=f"{key}_mode")
+
+        # Back to the first page whenever the search changes
+        if st.session_state.get(f"{key}_last") != (query, mode):
+            st.session_state[f"{key}_last"] = (query, mode)
+            st.session_state[f"{key}_page"] = 0
+        page = st.session_state.get(f"{key}_page", 0)
+
+        options, total = index.search(query, mode, page, PICKER_PAGE_SIZE)
+        if not options:
+            st.caption("No matches.")
+            return None
+        selected = st.selectbox(label, options, key=key)
+
+        n_pages = -(-total // PICKER_PAGE_SIZE)
+        prev_col, info_col, next_col = st.columns([1, 2, 1])
+        if prev_col.button("◀", key=f"{key}_prev", disabled=page == 0):
+            st.session_state[f"{key}_page"] = page - 1
+            st.rerun()
+        info_col.caption(f"Page {page + 1} of {n_pages} ({total:,} matches)")
+        if next_col.button("▶", key=f"{key}_next", disabled=page + 1 >= n_pages):
+            st.session_state[f"{key}_page"] = page + 1
+            st.rerun()
+        return selected
+
+    # 6️⃣ Admin tools layout
     col1, col2 = st.columns(2)
 
     # --------------------------------------
@@ -1308,22 +2317,21 @@ elif choice == "🛠 Admin Tools":
     with col1:
         st.subheader("🔁 Merge Sentences")
 
-        all_sentences = sorted(df["sentence"].astype(str).unique().tolist())
+        sentence_index = load_value_index("sentence", sentence_fingerprint, df["sentence"])
 
-        if not all_sentences:
+        if not len(sentence_index):
             st.info("No sentences available to merge.")
         else:
-            old_sentence = st.selectbox("Sentence to replace", all_sentences, key="merge_old")
-            new_sentence = st.selectbox("Replace with", all_sentences, key="merge_new")
+            old_sentence = record_picker("Sentence to replace", sentence_index, "merge_old")
+            new_sentence = record_picker("Replace with", sentence_index, "merge_new")
 
-            if st.button("✅ Merge Sentences"):
+            if st.button("✅ Merge Sentences", disabled=old_sentence is None or new_sentence is None):
                 if old_sentence == new_sentence:
                     st.warning("⚠️ Old and new sentences are the same. Nothing to merge.")
                 else:
                     # Only update the 'sentence' column
-                    df["sentence"] = df["sentence"].replace({old_sentence: new_sentence})
-                    st.session_state.df = df
-                    st.success(f"✅ Merged all occurrences of:\n\n**{old_sentence}**\n\nto:\n\n**{new_sentence}**")
+                    commit_change(*merge_sentences(df, {old_sentence: new_sentence}))
+                    st.rerun()
 
     # --------------------------------------
     # 🗑 B) Delete Record by ID
@@ -1331,21 +2339,74 @@ elif choice == "🛠 Admin Tools":
     with col2:
         st.subheader("🗑 Delete Record")
 
-        unique_ids = sorted(df["id"].unique().tolist())
-        if not unique_ids:
+        id_index = load_value_index("id", columns_fingerprint(df, ["id"]), df["id"])
+        if not len(id_index):
             st.info("No records available to delete.")
         else:
-            record_id = st.selectbox("Select Record ID to delete", unique_ids, key="delete_id")
+            record_id = record_picker("Select Record ID to delete", id_index, "delete_id")
+
+            if record_id is not None:
+                # Show a preview of the record
+                record_preview = df[df["id"] == record_id]
+                st.markdown("**Record Preview:**")
+                st.dataframe(record_preview, use_container_width=True)
 
-            # Show a preview of the record
-            record_preview = df[df["id"] == record_id]
-            st.markdown("**Record Preview:**")
-            st.dataframe(record_preview, use_container_width=True)
+                if st.button("🚨 Confirm Delete"):
+                    commit_change(*delete_records(df, [record_id]))
+                    st.rerun()
+
+    st.markdown("---")
 
-            if st.button("🚨 Confirm Delete"):
-                df = df[df["id"] != record_id].reset_index(drop=True)
-                st.session_state.df = df
-                st.success(f"✅ Deleted record with ID: {record_id}")
+    # --------------------------------------
+    # 📦 C) Bulk operations from files
+    # --------------------------------------
+    st.subheader("📦 Bulk Operations")
+    bulk_col1, bulk_col2 = st.columns(2)
+
+    with bulk_col1:
+        st.markdown("**Merge mapping** (CSV with `old,new` columns)")
+        mapping_file = st.file_uploader("Upload merge mapping", type=["csv"], key="bulk_merge_file")
+        if mapping_file is not None:
+            try:
+                merge_table = read_merge_mapping(mapping_file)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                merge_table = None
+            if merge_table is not None:
+                st.caption(f"{len(merge_table):,} mapping(s) after resolving chains.")
+                st.dataframe(merge_table.head(20), use_container_width=True, hide_index=True)
+                if st.button("✅ Apply Merge Mapping", disabled=merge_table.empty):
+                    commit_change(*merge_sentences(df, dict(zip(merge_table["old"], merge_table["new"]))))
+                    st.rerun()
+
+    with bulk_col2:
+        st.markdown("**IDs to delete** (CSV with an `id` column, or TXT with one ID per line)")
+        ids_file = st.file_uploader("Upload ID list", type=["csv", "txt"], key="bulk_delete_file")
+        if ids_file is not None:
+            delete_ids = read_id_list(ids_file)
+            st.caption(f"{len(delete_ids):,} distinct ID(s) in file.")
+            if st.button("🚨 Delete Listed Records", disabled=not delete_ids):
+                commit_change(*delete_records(df, delete_ids))
+                st.rerun()
+
+    # --------------------------------------
+    # ↩️ D) Undo log
+    # --------------------------------------
+    st.subheader("↩️ Undo Log")
+    if not len(undo_log):
+        st.info("No changes recorded in this session.")
+    else:
+        st.dataframe(undo_log.history(), use_container_width=True, hide_index=True)
+        if st.button("↩️ Undo Last Operation"):
+            entry = undo_log.entries[-1]
+            try:
+                st.session_state.df = undo_operation(df, entry)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                save_dataset(st.session_state.df)
+                undo_log.pop()
+                st.session_state.last_admin_diff = (f"Undid: {entry['summary']}", None)
                 st.rerun()
 
 # ----------------------------------------
@@ -1357,41 +2418,53 @@ elif choice == "👥 User Management":
         st.stop()
     
     st.header("👥 User Management")
-    users = load_users()
-    
+    user_store = get_user_store()
+
+    # ------------------------------------------
+    # 1️⃣ Paginated listing (username prefix search, one page per rerun)
+    # ------------------------------------------
     st.subheader("📋 Registered Users")
-    if users:
+    u1, u2 = st.columns([3, 1])
+    user_search = u1.text_input("Search username (prefix)").strip()
+    total_users = user_store.count(user_search)
+    n_pages = max(1, -(-total_users // USERS_PAGE_SIZE))
+    user_page = u2.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1) - 1
+    page_users = user_store.page(user_search, int(user_page))
+
+    if page_users:
         users_df = pd.DataFrame([
             {
-                "Username": username,
+                "Username": data["username"],
                 "Email": data.get("email", ""),
                 "Role": data.get("role", ""),
                 "Created At": data.get("created_at", ""),
                 "Saved Graphs": len(data.get("saved_graphs", []))
             }
-            for username, data in users.items()
+            for data in page_users
         ])
         st.dataframe(users_df, use_container_width=True)
+        st.caption(f"Page {user_page + 1} of {n_pages} · {total_users:,} matching user(s)")
     else:
         st.info("No users found.")
-    
+
+    # ------------------------------------------
+    # 2️⃣ Single-record actions
+    # ------------------------------------------
     st.subheader("🔧 User Actions")
-    if users:
-        selected_user = st.selectbox("Select User", list(users.keys()))
-        
+    if page_users:
+        selected_user = st.selectbox("Select User", [data["username"] for data in page_users])
+
         col1, col2 = st.columns(2)
         with col1:
-            new_role = st.selectbox("Change Role", ["student", "researcher", "admin"])
+            new_role = st.selectbox("Change Role", USER_ROLES)
             if st.button("Update Role"):
-                users[selected_user]["role"] = new_role
-                save_users(users)
+                user_store.update(selected_user, role=new_role)
                 st.success(f"✅ Updated {selected_user}'s role to {new_role}")
-        
+
         with col2:
             if st.button("🗑 Delete User"):
                 if selected_user != st.session_state.username:
-                    del users[selected_user]
-                    save_users(users)
+                    user_store.delete(selected_user)
                     st.success(f"✅ Deleted user: {selected_user}")
                 else:
                     st.error("❌ Cannot delete your own account")
@@ -1402,50 +2475,89 @@ elif choice == "👥 User Management":
 elif choice == "💾 Download Options":
     st.header("💾 Download Data Files")
 
+    # Exports are written (chunked) to files named after the data version and
+    # reused until the data changes. Streamlit holds a download's bytes in
+    # memory, so a file is only read in the rerun where the user asked for it
+    # (not on every render of this page).
+    export_format = st.selectbox(
+        "Table format", available_formats(),
+        help="Parquet needs pyarrow and zstd needs zstandard (optional dependencies)."
+    )
+
+    def download_on_request(label, path, file_name, mime, key, build=None):
+        """'Get' button that attaches the file (built first by build() if given) to a download button"""
+        size = f" ({os.path.getsize(path) / 2**20:,.1f} MB)" if os.path.exists(path) else ""
+        action = "📥 Get" if size else "📦 Prepare"
+        if not st.button(f"{action} {label}{size}", key=f"get_{key}"):
+            return
+        if build is not None:
+            with st.spinner(f"Writing {label}..."):
+                path = build()
+        with open(path, "rb") as f:
+            st.download_button(
+                f"⬇️ Download {label} ({os.path.getsize(path) / 2**20:,.1f} MB)",
+                f, file_name, mime=mime, key=f"download_{key}", on_click="ignore"
+            )
+
+    def export_button(label, name, version, build, key, fmt=None, **options):
+        """Download of an export, built on first request and cached as a file"""
+        fmt = fmt or export_format
+        suffix, mime = EXPORT_FORMATS[fmt]
+        download_on_request(
+            label, export_path(EXPORTS_DIR, name, version, fmt), f"{name}{suffix}", mime, key,
+            build=lambda: export_file(EXPORTS_DIR, name, version, fmt, build, **options)
+        )
+
     # --- Load dataset safely ---
     df = st.session_state.get("df", None)
     if df is None:
         st.warning("⚠️ No dataset found. Please upload a dataset first.")
     else:
+        fingerprint = session_fingerprint(df)
         st.subheader("📥 Dataset File")
-        st.download_button(
-            "⬇️ Download Dataset CSV",
-            df.to_csv(index=False).encode("utf-8"),
-            "dataset_updated.csv",
-            mime="text/csv"
-        )
+        export_button("Dataset", "dataset_updated", fingerprint, lambda: df, "dataset")
 
-    # --- Load feedback safely ---
-    feedback_df = st.session_state.get("feedback_df", pd.DataFrame(
-        columns=["record_id", "user", "feedback_type", "comment", "status", "timestamp"]
-    ))
+        if {"entities", "relations"} <= set(df.columns):
+            st.subheader("📥 Entity & Edge Tables")
+            export_button("Entity Table", "entities", fingerprint, lambda: entity_table(df), "entities")
+            export_button("Edge Table (SVO relations)", "edges", fingerprint, lambda: edge_table(df), "edges")
+        else:
+            st.info("ℹ️ Run Entity & Relation Extraction to export entity and edge tables.")
 
+    # --- Feedback export (rewritten only when the store has changed) ---
     st.subheader("📥 Feedback Records")
-    st.download_button(
-        "⬇️ Download Feedback CSV",
-        feedback_df.to_csv(index=False).encode("utf-8"),
-        "feedback.csv",
-        mime="text/csv"
+    export_button(
+        "Feedback", "feedback", f"{feedback_store.revision():016d}", feedback_store.to_frame, "feedback"
     )
 
     # --- Knowledge Graph Download ---
     st.subheader("📥 Knowledge Graph File")
     if os.path.exists(KNOWLEDGE_GRAPH_PATH):
-        try:
-            with open(KNOWLEDGE_GRAPH_PATH, "r", encoding="utf-8") as f:
-                html_content = f.read()
-
-            st.download_button(
-                "⬇️ Download Knowledge Graph HTML",
-                data=html_content,
-                file_name="knowledge_graph.html",
-                mime="text/html"
-            )
-        except Exception as e:
-            st.error(f"❌ Unable to load Knowledge Graph file: {e}")
+        download_on_request(
+            "Knowledge Graph HTML", KNOWLEDGE_GRAPH_PATH, "knowledge_graph.html", "text/html", "graph_html"
+        )
     else:
         st.info("⚠️ No Knowledge Graph has been generated yet.")
 
+    # --- Graph data for other tools (from the saved arrays; spaCy is not re-run) ---
+    if os.path.exists(KNOWLEDGE_GRAPH_DATA_PATH):
+        st.subheader("📥 Knowledge Graph Data")
+        graph_data = load_graph_file(KNOWLEDGE_GRAPH_DATA_PATH, os.path.getmtime(KNOWLEDGE_GRAPH_DATA_PATH))
+        graph_version = graph_data.key or f"{os.path.getmtime(KNOWLEDGE_GRAPH_DATA_PATH):.0f}"
+        st.caption(
+            f"{graph_data.n_nodes:,} nodes · {graph_data.n_edges:,} edges "
+            f"({int(graph_data.cross_domain.sum()):,} cross-domain)"
+        )
+        download_on_request(
+            "Graph Arrays (.npz, CSR adjacency)", KNOWLEDGE_GRAPH_DATA_PATH, "knowledge_graph.npz",
+            "application/octet-stream", "graph_npz"
+        )
+        export_button("Graph Edge List", "graph_edges", graph_version, graph_data.edges, "graph_edges")
+        export_button("Graph Node Table", "graph_nodes", graph_version, graph_data.nodes, "graph_nodes")
+        for graph_format, graph_label in [("graphml", "GraphML"), ("gexf", "GEXF")]:
+            export_button(graph_label, "knowledge_graph", graph_version, lambda: graph_data, graph_format,
+                          fmt=graph_format, write=write_graph_file)
+
 
 # ----------------------------------------
 # ⚙️ USER PREFERENCES
@@ -1578,3 +2690,5 @@ elif choice == "⚙️ User Preferences":
 st.sidebar.markdown("---")
 st.sidebar.info(f"🔐 Logged in as: **{st.session_state.username}**")
 
+warm_up_encoder()
+
@@ -0,0 +1,80 @@
+import os
+import time
+
+from knowmap.artifact_cache import ArtifactCache, MemoryTier, artifact_key
+
+
+def test_keys_change_with_every_input():
+    base = artifact_key("fp", "graph", {"links": None}, "1")
+    assert base == artifact_key("fp", "graph", {"links": None}, "1")
+    assert base != artifact_key("fp2", "graph", {"links": None}, "1")
+    assert base != artifact_key("fp", "ner", {"links": None}, "1")
+    assert base != artifact_key("fp", "graph", {"links": "x"}, "1")
+    assert base != artifact_key("fp", "graph", {"links": None}, "2")
+
+
+def test_memory_tier_is_lru_bounded_by_size():
+    tier = MemoryTier(max_bytes=100)
+    tier.put("a", "A", 40)
+    tier.put("b", "B", 40)
+    assert tier.get("a") == "A"                     # a is now more recent than b
+    tier.put("c", "C", 40)
+    assert "b" not in tier
+    assert tier.get("a") == "A" and tier.get("c") == "C"
+    assert tier.bytes == 80
+
+    tier.put("huge", "H", 500)                      # larger than the tier: not kept
+    assert "huge" not in tier
+
+
+def test_disk_hits_after_memory_is_cleared(tmp_path):
+    cache = ArtifactCache(str(tmp_path), memory=MemoryTier())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": 42}
+
+    assert cache.get_or_compute("stage", "k", compute) == {"value": 42}
+    assert cache.get_or_compute("stage", "k", compute) == {"value": 42}
+    cache.memory.clear()
+    assert cache.get("stage", "k") == {"value": 42}
+    assert len(calls) == 1
+
+    metrics = {row["stage"]: row for row in cache.metrics()}["stage"]
+    assert (metrics["misses"], metrics["memory_hits"], metrics["disk_hits"], metrics["writes"]) == (1, 1, 1, 1)
+    assert cache.get("stage", "missing") is None
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = ArtifactCache(str(tmp_path), memory=MemoryTier(max_bytes=0))
+    payload = b"x" * 1000
+    for i, key in enumerate(["old", "mid", "new"]):
+        cache.put("s", key, payload)
+        path = os.path.join(str(tmp_path), "s", f"{key}.pkl")
+        os.utime(path, (time.time() - 100 + i * 10,) * 2)
+
+    cache.get("s", "old")                           # a disk hit makes it recent again
+    entry_size = os.path.getsize(os.path.join(str(tmp_path), "s", "old.pkl"))
+    assert cache.evict(2 * entry_size) == 1
+    assert not cache.contains("s", "mid")
+    assert cache.contains("s", "old") and cache.contains("s", "new")
+
+    cache.clear()
+    assert cache.metrics()[0]["disk_files"] == 0
+
+
+def test_disk_is_listed_only_when_over_the_limit(tmp_path, monkeypatch):
+    cache = ArtifactCache(str(tmp_path), max_disk_bytes=2500, memory=MemoryTier(max_bytes=0))
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+
+    cache.put("s", "a", b"x" * 1000)                # first write: one scan to learn the size
+    cache.put("s", "b", b"x" * 1000)
+    cache.put("s", "b", b"y" * 1000)                # overwrite: size unchanged
+    assert len(scans) == 1
+    cache.put("s", "c", b"x" * 1000)                # over the limit: trim
+    assert len(scans) == 2
+    assert not cache.contains("s", "a")
+    assert cache.contains("s", "b") and cache.contains("s", "c")
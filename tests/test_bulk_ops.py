@@ -0,0 +1,84 @@
+import io
+
+import pandas as pd
+import pytest
+
+from knowmap.bulk_ops import (
+    UndoLog, delete_records, merge_sentences, read_id_list, read_merge_mapping, undo_operation,
+)
+from knowmap.fingerprint import dataset_fingerprint
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4, 5, 6],
+        "sentence": ["a", "b", "a", "c", "b", "d"],
+        "domain": ["x", "y", "x", "y", "x", "y"],
+    })
+
+
+def upload(text: str, name: str):
+    handle = io.BytesIO(text.encode("utf-8"))
+    handle.name = name
+    return handle
+
+
+def test_merge_mapping_resolves_chains_and_rejects_cycles():
+    mapping = read_merge_mapping(upload("old,new\na,b\nb,c\nx,x\n,y\n", "map.csv"))
+    assert dict(zip(mapping["old"], mapping["new"])) == {"a": "c", "b": "c"}
+    two_columns = read_merge_mapping(upload("from,to\nq,r\n", "map.csv"))
+    assert two_columns.values.tolist() == [["q", "r"]]
+    with pytest.raises(ValueError):
+        read_merge_mapping(upload("old,new\na,b\nb,a\n", "map.csv"))
+
+
+def test_id_lists_from_txt_and_csv():
+    assert read_id_list(upload("3\n 1 \n\n3\n", "ids.txt")) == ["3", "1"]
+    assert read_id_list(upload("id,note\n7,x\n8,y\n", "ids.csv")) == ["7", "8"]
+
+
+def test_merge_diff_and_undo_restore_the_rows(df):
+    version = dataset_fingerprint(df)
+    merged, diff, undo = merge_sentences(df, {"a": "z", "b": "z", "missing": "z"})
+    assert merged["sentence"].tolist() == ["z", "z", "z", "c", "z", "d"]
+    assert dict(zip(diff["old"], diff["rows_changed"])) == {"a": 2, "b": 2, "missing": 0}
+    assert undo["positions"].tolist() == [0, 1, 2, 4]
+    assert dataset_fingerprint(merged) != version
+
+    restored = undo_operation(merged, undo)
+    pd.testing.assert_frame_equal(restored, df)
+    assert dataset_fingerprint(restored) == version
+
+
+def test_delete_and_undo_reinsert_rows_in_place(df):
+    version = dataset_fingerprint(df)
+    remaining, diff, undo = delete_records(df, ["2", 5, "99"])
+    assert remaining["id"].tolist() == [1, 3, 4, 6]
+    assert dict(zip(diff["id"], diff["rows_removed"])) == {"2": 1, "5": 1, "99": 0}
+
+    restored = undo_operation(remaining, undo)
+    pd.testing.assert_frame_equal(restored, df)
+    assert dataset_fingerprint(restored) == version
+
+
+def test_stacked_operations_undo_newest_first(df):
+    log = UndoLog()
+    step1, _, undo1 = merge_sentences(df, {"a": "b"})
+    log.push(undo1, "alice")
+    step2, _, undo2 = delete_records(step1, [4])
+    log.push(undo2, "bob")
+    assert log.history()["user"].tolist() == ["bob", "alice"]
+
+    with pytest.raises(ValueError):
+        undo_operation(step2, log.entries[0])        # older entry: dataset has changed since
+    back = undo_operation(undo_operation(step2, log.pop()), log.pop())
+    pd.testing.assert_frame_equal(back, df)
+    assert len(log) == 0
+
+
+def test_undo_log_is_bounded():
+    log = UndoLog(max_entries=2)
+    for n in range(5):
+        log.push({"action": "merge", "summary": str(n)})
+    assert [e["summary"] for e in log.entries] == ["3", "4"]
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from knowmap.clustering import ClusterIndex, assign_clusters, default_n_clusters, minibatch_kmeans
+from knowmap.partitions import PartitionIndex
+from knowmap.search_engine import SemanticSearchEngine
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(4)
+    directions = np.eye(8, 32, dtype=np.float32) * 10
+    topic = rng.integers(0, 8, 2000)
+    matrix = (directions[topic] + rng.normal(size=(2000, 32))).astype(np.float32)
+    meta = pd.DataFrame({"id": range(2000), "sentence": [f"s{i}" for i in range(2000)],
+                         "domain": np.where(topic < 4, "bio", "cs")})
+    return meta, matrix, topic
+
+
+def test_partitions_group_sorted_rows_per_key():
+    partition = PartitionIndex.from_values(pd.Series(["b", "a", "b", "c", "a"]))
+    assert partition.rows_for(["a"]).tolist() == [1, 4]
+    assert partition.rows_for(["c", "a"]).tolist() == [1, 3, 4]
+    assert partition.rows_for(["zzz"]).tolist() == []
+    assert partition.sizes() == {"a": 2, "b": 2, "c": 1}
+    skipped = PartitionIndex.from_codes(np.array([0, -1, 1, 0]), ["x", "y"])
+    assert skipped.rows.tolist() == [0, 3, 2]
+
+
+def test_minibatch_kmeans_recovers_the_topics(data):
+    _, matrix, topic = data
+    # More clusters than topics, so every topic gets a centroid; every cluster is (almost) pure
+    assign = assign_clusters(matrix, minibatch_kmeans(matrix, 40))
+    purity = pd.crosstab(assign, topic).max(axis=1).sum() / len(topic)
+    assert purity > 0.95
+    assert default_n_clusters(10_000) == 100 and default_n_clusters(0) == 1
+
+
+def test_routing_narrows_search_to_the_query_topic(data):
+    meta, matrix, topic = data
+    index = ClusterIndex.build(meta, matrix, n_clusters=40, fingerprint="fp")
+    rows = index.route(matrix[0], nprobe=1)
+    assert np.all(np.diff(rows) > 0)
+    assert np.mean(topic[rows] == topic[0]) > 0.95
+    assert len(index.route(matrix[0], nprobe=100)) == len(matrix)
+
+    similarity = index.domain_similarity()
+    assert similarity.loc["bio", "bio"] == pytest.approx(1.0)
+    assert similarity.loc["bio", "cs"] < 0.5
+
+
+def test_cluster_index_round_trip_and_routed_search(tmp_path, data):
+    meta, matrix, topic = data
+    index = ClusterIndex.build(meta, matrix, n_clusters=40, fingerprint="fp")
+    path = str(tmp_path / "clusters.npz")
+    index.save(path)
+    loaded = ClusterIndex.load(path)
+    assert (loaded.fingerprint, loaded.n_clusters, loaded.domain_keys) == ("fp", 40, ["bio", "cs"])
+    assert np.array_equal(loaded.route(matrix[5], 2), index.route(matrix[5], 2))
+
+    engine = SemanticSearchEngine(meta, matrix, clusters=ClusterIndex.build(
+        meta, matrix, n_clusters=40, fingerprint=SemanticSearchEngine(meta, matrix).fingerprint))
+    routed, _ = engine.rank("", matrix[5], 5, nprobe=2)
+    assert routed[0] == 5
+    assert (topic[routed] == topic[5]).all()
+    assert set(routed) <= set(engine.clusters.route(matrix[5], 2))
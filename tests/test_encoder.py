@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from knowmap.embedding_store import EmbeddingWriter, load_embeddings, matrix_path, save_metadata
+from knowmap.encoder import encode_corpus, length_buckets, padding_waste, thread_settings
+
+
+class LengthModel:
+    """Encoder stand-in: the vector of a sentence is (length, first char code, 1)"""
+
+    tokenizer = None
+
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def encode(self, sentences, batch_size=None, show_progress_bar=False, convert_to_numpy=True):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise RuntimeError("encoder crashed")
+        return np.array([[len(s), ord(s[0]), 1] for s in sentences], dtype=np.float32)
+
+
+class ThreadedModel:
+    num_threads = None
+
+    def set_num_threads(self, num_threads):
+        self.num_threads = num_threads
+
+
+def test_buckets_group_similar_lengths():
+    lengths = np.array([5, 1, 9, 2, 8, 1])
+    batches = length_buckets(lengths, 2)
+    assert [lengths[b].tolist() for b in batches] == [[1, 1], [2, 5], [8, 9]]
+    assert padding_waste(lengths, batches) < padding_waste(lengths, [np.arange(6)])
+    assert padding_waste(np.zeros(0, dtype=int), []) == 0.0
+
+
+def test_overlapping_calls_keep_their_own_thread_count():
+    model, seen = ThreadedModel(), []
+
+    def encode(num_threads):
+        with thread_settings(model, num_threads):
+            before = model.num_threads
+            time.sleep(0.02)
+            seen.append((num_threads, before, model.num_threads))
+
+    threads = [threading.Thread(target=encode, args=(n,)) for n in (2, 3, 4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(n == before == after for n, before, after in seen)
+    assert model.num_threads is None
+
+
+def test_worker_environment_is_restored(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "7")
+    try:
+        with thread_settings(ThreadedModel(), 3, num_workers=2):
+            assert os.environ["OMP_NUM_THREADS"] == "3"
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert os.environ["OMP_NUM_THREADS"] == "7"
+
+
+def test_corpus_rows_keep_their_original_order(tmp_path):
+    sentences = ["a" * n for n in (9, 1, 5, 3, 7, 2, 8)]
+    path = str(tmp_path / "emb.npy")
+    done = []
+    stats = encode_corpus(LengthModel(), sentences, path, batch_size=2, chunk_size=4, progress=done.append)
+    matrix = np.load(path)
+    assert matrix[:, 0].tolist() == [9, 1, 5, 3, 7, 2, 8]
+    assert (stats["sentences"], stats["batches"]) == (7, 4)
+    assert done[-1] == 1.0
+    assert os.listdir(tmp_path) == ["emb.npy"]
+
+
+def test_failed_encode_leaves_no_partial_matrix(tmp_path):
+    path = str(tmp_path / "emb.npy")
+    with pytest.raises(RuntimeError):
+        encode_corpus(LengthModel(fail_after=1), ["x"] * 10, path, batch_size=2, chunk_size=2)
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(ValueError):
+        encode_corpus(LengthModel(), [], path)
+
+
+def test_embedding_store_round_trip_and_legacy_pickles(tmp_path):
+    path = str(tmp_path / "store.pkl")
+    meta = pd.DataFrame({"id": [1, 2, 3], "sentence": ["x", "y", "z"]})
+    writer = EmbeddingWriter(matrix_path(path), 3, 2)
+    writer.write([2, 0], np.array([[3, 3], [1, 1]], dtype=np.float32))
+    writer.write([1], np.array([[2, 2]], dtype=np.float32))
+    writer.close()
+    save_metadata(meta.assign(embedding=None), path)
+    loaded_meta, matrix = load_embeddings(path)
+    assert list(loaded_meta.columns) == ["id", "sentence"]
+    assert np.asarray(matrix)[:, 0].tolist() == [1, 2, 3]
+
+    os.remove(matrix_path(path))
+    meta.assign(embedding=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]).to_pickle(path)
+    legacy_meta, legacy = load_embeddings(path)
+    assert "embedding" not in legacy_meta.columns and legacy.shape == (3, 2)
+
+    meta.iloc[:2].to_pickle(path)
+    with pytest.raises(ValueError):
+        load_embeddings(path)
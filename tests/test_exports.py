@@ -0,0 +1,79 @@
+import os
+
+import pandas as pd
+import pytest
+
+from knowmap.exports import (
+    EDGE_COLUMNS, ENTITY_COLUMNS, available_formats, edge_table, entity_table,
+    export_file, export_path, read_table, write_table,
+)
+
+
+@pytest.fixture
+def records():
+    return pd.DataFrame({
+        "id": [1, 2, 3],
+        "entities": [[("Ada", "PERSON"), ("London", "GPE")], [], [("Paris", "GPE")]],
+        "relations": [[("Ada", "visit", "London")], [], [("Paris", "be", "capital")]],
+    })
+
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz", "csv.zst", "parquet"])
+def test_tables_round_trip_in_small_chunks(tmp_path, fmt):
+    if fmt not in available_formats():
+        pytest.skip(f"{fmt} needs an optional dependency")
+    frame = pd.DataFrame({"id": range(25), "text": [f"row {i}, with comma" for i in range(25)]})
+    path = export_path(str(tmp_path), "table", "v1", fmt)
+    write_table(frame, path, fmt, chunk_rows=7)
+    pd.testing.assert_frame_equal(read_table(path), frame)
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_empty_table_keeps_its_header(tmp_path):
+    path = str(tmp_path / "empty.csv")
+    write_table(pd.DataFrame(columns=ENTITY_COLUMNS), path, "csv")
+    assert list(read_table(path).columns) == ENTITY_COLUMNS
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_table(pd.DataFrame({"id": [1]}), str(tmp_path / "x.bin"), "bin")
+
+
+def test_entity_and_edge_tables(records):
+    entities = entity_table(records)
+    assert list(entities.columns) == ENTITY_COLUMNS
+    assert entities.values.tolist() == [[1, "Ada", "PERSON"], [1, "London", "GPE"], [3, "Paris", "GPE"]]
+
+    edges = edge_table(records)
+    assert list(edges.columns) == EDGE_COLUMNS
+    assert edges.values.tolist() == [[1, "Ada", "visit", "London"], [3, "Paris", "be", "capital"]]
+
+
+def test_export_file_is_reused_until_the_version_changes(tmp_path, records):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return entity_table(records)
+
+    first = export_file(str(tmp_path), "entities", "aaaa", "csv", build)
+    assert export_file(str(tmp_path), "entities", "aaaa", "csv", build) == first
+    assert len(builds) == 1
+
+    other_format = export_file(str(tmp_path), "entities", "aaaa", "csv.gz", build)
+    second = export_file(str(tmp_path), "entities", "bbbb", "csv", build)
+    assert len(builds) == 3
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(other_format)
+
+
+def test_export_file_uses_a_custom_writer(tmp_path):
+    def write(text, path, fmt):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"{fmt}:{text}")
+
+    path = export_file(str(tmp_path), "graph", "v1", "graphml", lambda: "<graph/>", write=write)
+    assert path.endswith(".graphml")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "graphml:<graph/>"
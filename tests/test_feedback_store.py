@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from knowmap.feedback_store import FeedbackStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeedbackStore(str(tmp_path / "feedback.db"))
+
+
+def add_events(store):
+    ids = [
+        store.add(1, "alice", "Error", "wrong label", timestamp="2024-05-01T09:15:00", domain="bio"),
+        store.add(1, "bob", "Suggestion", "merge", timestamp="2024-05-01T09:45:00", domain="bio"),
+        store.add(2, "alice", "Error", "typo", timestamp="2024-05-01T13:05:00", domain="cs"),
+        store.add(3, "carol", "Other", "?", status="Reviewed", timestamp="2024-05-02T08:00:00", domain="cs"),
+    ]
+    return ids
+
+
+def test_counts_are_maintained_on_insert_and_status_change(store):
+    ids = add_events(store)
+    assert store.total() == 4
+    assert store.counts("feedback_type").to_dict() == {"Error": 2, "Suggestion": 1, "Other": 1}
+    assert store.counts("status").to_dict() == {"Pending": 3, "Reviewed": 1}
+
+    assert store.set_status(ids[0], "Resolved")
+    assert store.counts("status").to_dict() == {"Pending": 2, "Reviewed": 1, "Resolved": 1}
+    assert store.total() == 4
+    with pytest.raises(ValueError):
+        store.counts("comment")
+
+
+def test_revision_moves_only_when_rows_change(store):
+    ids = add_events(store)
+    revision = store.revision()
+    assert not store.set_status(ids[0], "Pending")        # unchanged status
+    assert not store.set_status(999, "Resolved")          # missing row
+    store.import_frame(pd.DataFrame(columns=["record_id", "user"]))
+    assert store.revision() == revision
+    assert store.set_status(ids[0], "Reviewed")
+    assert store.revision() == revision + 1
+
+
+def test_query_filters_and_pages_newest_first(store):
+    ids = add_events(store)
+    assert store.query(user="alice")["feedback_id"].tolist() == [ids[2], ids[0]]
+    assert store.query(record_id=1, status="Pending")["user"].tolist() == ["bob", "alice"]
+    assert store.query(start="2024-05-01T10:00", end="2024-05-02")["feedback_id"].tolist() == [ids[2]]
+    assert store.query(limit=2, offset=1)["feedback_id"].tolist() == [ids[2], ids[1]]
+    assert store.to_frame()["feedback_id"].tolist() == ids
+
+
+def test_legacy_csv_is_imported_once(tmp_path):
+    legacy = tmp_path / "feedback.csv"
+    pd.DataFrame({
+        "record_id": [5, 6], "user": ["dan", "erin"], "feedback_type": ["Error", None],
+        "comment": ["a", "b"], "status": [None, "Resolved"], "timestamp": ["2023-01-01 10:00:00", None],
+    }).to_csv(legacy, index=False)
+    path = str(tmp_path / "feedback.db")
+    store = FeedbackStore(path, legacy_csv=str(legacy))
+    frame = store.to_frame()
+    assert frame["feedback_type"].tolist() == ["Error", "Other"]
+    assert frame["status"].tolist() == ["Pending", "Resolved"]
+    assert FeedbackStore(path, legacy_csv=str(legacy)).total() == 2
+
+
+def test_store_uses_wal_and_concurrent_writers_all_land(store):
+    assert store._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def write(user):
+        for n in range(25):
+            store.add(n, user, "Other", "", timestamp="2024-01-01T00:00:00")
+
+    threads = [threading.Thread(target=write, args=(f"user{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.total() == 100
+    assert store.counts("user").to_dict() == {f"user{i}": 25 for i in range(4)}
+
+
+def exact_rollup(store, granularity, by):
+    """The rollup computed from the events, for comparison"""
+    events = store.to_frame()
+    width = 13 if granularity == "hour" else 10
+    events["bucket"] = events["timestamp"].str[:width] + (":00:00" if granularity == "hour" else "")
+    out = events.groupby(list(by)).size().reset_index(name="count")
+    return out.sort_values(list(by)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("granularity", ["hour", "day"])
+@pytest.mark.parametrize("by", [("bucket",), ("bucket", "status"), ("domain", "feedback_type")])
+def test_rollups_match_the_events(store, granularity, by):
+    ids = add_events(store)
+    store.set_status(ids[1], "Rejected")
+    pd.testing.assert_frame_equal(store.rollup(granularity=granularity, by=by), exact_rollup(store, granularity, by),
+                                  check_dtype=False)
+
+
+def test_rollup_ranges_and_validation(store):
+    add_events(store)
+    hours = store.rollup("2024-05-01T09:30", "2024-05-01T14:00", granularity="hour")
+    assert hours.values.tolist() == [["2024-05-01T09:00:00", 2], ["2024-05-01T13:00:00", 1]]
+    assert store.rollup(start="2024-05-02", by=()).values.tolist() == [[1]]
+    with pytest.raises(ValueError):
+        store.rollup(granularity="week")
+    with pytest.raises(ValueError):
+        store.rollup(by=("comment",))
+
+
+def test_missing_rollups_are_backfilled_on_open(tmp_path):
+    path = str(tmp_path / "feedback.db")
+    store = FeedbackStore(path)
+    add_events(store)
+    expected = store.rollup(granularity="hour", by=("bucket", "domain", "user"))
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM feedback_rollups")
+    assert store.rollup().empty
+
+    reopened = FeedbackStore(path)
+    pd.testing.assert_frame_equal(reopened.rollup(granularity="hour", by=("bucket", "domain", "user")), expected)
+
+
+def test_stores_without_a_domain_column_are_migrated(tmp_path):
+    path = str(tmp_path / "feedback.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE feedback (feedback_id INTEGER PRIMARY KEY AUTOINCREMENT, record_id TEXT NOT NULL, "
+            "user TEXT NOT NULL, feedback_type TEXT NOT NULL, comment TEXT NOT NULL, status TEXT NOT NULL, "
+            "timestamp TEXT NOT NULL)"
+        )
+        conn.execute("INSERT INTO feedback VALUES (1, '7', 'ann', 'Error', 'x', 'Pending', '2024-03-04T05:06:07')")
+    store = FeedbackStore(path)
+    assert store.to_frame()["domain"].tolist() == [""]
+    assert store.rollup(by=("bucket", "domain")).values.tolist() == [["2024-03-04", "", 1]]
+    store.add(8, "ann", "Other", "", timestamp="2024-03-04T06:00:00", domain="bio")
+    assert store.rollup(by=("domain",))["count"].tolist() == [1, 1]
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from knowmap.frequency_index import FrequencyIndex
+from knowmap.sketches import build_sketch
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "id": range(10),
+        "sentence": ["Water boils.", "water  boils.", "WATER BOILS.", "Ice melts.", "ice melts.",
+                     "Stars burn.", "Ice melts.", "Stars burn.", "Rare one.", "ICE melts."],
+        "domain": ["chem", "phys", "chem", "chem", "phys", "phys", "phys", "phys", "chem", "phys"],
+        "label": "L",
+    })
+
+
+def test_counts_group_case_and_whitespace_variants(df):
+    index = FrequencyIndex.build(df["sentence"], df["domain"], "fp")
+    assert index.n_distinct == 4
+    top = index.top(3, df["sentence"])
+    assert top["sentence"].tolist() == ["Ice melts.", "Water boils.", "Stars burn."]
+    assert top["count"].tolist() == [4, 3, 2]
+    assert index.count("  water BOILS. ") == 3
+    assert index.count("Unseen.") == 0
+
+
+def test_per_domain_tops(df):
+    index = FrequencyIndex.build(df["sentence"], df["domain"])
+    phys = index.top_by_domain("phys", 2, df["sentence"])
+    assert phys.values.tolist() == [["Ice melts.", 3, 3], ["Stars burn.", 5, 2]]
+    assert index.top_by_domain("chem", 10)["count"].sum() == 4
+    assert index.top_by_domain("phys", 10)["count"].sum() == 6
+    assert index.top_by_domain("bio").empty
+
+
+def test_save_load_round_trip(tmp_path, df):
+    index = FrequencyIndex.build(df["sentence"], df["domain"], "fp")
+    path = str(tmp_path / "frequency.npz")
+    index.save(path)
+    loaded = FrequencyIndex.load(path)
+    assert loaded.fingerprint == "fp"
+    pd.testing.assert_frame_equal(loaded.top(4, df["sentence"]), index.top(4, df["sentence"]))
+    pd.testing.assert_frame_equal(loaded.top_by_domain("phys"), index.top_by_domain("phys"))
+
+
+def test_sketch_top_sentences_agree_with_the_exact_index(df):
+    exact = FrequencyIndex.build(df["sentence"], df["domain"])
+    sketch = build_sketch(df, chunk=4)
+    approx = sketch.top["sentence"].top(2)
+    assert sorted(approx["count"].tolist()) == sorted(exact.top(2)["count"].tolist())
+    assert sketch.count_of("sentence", "ICE MELTS.") >= exact.count("ice melts.")
@@ -0,0 +1,118 @@
+import io
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from knowmap.exports import write_table
+from knowmap.graph_export import GRAPH_EDGE_COLUMNS, GraphData, read_graph_upload, write_graph_file
+
+
+@pytest.fixture
+def graph():
+    edges = pd.DataFrame({
+        "source": ["Ada", "Ada", "London", "Zürich"],
+        "target": ["London", "Paris", "Paris", "Ada"],
+        "label": ["visit", "visit", None, ""],
+        "cross_domain": [False, False, False, True],
+        "score": [np.nan, np.nan, np.nan, 0.75],
+    })
+    return GraphData.from_edges(edges, key="k1")
+
+
+def upload(data: bytes, name: str):
+    handle = io.BytesIO(data)
+    handle.name = name
+    return handle
+
+
+def test_from_edges_builds_nodes_counts_and_csr(graph):
+    assert graph.names.tolist() == ["Ada", "London", "Zürich", "Paris"]
+    assert graph.counts.tolist() == [2, 2, 0, 2]      # cross-domain edges are not counted
+    assert (graph.n_nodes, graph.n_edges) == (4, 4)
+    assert graph.relations.tolist() == ["", "visit"]
+    assert graph.indptr.tolist() == [0, 3, 5, 6, 8]
+    assert sorted(graph.neighbors("Ada")) == ["London", "Paris", "Zürich"]
+    assert graph.neighbors("nobody") == []
+    for row in range(graph.n_nodes):
+        for entry in range(graph.indptr[row], graph.indptr[row + 1]):
+            edge = graph.edge_index[entry]
+            assert {graph.sources[edge], graph.targets[edge]} == {row, graph.indices[entry]}
+
+
+def test_from_edges_takes_counts_from_a_node_table():
+    edges = pd.DataFrame({"source": ["a"], "target": ["b"]})
+    nodes = pd.DataFrame({"node": ["c", "a", "b"], "count": [5, 3, 1]})
+    graph = GraphData.from_edges(edges, nodes)
+    assert dict(zip(graph.names, graph.counts)) == {"c": 5, "a": 3, "b": 1}
+    assert graph.neighbors("c") == []
+
+
+def test_npz_round_trip_keeps_every_array(tmp_path, graph):
+    path = str(tmp_path / "graph.npz")
+    graph.save(path)
+    loaded = GraphData.load(path)
+    assert loaded.key == "k1"
+    pd.testing.assert_frame_equal(loaded.edges(), graph.edges())
+    pd.testing.assert_frame_equal(loaded.nodes(), graph.nodes())
+    for name in ("indptr", "indices", "edge_index"):
+        assert np.array_equal(getattr(loaded, name), getattr(graph, name))
+    assert os.listdir(tmp_path) == ["graph.npz"]
+
+
+def test_long_names_do_not_pad_the_file(tmp_path):
+    names = ["x" * 2000] + [f"node {i}" for i in range(2000)]
+    edges = pd.DataFrame({"source": names[:-1], "target": names[1:]})
+    path = str(tmp_path / "graph.npz")
+    GraphData.from_edges(edges).save(path)
+    assert os.path.getsize(path) < 200_000
+    assert GraphData.load(path).names[0] == "x" * 2000
+
+
+def test_legacy_fixed_width_files_still_load(tmp_path, graph):
+    path = str(tmp_path / "legacy.npz")
+    np.savez(path, names=graph.names.astype(str), counts=graph.counts, sources=graph.sources,
+             targets=graph.targets, relation_codes=graph.relation_codes,
+             relations=graph.relations.astype(str), cross_domain=graph.cross_domain,
+             scores=graph.scores, key="old")
+    loaded = GraphData.load(path)
+    assert loaded.key == "old"
+    pd.testing.assert_frame_equal(loaded.edges(), graph.edges())
+    assert np.array_equal(loaded.indptr, graph.indptr)
+
+
+@pytest.mark.parametrize("fmt", ["graphml", "gexf"])
+def test_xml_exports_are_well_formed(tmp_path, fmt):
+    edges = pd.DataFrame({"source": ['<a & "b">'], "target": ["c'd"], "label": ["x < y"]})
+    graph = GraphData.from_edges(edges)
+    path = str(tmp_path / f"graph.{fmt}")
+    write_graph_file(graph, path, fmt)
+    root = ET.parse(path).getroot()
+    nodes = [el for el in root.iter() if el.tag.endswith("}node")]
+    edges = [el for el in root.iter() if el.tag.endswith("}edge")]
+    assert (len(nodes), len(edges)) == (2, 1)
+    attr = "id" if fmt == "graphml" else "label"
+    assert [node.get(attr) for node in nodes] == ['<a & "b">', "c'd"]
+    with pytest.raises(ValueError):
+        write_graph_file(graph, path, "dot")
+
+
+def test_uploads_are_read_back(tmp_path, graph):
+    npz_path = str(tmp_path / "graph.npz")
+    graph.save(npz_path)
+    with open(npz_path, "rb") as f:
+        loaded = read_graph_upload(upload(f.read(), "Graph.NPZ"))
+    pd.testing.assert_frame_equal(loaded.edges(), graph.edges())
+
+    csv_path = str(tmp_path / "edges.csv.gz")
+    write_table(graph.edges(), csv_path, "csv.gz")
+    with open(csv_path, "rb") as f:
+        from_csv = read_graph_upload(upload(f.read(), "edges.csv.gz"))
+    assert list(from_csv.edges().columns) == GRAPH_EDGE_COLUMNS
+    assert from_csv.edges()[["source", "target", "label", "cross_domain"]].equals(
+        graph.edges()[["source", "target", "label", "cross_domain"]])
+
+    with pytest.raises(ValueError):
+        read_graph_upload(upload(b"", "graph.json"))
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from knowmap.lexical_index import BM25_B, BM25_K1, BM25Index, reciprocal_rank_fusion, tokenize
+from knowmap.search_engine import SemanticSearchEngine
+
+SENTENCES = [
+    "Photosynthesis converts light into chemical energy",
+    "Neural networks learn from data",
+    "Light travels faster than sound",
+    "COVID-19 vaccines train the immune system",
+    "Plants need light and water, light and air",
+    "Deep neural networks need a lot of data",
+]
+
+
+class BagOfWordsEncoder:
+    """Deterministic stand-in for the sentence encoder: hashed token counts"""
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        out = np.zeros((len(texts), 64), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in tokenize(text):
+                out[i, sum(map(ord, token)) % 64] += 1.0
+        return out
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(SENTENCES, "fp")
+
+
+def test_tokenize_keeps_hyphenated_names_and_numbers():
+    assert tokenize("COVID-19 and Smith's T-cells, 2 x") == ["covid-19", "and", "smith's", "t-cells", "2", "x"]
+
+
+def test_posting_lists_are_sorted_per_term(index):
+    term = index.vocab["light"]
+    docs = index.doc_ids[index.offsets[term]:index.offsets[term + 1]]
+    tfs = index.tfs[index.offsets[term]:index.offsets[term + 1]]
+    assert docs.tolist() == [0, 2, 4]
+    assert tfs.tolist() == [1, 1, 2]
+
+
+def test_scores_follow_the_bm25_formula(index):
+    scores = index.scores("light water")
+    lengths = np.array([len(tokenize(s)) for s in SENTENCES], dtype=np.float64)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / lengths.mean())
+
+    def term_score(term, doc, tf):
+        df = sum(term in tokenize(s) for s in SENTENCES)
+        idf = np.log(1 + (len(SENTENCES) - df + 0.5) / (df + 0.5))
+        return idf * tf * (BM25_K1 + 1) / (tf + norm[doc])
+
+    expected = np.zeros(len(SENTENCES))
+    for doc, sentence in enumerate(SENTENCES):
+        tokens = tokenize(sentence)
+        for term in ("light", "water"):
+            if term in tokens:
+                expected[doc] += term_score(term, doc, tokens.count(term))
+    np.testing.assert_allclose(scores, expected, rtol=1e-5)
+
+
+def test_search_returns_only_matching_rows(index):
+    rows, scores = index.search("light", 10)
+    assert sorted(rows.tolist()) == [0, 2, 4]
+    assert rows[0] == 4                                 # two occurrences
+    assert list(scores) == sorted(scores, reverse=True)
+    assert len(index.search("unknownword", 10)[0]) == 0
+    assert index.candidates("neural data", 1).tolist() == [1]
+
+
+def test_save_load_round_trip(tmp_path, index):
+    path = str(tmp_path / "lexical.npz")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.fingerprint == "fp"
+    np.testing.assert_array_equal(loaded.scores("neural light"), index.scores("neural light"))
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    rows, scores = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=3, rrf_k=60)
+    assert rows.tolist() == [1, 3, 2]
+    assert scores[0] == pytest.approx(1 / 61 + 1 / 62)
+    assert len(reciprocal_rank_fusion([[], []])[0]) == 0
+
+
+def test_hybrid_search_fuses_dense_and_lexical_rankings():
+    meta = pd.DataFrame({"id": range(len(SENTENCES)), "sentence": SENTENCES,
+                         "domain": ["bio", "cs", "phys", "bio", "bio", "cs"]})
+    encoder = BagOfWordsEncoder()
+    engine = SemanticSearchEngine(meta, encoder.encode(SENTENCES), encoder=encoder)
+    hybrid = engine.search("neural networks data", k=2, method="hybrid")
+    assert set(hybrid["row"]) == {1, 5}
+    assert hybrid["score"].iloc[0] <= 2 / 61            # RRF scores, not cosines
+    prefilter = engine.search("light", k=3, method="prefilter")
+    assert set(prefilter["row"]) <= {0, 2, 4}
+    with pytest.raises(ValueError):
+        engine.search("light", method="sparse")
+
+
+@pytest.mark.parametrize("n_rows", [1, 3, 500])
+def test_row_scores_match_full_scores_from_either_side(n_rows):
+    rng = np.random.default_rng(n_rows)
+    words = [f"w{i}" for i in range(30)]
+    sentences = [" ".join(rng.choice(words, 8)) for _ in range(2000)]
+    index = BM25Index.build(sentences)
+    rows = np.sort(rng.choice(len(sentences), n_rows, replace=False))
+    for query in ("w1 w2", "w3 w3 w29", "absent", ""):
+        np.testing.assert_allclose(index.scores_rows(query, rows), index.scores(query)[rows], rtol=1e-6)
+    assert len(index.scores_rows("w1", np.empty(0, dtype=np.int64))) == 0
+
+
+def test_filtered_searches_stay_inside_the_partition():
+    meta = pd.DataFrame({"id": range(len(SENTENCES)), "sentence": SENTENCES,
+                         "domain": ["bio", "cs", "phys", "bio", "bio", "cs"]})
+    encoder = BagOfWordsEncoder()
+    engine = SemanticSearchEngine(meta, encoder.encode(SENTENCES), encoder=encoder)
+    for method in ("dense", "hybrid", "prefilter"):
+        found = engine.search("light networks", k=5, method=method, domains=["bio"])
+        assert set(found["domain"]) == {"bio"}, method
+    rows, _ = engine._lexical_top("light", 5, engine.filter_rows(domains=["phys", "cs"]))
+    assert rows.tolist() == [2]
+    assert len(engine.search("light", k=3, domains=["none"])) == 0
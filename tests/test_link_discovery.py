@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from knowmap.link_discovery import LINK_COLUMNS, discover_links, load_links, save_links, unique_pairs
+from knowmap.vector_ops import cosine_scores
+
+
+def corpus(n=300, seed=2):
+    rng = np.random.default_rng(seed)
+    matrix = rng.normal(size=(n, 16)).astype(np.float32)
+    meta = pd.DataFrame({"id": np.arange(n), "sentence": [f"s{i}" for i in range(n)],
+                         "domain": rng.choice(["bio", "cs", "phys"], n)})
+    return meta, matrix
+
+
+def test_blocked_join_matches_the_exact_cross_domain_top_k():
+    meta, matrix = corpus()
+    links = discover_links(meta, matrix, k=3, min_score=-1.0, block=37)
+    assert list(links.columns) == LINK_COLUMNS
+    assert (links["source_domain"] != links["target_domain"]).all()
+
+    for source in (0, 123, 299):
+        scores = cosine_scores(matrix, matrix[source])
+        scores[meta["domain"].values == meta["domain"][source]] = -np.inf
+        expected = np.argsort(-scores)[:3].tolist()
+        found = links[links["source_id"] == source].sort_values("rank")
+        assert found["target_id"].tolist() == expected
+        np.testing.assert_allclose(found["score"], scores[expected], rtol=1e-5)
+
+
+def test_min_score_and_block_size_do_not_change_results():
+    meta, matrix = corpus()
+    small = discover_links(meta, matrix, k=2, min_score=0.5, block=16)
+    large = discover_links(meta, matrix, k=2, min_score=0.5, block=1024)
+    assert (small["score"] >= 0.5).all()
+    key = ["source_id", "target_id"]
+    pd.testing.assert_frame_equal(small.sort_values(key).reset_index(drop=True),
+                                  large.sort_values(key).reset_index(drop=True))
+
+
+def test_single_domain_has_no_links():
+    meta, matrix = corpus(50)
+    assert discover_links(meta.assign(domain="only"), matrix, min_score=-1.0).empty
+
+
+def test_unique_pairs_and_csv_round_trip(tmp_path):
+    meta, matrix = corpus(60)
+    links = discover_links(meta, matrix, k=5, min_score=-1.0)
+    pairs = unique_pairs(links)
+    undirected = {frozenset(p) for p in zip(pairs["source_id"], pairs["target_id"])}
+    assert len(undirected) == len(pairs)
+    assert undirected == {frozenset(p) for p in zip(links["source_id"], links["target_id"])}
+
+    path = str(tmp_path / "links.csv")
+    assert load_links(path).empty
+    save_links(links, path)
+    pd.testing.assert_frame_equal(load_links(path), links, check_dtype=False)
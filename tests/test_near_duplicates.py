@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from knowmap.near_duplicates import (
+    cluster_summary, connected_components, embedding_pairs, find_near_duplicates,
+    lsh_candidate_pairs, merge_mapping, minhash_signatures, normalize_sentence,
+    shingle_hashes, signature_similarity,
+)
+
+
+def jaccard(a: str, b: str, k: int = 5) -> float:
+    sa = {a[i:i + k] for i in range(len(a) - k + 1)}
+    sb = {b[i:i + k] for i in range(len(b) - k + 1)}
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_shingles_are_laid_out_per_text():
+    hashes, offsets = shingle_hashes(["abcdefg", "ab", "abcde"], k=5)
+    assert np.diff(offsets).tolist() == [3, 1, 1]
+    assert hashes[0] == hashes[offsets[2]]               # "abcde" in both texts
+
+
+def test_minhash_estimates_jaccard():
+    base = "the quick brown fox jumps over the lazy dog near the river bank today"
+    variants = [base, base.replace("lazy", "sleepy"), base[:40], "completely unrelated sentence text"]
+    signatures = minhash_signatures(variants, num_perm=512)
+    for j, other in enumerate(variants[1:], start=1):
+        estimate = signature_similarity(signatures, np.array([0]), np.array([j]))[0]
+        assert abs(estimate - jaccard(base, other)) < 0.1
+    assert np.array_equal(signatures, minhash_signatures(variants, num_perm=512, chunk=2))
+
+
+def test_lsh_pairs_similar_rows_and_caps_bucket_pairs():
+    texts = ["an example sentence about cells"] * 3 + ["something else entirely, very different"]
+    i, j = lsh_candidate_pairs(minhash_signatures(texts))
+    assert sorted(zip(i.tolist(), j.tolist())) == [(0, 1), (0, 2), (1, 2)]
+
+    identical = np.zeros((100, 64), dtype=np.uint32)
+    i, j = lsh_candidate_pairs(identical, max_pairs=2)
+    assert (i < j).all() and len(i) == 99 + 98
+    assert np.unique(connected_components(100, i, j)).tolist() == [0]
+
+
+def test_connected_components_label_by_smallest_member():
+    labels = connected_components(6, np.array([4, 1, 3]), np.array([5, 3, 0]))
+    assert labels.tolist() == [0, 0, 2, 0, 4, 4]
+
+
+def test_near_duplicate_clusters_and_merge_mapping():
+    sentences = pd.Series([
+        "Mitochondria are the powerhouse of the cell.",
+        "Mitochondria are the powerhouse of the cell.",
+        "mitochondria  are the powerhouse of the cell.",
+        "Mitochondria are the power house of the cell.",
+        "Gradient descent minimises a loss function.",
+        "Gradient descent minimises the loss function.",
+        "Unrelated sentence about volcanoes.",
+    ])
+    duplicates = find_near_duplicates(sentences, threshold=0.6)
+    assert normalize_sentence(sentences[2]) == normalize_sentence(sentences[0])
+    assert "Unrelated sentence about volcanoes." not in set(duplicates["sentence"])
+
+    summary = cluster_summary(duplicates)
+    assert summary["cluster"].tolist() == [1, 2]
+    first = summary.iloc[0]
+    assert first["canonical"] == sentences[0]             # most frequent member
+    assert (first["members"], first["rows"]) == (3, 4)
+
+    mapping = merge_mapping(duplicates, {1: sentences[0]})
+    assert mapping == {sentences[2]: sentences[0], sentences[3]: sentences[0]}
+
+
+def test_embedding_neighbours_join_paraphrases():
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(200, 16)).astype(np.float32)
+    matrix[150] = matrix[10] * 2.0                         # same direction: cosine 1
+    i, j, scores = embedding_pairs(matrix, min_score=0.99, n_clusters=4)
+    assert {(10, 150), (150, 10)} <= set(zip(i.tolist(), j.tolist()))
+    assert (scores >= 0.99).all()
+
+    sentences = pd.Series([f"sentence number {n}" for n in range(200)])
+    sentences[150] = "a paraphrase sharing no shingles"
+    duplicates = find_near_duplicates(sentences, threshold=0.95, matrix=matrix,
+                                      matrix_sentences=sentences, min_cosine=0.99)
+    clusters = duplicates.groupby("cluster")["sentence"].apply(set).tolist()
+    assert {"sentence number 10", "a paraphrase sharing no shingles"} in clusters
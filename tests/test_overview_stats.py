@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from knowmap.artifact_cache import ArtifactCache
+from knowmap.fingerprint import dataset_fingerprint, frame_fingerprint
+from knowmap.overview_stats import compute_overview, counts_series, load_overview, word_counts
+
+
+def dataset():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "sentence": ["Cells divide.", "cells, cells and DNA!", "Qubits 2 entangle", "dna"],
+        "domain": ["bio", "bio", "phys", "bio"],
+        "label": ["A", "B", "A", None],
+    })
+
+
+def test_word_counts_match_per_sentence_counting():
+    sentences = dataset()["sentence"]
+    assert word_counts(sentences, chunk=1) == word_counts(sentences)
+    assert word_counts(sentences) == {"cells": 3, "divide": 1, "and": 1, "dna": 2, "qubits": 1, "entangle": 1}
+
+
+def test_overview_statistics():
+    stats = compute_overview(dataset(), top_words=2)
+    assert (stats["records"], stats["unique_domains"], stats["unique_labels"]) == (4, 2, 2)
+    assert stats["max_length"] == len("cells, cells and DNA!")
+    assert stats["domain_counts"] == [["bio", 3], ["phys", 1]]
+    assert stats["top_words"] == [["cells", 3], ["dna", 2]]
+    assert stats["missing"]["label"] == 1
+    assert counts_series(stats["domain_counts"]).to_dict() == {"bio": 3, "phys": 1}
+    empty = compute_overview(dataset().iloc[:0])
+    assert (empty["avg_length"], empty["max_length"]) == (0.0, 0)
+
+
+def test_overview_is_computed_once_per_dataset_version(tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    df = dataset()
+    first = load_overview(df, dataset_fingerprint(df), cache)
+    assert load_overview(df, dataset_fingerprint(df), cache) == first
+    counters = cache.metrics()[0]
+    assert (counters["misses"], counters["memory_hits"]) == (1, 1)
+
+    edited = df.assign(sentence=df["sentence"].str.upper())
+    assert dataset_fingerprint(edited) != dataset_fingerprint(df)
+    assert load_overview(edited, dataset_fingerprint(edited), cache)["max_length"] == first["max_length"]
+    assert cache.metrics()[0]["misses"] == 2
+
+
+def test_fingerprints_track_content_not_derived_columns():
+    df = dataset()
+    same = df.copy()
+    assert dataset_fingerprint(same) == dataset_fingerprint(df)
+    with_ner = df.assign(entities=[[("x", "Y")]] * 4)
+    assert frame_fingerprint(with_ner, ["sentence"]) == frame_fingerprint(df, ["sentence"])
+    assert dataset_fingerprint(with_ner) != dataset_fingerprint(df)          # column list changed
+    assert dataset_fingerprint(df.iloc[::-1]) != dataset_fingerprint(df)
+    assert dataset_fingerprint(df.assign(id=np.arange(4) + 9)) != dataset_fingerprint(df)
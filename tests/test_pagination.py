@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from knowmap.pagination import ResultCursor
+from knowmap.search_engine import SemanticSearchEngine
+
+
+class VectorEncoder:
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        return np.array([[1.0, float(t)] for t in texts], dtype=np.float32)
+
+
+class CountingEngine(SemanticSearchEngine):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.depths = []
+
+    def rank(self, query, query_vector, k, *args, **kwargs):
+        self.depths.append(k)
+        return super().rank(query, query_vector, k, *args, **kwargs)
+
+
+def make_engine(n_rows=95):
+    angles = np.linspace(0, np.pi / 2, n_rows)
+    matrix = np.stack([np.cos(angles), np.sin(angles)], axis=1).astype(np.float32)
+    meta = pd.DataFrame({"id": range(n_rows), "sentence": [f"s{i}" for i in range(n_rows)],
+                         "domain": ["a", "b"] * (n_rows // 2) + ["a"] * (n_rows % 2)})
+    return CountingEngine(meta, matrix, encoder=VectorEncoder())
+
+
+def test_pages_follow_the_full_ranking():
+    engine = make_engine()
+    full, _ = engine.rank("0", np.array([1.0, 0.0]), 95)
+    cursor = ResultCursor(engine, "0", page_size=10)
+    pages = [cursor.page(p) for p in range(10)]
+    assert np.concatenate([p["row"].values for p in pages]).tolist() == full.tolist()
+    assert pages[3]["rank"].tolist() == list(range(31, 41))
+    assert len(pages[9]) == 5 and cursor.page(10).empty
+    assert not cursor.has_page(10) and cursor.has_page(9)
+
+
+def test_buffer_doubles_so_scans_grow_logarithmically():
+    engine = make_engine()
+    cursor = ResultCursor(engine, "0", page_size=5, prefetch_pages=2)
+    assert cursor.buffered == 10
+    cursor.page(1)
+    assert engine.depths == [10]
+    cursor.page(2)
+    cursor.page(3)
+    assert engine.depths == [10, 20]
+    cursor.page(12)
+    assert engine.depths == [10, 20, 65]
+    assert cursor.scans == 3
+
+
+def test_buffer_is_capped_and_filters_are_kept():
+    engine = make_engine()
+    cursor = ResultCursor(engine, "0", page_size=10, max_results=25, domains=["b"])
+    assert set(cursor.page(0)["domain"]) == {"b"}
+    assert len(cursor.page(2)) == 5 and cursor.exhausted
+    assert cursor.page(3).empty
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from knowmap.pipeline import (
+    CANCELLED, DONE, FAILED, SKIPPED, Pipeline, Stage, get_pipeline, start_pipeline,
+    stop_pipeline
+)
+
+
+def wait_finished(pipeline, timeout=5.0):
+    deadline = time.time() + timeout
+    while not pipeline.finished():
+        assert time.time() < deadline, pipeline.summary()
+        time.sleep(0.01)
+
+
+def test_stages_run_after_their_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def record(name):
+        def run(stage):
+            with lock:
+                order.append(name)
+        return run
+
+    pipeline = Pipeline("fp", [
+        Stage("c", record("c"), depends=["a", "b"]),
+        Stage("a", record("a")),
+        Stage("b", record("b"), depends=["a"]),
+    ]).start()
+    wait_finished(pipeline)
+
+    assert order == ["a", "b", "c"]
+    assert {row["stage"]: row["status"] for row in pipeline.summary()} == {"a": DONE, "b": DONE, "c": DONE}
+
+
+def test_failure_skips_downstream_stages_only():
+    def fail(stage):
+        raise ValueError("boom")
+
+    pipeline = Pipeline("fp", [
+        Stage("a", fail),
+        Stage("b", lambda stage: None, depends=["a"]),
+        Stage("c", lambda stage: None, depends=["b"]),
+        Stage("d", lambda stage: None),
+    ]).start()
+    wait_finished(pipeline)
+
+    assert pipeline.status("a") == FAILED
+    assert pipeline.stages["a"].error == "boom"
+    assert pipeline.status("b") == SKIPPED
+    assert pipeline.status("c") == SKIPPED
+    assert pipeline.status("d") == DONE
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        Pipeline("fp", [Stage("a", lambda stage: None, depends=["missing"])])
+
+
+def test_cancel_stops_pending_and_reporting_stages():
+    started = threading.Event()
+
+    def long_stage(stage):
+        started.set()
+        while True:
+            stage.report(0.5)
+            time.sleep(0.01)
+
+    pipeline = Pipeline("fp", [
+        Stage("long", long_stage),
+        Stage("after", lambda stage: None, depends=["long"]),
+    ]).start()
+    assert started.wait(5)
+    pipeline.cancel()
+    wait_finished(pipeline)
+
+    assert pipeline.status("long") == CANCELLED
+    assert pipeline.status("after") == SKIPPED
+
+
+def test_replaced_run_cannot_commit():
+    key = "workspace-replaced"
+    release = threading.Event()
+    published = []
+
+    def slow(stage):
+        release.wait(5)
+        stage.commit(lambda: published.append("old"))
+
+    old = start_pipeline(key, "fp-old", [Stage("emb", slow)])
+    new = start_pipeline(key, "fp-new", [Stage("emb", lambda stage: stage.commit(lambda: published.append("new")))])
+    wait_finished(new)
+    release.set()
+    wait_finished(old)
+
+    assert published == ["new"]
+    assert old.status("emb") == CANCELLED
+    assert get_pipeline(key) is new
+    stop_pipeline(key)
+    assert get_pipeline(key) is None
+
+
+def test_stopped_run_cannot_commit():
+    key = "workspace-stopped"
+    release = threading.Event()
+
+    def slow(stage):
+        release.wait(5)
+        stage.commit(lambda: pytest.fail("a stopped run published its results"))
+
+    pipeline = start_pipeline(key, "fp", [Stage("graph", slow)])
+    stop_pipeline(key)
+    release.set()
+    wait_finished(pipeline)
+    assert pipeline.status("graph") == CANCELLED
+
+
+def test_same_fingerprint_reuses_the_running_pipeline():
+    key = "workspace-reuse"
+    first = start_pipeline(key, "fp", [Stage("a", lambda stage: None)])
+    assert start_pipeline(key, "fp", [Stage("a", lambda stage: None)]) is first
+    assert start_pipeline(key, "fp", [Stage("a", lambda stage: None)], restart=True) is not first
+    stop_pipeline(key)
+
+
+def test_commit_outside_a_pipeline_always_runs():
+    stage = Stage("solo", lambda stage: None)
+    done = []
+    stage.commit(lambda: done.append(True))
+    assert done == [True]
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pytest
+
+from knowmap.quantization import (
+    STORAGE_MODES, CompressedIndex, compressed_path, kmeans, recall_at_k, stored_mode,
+)
+from knowmap.vector_ops import cosine_scores, inverse_norms, top_k
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(40, 64))
+    rows = centers[rng.integers(0, len(centers), 3000)] + 0.35 * rng.normal(size=(3000, 64))
+    # Unnormalised rows: codes are built on unit vectors, norms are kept separately
+    return (rows * rng.uniform(0.5, 3.0, (3000, 1))).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def indexes(matrix):
+    """One index per compressed mode (PQ training is the slow part)"""
+    return {mode: CompressedIndex.build(matrix, mode) for mode in STORAGE_MODES[1:]}
+
+
+@pytest.mark.parametrize("mode, min_recall", [("float16", 0.99), ("int8", 0.95), ("pq", 0.9)])
+def test_reranked_recall_against_exact_search(matrix, indexes, mode, min_recall):
+    index = indexes[mode]
+    queries = np.random.default_rng(1).choice(len(matrix), 30, replace=False)
+    assert recall_at_k(index, matrix, queries, k=10) >= min_recall
+
+    query = matrix[queries[0]]
+    rows, scores = index.search(query, 10)
+    np.testing.assert_allclose(scores, cosine_scores(matrix[rows], query), rtol=1e-5)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_codes_are_smaller_than_the_matrix(matrix, indexes):
+    sizes = {mode: index.nbytes() for mode, index in indexes.items()}
+    assert sizes["float16"] == matrix.nbytes // 2
+    assert sizes["int8"] == matrix.nbytes // 4
+    assert sizes["pq"] < sizes["int8"]
+
+
+def test_approximate_scores_without_the_full_matrix(matrix):
+    index = CompressedIndex.build(matrix, "int8")
+    index.full_matrix = None
+    query = matrix[0]
+    rows, scores = index.search(query, 5)
+    assert rows[0] == 0
+    exact = cosine_scores(matrix[rows], query)
+    assert np.abs(scores - exact).max() < 0.05
+
+
+@pytest.mark.parametrize("mode", STORAGE_MODES[1:])
+def test_save_load_round_trip_keeps_codes_and_norms(tmp_path, matrix, indexes, mode):
+    index = indexes[mode]
+    np.testing.assert_allclose(index.inv_norms, inverse_norms(matrix), rtol=1e-6)
+
+    path = compressed_path(str(tmp_path / "store.pkl"), mode)
+    index.save(path)
+    loaded = CompressedIndex.load(path, full_matrix=matrix)
+    assert loaded.mode == mode
+    assert np.array_equal(loaded.codes, index.codes)
+    assert np.array_equal(loaded.inv_norms, index.inv_norms)
+    for a, b in zip(loaded.search(matrix[5], 10), index.search(matrix[5], 10)):
+        assert np.array_equal(a, b)
+
+
+def test_codes_files_without_norms_still_load(tmp_path, matrix):
+    path = str(tmp_path / "old.int8.npz")
+    index = CompressedIndex.build(matrix, "int8")
+    np.savez(path, mode="int8", codes=index.codes, **index.codec.state())
+    assert CompressedIndex.load(path).inv_norms is None
+
+
+def test_stored_mode_follows_the_codes_file(tmp_path):
+    store = str(tmp_path / "embeddings.pkl")
+    assert stored_mode(store) == "float32"
+    with open(compressed_path(store, "pq"), "wb"):
+        pass
+    assert stored_mode(store) == "pq"
+
+
+def test_recall_does_not_count_the_query_itself(matrix):
+    class SelfOnly:
+        def search(self, query, k, shortlist=None):
+            row = int(top_k(cosine_scores(matrix, query), 1)[0])
+            return np.array([row]), np.ones(1)
+
+    assert recall_at_k(SelfOnly(), matrix, [0, 1, 2], k=5) == 0.0
+
+
+def test_kmeans_separates_clear_clusters():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.normal(-5, 0.1, (50, 2)), rng.normal(5, 0.1, (50, 2))])
+    centroids = kmeans(x, 2)
+    assert sorted(np.round(centroids[:, 0]).tolist()) == [-5.0, 5.0]
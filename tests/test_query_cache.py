@@ -0,0 +1,38 @@
+import numpy as np
+
+from knowmap.query_cache import QueryEmbeddingCache, normalize_query
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.array([[len(t), t.count(" ")] for t in texts], dtype=np.float32)
+
+
+def test_repeated_and_variant_queries_are_served_from_the_cache():
+    encoder = CountingEncoder()
+    cache = QueryEmbeddingCache(encoder, max_size=10)
+    first = cache.encode(["Neural  Networks", "plants"])
+    again = cache.encode(["neural networks", "Plants", "plants"])
+    assert encoder.encoded == ["neural networks", "plants"]
+    np.testing.assert_array_equal(again[0], first[0])
+    assert cache.encode("PLANTS").shape == (2,)
+    assert cache.stats()["hits"] == 4 and cache.stats()["misses"] == 2
+    assert normalize_query("  A \t b ") == "a b"
+
+
+def test_cache_is_bounded_lru():
+    encoder = CountingEncoder()
+    cache = QueryEmbeddingCache(encoder, max_size=2)
+    cache.encode(["a", "b"])
+    cache.encode(["a"])                     # a is now more recent than b
+    cache.encode(["c"])
+    cache.encode(["a", "b"])
+    assert encoder.encoded == ["a", "b", "c", "b"]
+    assert cache.stats()["size"] == 2
+
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "size": 0, "max_size": 2}
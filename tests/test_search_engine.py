@@ -0,0 +1,74 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from knowmap.embedding_store import matrix_path, save_metadata
+from knowmap.quantization import CompressedIndex, compressed_path
+from knowmap.search_engine import RESULT_COLUMNS, SemanticSearchEngine, read_queries
+from knowmap.vector_ops import batch_top_k, cosine_scores
+
+
+class TableEncoder:
+    """Looks query vectors up in a fixed table (query text -> row of the table)"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        return self.table[[int(t.split()[-1]) for t in texts]]
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    rng = np.random.default_rng(5)
+    return (rng.normal(size=(500, 24)) * rng.uniform(0.2, 4, (500, 1))).astype(np.float32)
+
+
+@pytest.fixture
+def engine(matrix):
+    meta = pd.DataFrame({"id": np.arange(500) + 1000, "sentence": [f"s{i}" for i in range(500)],
+                         "domain": ["a", "b"] * 250, "label": "L"})
+    return SemanticSearchEngine(meta, matrix, encoder=TableEncoder(matrix))
+
+
+def test_blocked_batch_top_k_matches_brute_force(matrix):
+    queries = np.random.default_rng(0).normal(size=(7, 24)).astype(np.float32)
+    idx, scores = batch_top_k(matrix, queries, k=5, block=64)
+    for q, row_idx, row_scores in zip(queries, idx, scores):
+        exact = cosine_scores(matrix, q)
+        assert row_idx.tolist() == np.argsort(-exact)[:5].tolist()
+        np.testing.assert_allclose(row_scores, exact[row_idx], rtol=1e-5)
+
+
+def test_search_batch_returns_one_row_per_query_and_rank(engine):
+    results = engine.search_batch([f"query {i}" for i in (3, 10, 42)], k=4, batch_size=2, block=100)
+    assert list(results.columns) == RESULT_COLUMNS
+    assert results["query_id"].tolist() == [0] * 4 + [1] * 4 + [2] * 4
+    assert results["rank"].tolist() == [1, 2, 3, 4] * 3
+    assert results.groupby("query_id")["row"].first().tolist() == [3, 10, 42]   # each row finds itself
+    assert results.loc[0, "id"] == 1003
+    assert engine.search_batch([]).empty
+
+
+def test_compressed_store_is_searched_through_the_codes(tmp_path, matrix):
+    path = str(tmp_path / "store.pkl")
+    np.save(matrix_path(path), matrix)
+    save_metadata(pd.DataFrame({"id": range(500), "sentence": [f"s{i}" for i in range(500)]}), path)
+    CompressedIndex.build(matrix, "int8").save(compressed_path(path, "int8"))
+
+    engine = SemanticSearchEngine.from_store(path, encoder=TableEncoder(matrix), storage_mode="int8")
+    assert engine.compressed is not None and engine._inv_norms is not None
+    plain = SemanticSearchEngine.from_store(path, encoder=TableEncoder(matrix))
+    assert plain.compressed is None
+    assert engine.search("query 7", k=3)["row"].tolist() == plain.search("query 7", k=3)["row"].tolist()
+
+
+def test_queries_are_read_from_txt_and_csv():
+    txt = io.BytesIO(b"first query\n\n  second  \n")
+    txt.name = "queries.txt"
+    assert read_queries(txt) == ["first query", "second"]
+    csv = io.BytesIO(b"id,query\n1,alpha\n2,\n3,beta\n")
+    csv.name = "queries.csv"
+    assert read_queries(csv) == ["alpha", "beta"]
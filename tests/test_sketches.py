@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from knowmap.sketches import (
+    CountMinSketch, DatasetSketch, HyperLogLog, SpaceSaving, TDigest, build_sketch, hash_values,
+    pack_strings, unpack_strings,
+)
+
+
+def zipf_values(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).zipf(1.3, n) % 5000
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = np.random.default_rng(3)
+    n = 30_000
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "sentence": [f"Sentence {v} about topic {v % 97}." for v in zipf_values(n, 3)],
+        "domain": rng.choice(["bio", "cs", "phys", "chem"], n, p=[0.5, 0.3, 0.15, 0.05]),
+        "label": rng.choice([f"L{i}" for i in range(20)], n),
+    })
+
+
+def test_strings_pack_and_unpack():
+    values = ["", "plain", "ünïcödé ✓", "x" * 1000]
+    assert unpack_strings(*pack_strings(values)).tolist() == values
+
+
+@pytest.mark.parametrize("n_distinct", [10, 1000, 200_000])
+def test_hyperloglog_error_and_merge(n_distinct):
+    hashes = hash_values(np.arange(n_distinct))
+    halves = HyperLogLog(), HyperLogLog()
+    halves[0].update(hashes[: n_distinct // 2])
+    halves[1].update(np.concatenate([hashes[n_distinct // 2:], hashes[:10]]))   # overlap counts once
+    halves[0].merge(halves[1])
+    assert abs(halves[0].estimate() - n_distinct) / n_distinct < 0.03
+
+
+def test_count_min_never_undercounts():
+    values = zipf_values(50_000)
+    exact = pd.Series(values).value_counts()
+    sketch, other = CountMinSketch(width=1 << 10), CountMinSketch(width=1 << 10)
+    sketch.update(hash_values(values[:25_000]))
+    other.update(hash_values(values[25_000:]))
+    sketch.merge(other)
+    estimates = sketch.query(hash_values(exact.index.values))
+    assert (estimates >= exact.values).all()
+    assert (estimates - exact.values).max() <= np.e / (1 << 10) * len(values) * 2
+
+
+def test_space_saving_bounds_hold_after_merging_chunks():
+    values = zipf_values(60_000).astype(str)
+    exact = pd.Series(values).value_counts()
+    sketch = SpaceSaving(capacity=100)
+    for start in range(0, len(values), 7_000):
+        sketch.update(values[start:start + 7_000])
+    top = sketch.top(10)
+    assert top["value"].tolist()[:5] == exact.index[:5].tolist()
+    truth = exact.reindex(top["value"]).values
+    assert (top["min_count"].values <= truth).all() and (truth <= top["count"].values).all()
+
+
+def test_tdigest_quantiles_within_rank_error_after_merge():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.normal(100, 15, 40_000), rng.exponential(30, 40_000)])
+    digest = TDigest()
+    for part in np.array_split(values, 8):
+        chunk = TDigest()
+        chunk.update(np.round(part))
+        digest.merge(chunk)
+    ordered = np.sort(np.round(values))
+    for q in (0.01, 0.25, 0.5, 0.9, 0.99):
+        rank = np.searchsorted(ordered, digest.quantile(q)) / len(ordered)
+        assert abs(rank - q) < 0.01, q
+    assert digest.mean == pytest.approx(np.round(values).mean())
+    assert (digest.min, digest.max) == (ordered[0], ordered[-1])
+    assert len(digest.means) < 200
+
+
+def test_dataset_sketch_matches_exact_statistics(dataset):
+    sketch = build_sketch(dataset, "fp", chunk=4_000)
+    stats = sketch.overview()
+    assert stats["records"] == len(dataset)
+    assert (stats["unique_domains"], stats["unique_labels"]) == (4, 20)
+    exact_unique = dataset["sentence"].nunique()
+    assert abs(stats["unique_sentences"] - exact_unique) / exact_unique < 0.03
+    assert dict(stats["domain_counts"]) == dataset["domain"].value_counts().to_dict()
+    assert stats["avg_length"] == pytest.approx(dataset["sentence"].str.len().mean())
+
+    top_sentence = dataset["sentence"].value_counts()
+    assert sketch.count_of("sentence", top_sentence.index[0]) >= top_sentence.iloc[0]
+
+
+def test_dataset_sketch_save_load_round_trip(tmp_path, dataset):
+    sketch = build_sketch(dataset, "fp", chunk=10_000)
+    path = str(tmp_path / "sketch.npz")
+    sketch.save(path)
+    loaded = DatasetSketch.load(path)
+    assert (loaded.fingerprint, loaded.version, loaded.rows) == ("fp", sketch.version, sketch.rows)
+    assert loaded.overview() == sketch.overview()
+    assert loaded.count_of("word", "topic") == sketch.count_of("word", "topic")
+
+    # A loaded sketch keeps merging correctly
+    extra = DatasetSketch()
+    extra.update(dataset.iloc[:1000])
+    loaded.merge(extra)
+    assert loaded.rows == len(dataset) + 1000
+    assert loaded.overview()["unique_domains"] == 4
@@ -0,0 +1,18 @@
+from knowmap.startup import IMPORT_TIMINGS, import_timer, start_warm_up, warm_up_error
+
+
+def test_only_the_cold_import_is_timed():
+    with import_timer("test.module"):
+        pass
+    first = IMPORT_TIMINGS["test.module"]
+    with import_timer("test.module"):
+        pass
+    assert IMPORT_TIMINGS["test.module"] == first
+
+
+def test_failed_warm_up_is_reported():
+    thread = start_warm_up("no-such-backend")
+    assert start_warm_up("no-such-backend") is thread
+    thread.join(timeout=30)
+    assert "Unknown encoder backend" in warm_up_error("no-such-backend")
+    assert warm_up_error("torch-never-started") is None
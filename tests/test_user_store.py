@@ -0,0 +1,86 @@
+import json
+import threading
+
+import pytest
+
+from knowmap.user_store import UserStore
+
+
+def make_store(tmp_path, legacy=None):
+    legacy_path = None
+    if legacy is not None:
+        legacy_path = tmp_path / "users.json"
+        legacy_path.write_text(json.dumps(legacy))
+    return UserStore(str(tmp_path / "users.db"), str(legacy_path) if legacy_path else None)
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = {
+        "alice": {"password": "h1", "email": "a@x", "role": "admin", "saved_graphs": [{"name": "g"}]},
+        "bob": {"password": "h2", "preferences": {"theme": "Dark"}},
+    }
+    store = make_store(tmp_path, legacy)
+    assert store.count() == 2
+    assert store.get("alice")["role"] == "admin"
+    assert store.get("alice")["saved_graphs"] == [{"name": "g"}]
+    assert store.get("bob")["preferences"] == {"theme": "Dark"}
+    assert store.get("bob")["saved_graphs"] == []
+
+    # An existing database is never re-imported (deleted accounts stay deleted)
+    store.delete("bob")
+    reopened = make_store(tmp_path, legacy)
+    assert reopened.get("bob") is None
+    assert reopened.count() == 1
+
+
+def test_create_refuses_taken_usernames(tmp_path):
+    store = make_store(tmp_path)
+    assert store.create("carol", {"password": "h"})
+    assert not store.create("carol", {"password": "other"})
+    assert store.get("carol")["password"] == "h"
+
+
+def test_update_and_saved_graphs(tmp_path):
+    store = make_store(tmp_path)
+    store.create("dave", {"password": "h"})
+    assert store.update("dave", role="researcher", preferences={"results_per_page": 20})
+    assert not store.update("nobody", role="admin")
+    with pytest.raises(ValueError):
+        store.update("dave", is_admin=True)
+
+    assert store.add_saved_graph("dave", {"name": "g1"})
+    assert store.add_saved_graph("dave", {"name": "g1"})       # duplicate names are ignored
+    assert not store.add_saved_graph("nobody", {"name": "g1"})
+    record = store.get("dave")
+    assert record["role"] == "researcher"
+    assert record["preferences"] == {"results_per_page": 20}
+    assert record["saved_graphs"] == [{"name": "g1"}]
+
+
+def test_prefix_search_and_pages(tmp_path):
+    store = make_store(tmp_path)
+    store.import_users({f"user{i:03d}": {"password": "h"} for i in range(120)})
+    store.create("admin", {"password": "h"})
+
+    assert store.count() == 121
+    assert store.count("user1") == 20
+    first = store.page("user", page=0, page_size=50)
+    last = store.page("user", page=2, page_size=50)
+    assert [u["username"] for u in first][:2] == ["user000", "user001"]
+    assert len(last) == 20
+    assert store.page("zzz") == []
+
+
+def test_concurrent_saved_graph_appends_are_not_lost(tmp_path):
+    store = make_store(tmp_path)
+    store.create("erin", {"password": "h"})
+
+    def add(i):
+        store.add_saved_graph("erin", {"name": f"g{i}"})
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store.get("erin")["saved_graphs"]) == 20
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from knowmap.value_index import TrigramIndex, ValueIndex, trigram_codes
+
+
+@pytest.fixture
+def names():
+    return ValueIndex(pd.Series(["Photosynthesis", "photon", "Neural net", "Neuron", "Café au lait",
+                                 "photon", None, "xyz"]))
+
+
+def test_prefix_search_is_case_insensitive_and_deduplicated(names):
+    assert len(names) == 6
+    assert names.search("pho") == (["photon", "Photosynthesis"], 2)
+    assert names.search("NEUR")[0] == ["Neural net", "Neuron"]
+    assert names.search("q") == ([], 0)
+
+
+def test_substring_search_through_trigrams(names):
+    assert names.search("syn", mode="contains")[0] == ["Photosynthesis"]
+    assert names.search("ron", mode="contains")[0] == ["Neuron"]
+    assert names.search("afé a", mode="contains")[0] == ["Café au lait"]
+    assert names.search("on", mode="contains")[0] == ["Neuron", "photon"]     # shorter than a trigram
+    assert names.search("zzz", mode="contains") == ([], 0)
+
+
+def test_trigram_candidates_match_a_scan():
+    rng = np.random.default_rng(0)
+    keys = ["".join(rng.choice(list("abcde"), rng.integers(0, 9))) for _ in range(3000)]
+    index = TrigramIndex.build(keys, chunk=700)
+    for query in ("abc", "dea", "aaaa", "bcdeb"):
+        expected = {i for i, k in enumerate(keys) if set(trigram_codes(query.encode())) <= set(trigram_codes(k.encode()))}
+        assert set(index.candidates(query).tolist()) == expected
+    assert index.candidates("ab") is None
+
+
+def test_pages_cover_every_match_once():
+    index = ValueIndex(pd.Series([f"item {i:03d}" for i in range(120)]))
+    pages = [index.search("item", page=p, page_size=50) for p in range(3)]
+    assert [len(values) for values, _ in pages] == [50, 50, 20]
+    assert sum((values for values, _ in pages), []) == [f"item {i:03d}" for i in range(120)]
+    assert pages[0][1] == 120
+
+
+def test_numeric_ids_are_listed_in_numeric_order():
+    ids = ValueIndex(pd.Series([10, 2, 1, 33, 3, 100, 21]))
+    assert ids.search()[0] == [1, 2, 3, 10, 21, 33, 100]
+    assert ids.search("1")[0] == [1, 10, 100]
+    assert ids.search("3", mode="contains")[0] == [3, 33]
+    mixed = ValueIndex(pd.Series(["10", "2", "b"]))
+    assert mixed.search()[0] == ["10", "2", "b"]
@@ -0,0 +1,93 @@
+import os
+import time
+
+from knowmap.workspace import (
+    BLOBS_DIR, DEDUP_MIN_BYTES, Workspace, artifact_of, collect_blobs, list_workspaces, safe_name
+)
+
+
+def write(path, data: bytes, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_names_and_artifact_keys():
+    assert safe_name("../alice smith") == "alice_smith"
+    assert safe_name("...") == "_"
+    assert artifact_of("cross_domain_embeddings.int8.npz") == "cross_domain_embeddings"
+    assert artifact_of(os.path.join("exports", "entities-abc.csv.gz")) == os.path.join("exports", "entities-abc")
+
+
+def test_workspaces_are_separate(tmp_path):
+    root = str(tmp_path)
+    a = Workspace(root, "alice", "p1")
+    b = Workspace(root, "bob", "p1")
+    assert a.path("x.pkl") != b.path("x.pkl")
+    assert list_workspaces(root) == [("alice", "p1"), ("bob", "p1")]
+
+
+def test_eviction_is_lru_by_artifact_and_skips_pinned(tmp_path):
+    ws = Workspace(str(tmp_path), "alice", pinned=["dataset.pkl"])
+    now = time.time()
+    write(ws.path("dataset.pkl"), b"d" * 400, now - 300)
+    write(ws.path("emb.pkl"), b"m" * 100, now - 200)
+    write(ws.path("emb.npy"), b"v" * 300, now - 200)
+    write(ws.path("graph.html"), b"g" * 300, now - 100)
+    ws.sync()
+    ws.touch(ws.path("emb.npy"))                    # emb is now the most recently used
+
+    evicted = ws.evict(800)
+    assert evicted == ["graph"]
+    assert os.path.exists(ws.path("dataset.pkl"))
+    assert os.path.exists(ws.path("emb.pkl")) and os.path.exists(ws.path("emb.npy"))
+
+    # Both files of an artifact go together; the pinned dataset never does
+    assert ws.evict(0) == ["emb"]
+    assert not os.path.exists(ws.path("emb.pkl")) and not os.path.exists(ws.path("emb.npy"))
+    assert os.path.exists(ws.path("dataset.pkl"))
+
+
+def test_quota_is_enforced_on_sync(tmp_path):
+    ws = Workspace(str(tmp_path), "alice", quota_bytes=500)
+    now = time.time()
+    write(ws.path("old.bin"), b"o" * 400, now - 100)
+    write(ws.path("new.bin"), b"n" * 400, now)
+    usage = ws.sync()
+    assert usage["bytes"] == 400
+    assert not os.path.exists(ws.path("old.bin"))
+    assert os.path.exists(ws.path("new.bin"))
+
+
+def test_temp_files_are_not_accounted(tmp_path):
+    ws = Workspace(str(tmp_path), "alice")
+    write(ws.path("x.npy.run1.tmp"), b"t" * 100)
+    write(ws.path("foo.npz.tmp.npz"), b"t" * 100)      # np.savez appends .npz to a .tmp name
+    assert ws.sync()["files"] == 0
+
+
+def test_identical_large_files_share_one_copy(tmp_path):
+    root = str(tmp_path)
+    data = os.urandom(DEDUP_MIN_BYTES)
+    a = Workspace(root, "alice")
+    b = Workspace(root, "bob")
+    write(a.path("big.npy"), data)
+    write(b.path("big.npy"), data)
+    a.sync()
+    usage = b.sync()
+
+    assert os.path.samefile(a.path("big.npy"), b.path("big.npy"))
+    assert usage["shared_bytes"] == len(data)
+
+    # Replacing a file (as every writer does) leaves the other workspace's copy intact
+    write(a.path("big.npy.tmp"), b"changed")
+    os.replace(a.path("big.npy.tmp"), a.path("big.npy"))
+    with open(b.path("big.npy"), "rb") as f:
+        assert f.read() == data
+
+    # The blob is collected once no workspace links to it
+    os.remove(b.path("big.npy"))
+    assert collect_blobs(root) == len(data)
+    assert not any(files for _, _, files in os.walk(os.path.join(root, BLOBS_DIR)))